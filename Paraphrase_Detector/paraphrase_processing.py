@@ -1,12 +1,16 @@
 import os
 import fitz # PyMuPDF
 import re
+import numpy as np
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain.docstore.document import Document
 from langchain_community.vectorstores import FAISS
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 from typing import List, Dict, Tuple, Optional
 
+from instrumentation import ContextThreadPoolExecutor, record_llm_response, span, traced
+from usage_tracking import BudgetExceeded, check_budget, record_usage
+
 
 DEFAULT_CHUNK_SIZE = 800
 DEFAULT_CHUNK_OVERLAP = 200
@@ -14,6 +18,11 @@ DEFAULT_MIN_CONTENT_LENGTH = 50
 DEFAULT_MIN_WORD_COUNT = 10
 DEFAULT_MAX_WORKERS_PARAPHRASE = 4 # Specific to paraphrase
 DEFAULT_BATCH_SIZE_PARAPHRASE = 5  # Specific to paraphrase
+# Sentence pairs below this cosine similarity are not reported as aligned
+ALIGNMENT_MIN_SIMILARITY = float(os.getenv("PARAPHRASE_ALIGNMENT_MIN_SIMILARITY", "0.75"))
+ALIGNMENT_MAX_PAIRS = 5
+ALIGNMENT_MIN_SENTENCE_WORDS = 4
+SENTENCE_BOUNDARY_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[])")
 
 def is_meaningful_content(text: str, min_length: int, min_words: int) -> bool:
     """Check if text contains meaningful content worth processing."""
@@ -41,6 +50,7 @@ def is_meaningful_content(text: str, min_length: int, min_words: int) -> bool:
             return False
     return True
 
+@traced("extract_text", "paraphrase")
 def extract_text_from_file(file_content_bytes: bytes, file_type: str, 
                            min_content_length: int, min_word_count: int) -> str:
     """Extract text from PDF or TXT file content, with content validation."""
@@ -97,6 +107,7 @@ def is_reference_section(section_title: str) -> bool:
         return True
     return False
 
+@traced("chunking", "paraphrase")
 def chunk_text_by_sections(
     text_content: str, text_hash: str, 
     text_splitter: RecursiveCharacterTextSplitter,
@@ -188,7 +199,8 @@ def create_vector_store_for_paraphrase(docs: List[Document], embeddings_model,
     valid_docs = [doc for doc in docs if is_meaningful_content(doc.page_content, min_content_length, min_word_count)]
     if not valid_docs: return None
     try:
-        return FAISS.from_documents(valid_docs, embeddings_model)
+        with span("embedding", "paraphrase", documents=len(valid_docs)):
+            return FAISS.from_documents(valid_docs, embeddings_model)
     except Exception as e:
         # st.warning(f"Failed to create vector store: {e}") # UI concern
         print(f"Warning: Failed to create vector store: {e}")
@@ -203,12 +215,70 @@ def calculate_text_similarity_jaccard(text1: str, text2: str) -> float:
     union = words1.union(words2)
     return len(intersection) / len(union) if union else 0.0
 
+def split_into_sentences(text: str, min_words: int = ALIGNMENT_MIN_SENTENCE_WORDS) -> List[Tuple[int, int, str]]:
+    """Returns (start, end, sentence) for each sentence of text with at least min_words words."""
+    sentences = []
+    start = 0
+    for boundary in list(SENTENCE_BOUNDARY_PATTERN.finditer(text)) + [None]:
+        end = boundary.start() if boundary else len(text)
+        sentence = text[start:end].strip()
+        if len(sentence.split()) >= min_words:
+            sentence_start = text.index(sentence, start)
+            sentences.append((sentence_start, sentence_start + len(sentence), " ".join(sentence.split())))
+        if boundary:
+            start = boundary.end()
+    return sentences
+
+def align_sentences(source_text: str, matched_text: str, embeddings_model,
+                    min_similarity: float = ALIGNMENT_MIN_SIMILARITY,
+                    max_pairs: int = ALIGNMENT_MAX_PAIRS) -> List[Dict]:
+    """Pairs up the most similar sentences of a matched chunk pair, one embedding request for both sides.
+
+    Pairs are one-to-one, chosen greedily from the highest cosine similarity down, and
+    returned in source order with character offsets into source_text and matched_text
+    (a detection result carries the full chunks as source_text and matched_chunk_text).
+    """
+    source_sentences = split_into_sentences(source_text)
+    matched_sentences = split_into_sentences(matched_text)
+    if not source_sentences or not matched_sentences:
+        return []
+    texts = [sentence for _, _, sentence in source_sentences + matched_sentences]
+    with span("embedding", "paraphrase_alignment", sentences=len(texts)):
+        vectors = np.asarray(embeddings_model.embed_documents(texts), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1.0, norms)
+    similarity = vectors[:len(source_sentences)] @ vectors[len(source_sentences):].T
+
+    pairs = []
+    used_source, used_matched = set(), set()
+    for flat_index in np.argsort(similarity, axis=None)[::-1]:
+        i, j = np.unravel_index(flat_index, similarity.shape)
+        score = float(similarity[i, j])
+        if score < min_similarity or len(pairs) >= max_pairs:
+            break
+        if i in used_source or j in used_matched:
+            continue
+        used_source.add(i)
+        used_matched.add(j)
+        source_start, source_end, source_sentence = source_sentences[i]
+        matched_start, matched_end, matched_sentence = matched_sentences[j]
+        pairs.append({
+            "source_sentence": source_sentence,
+            "source_span": [source_start, source_end],
+            "matched_sentence": matched_sentence,
+            "matched_span": [matched_start, matched_end],
+            "similarity": round(score, 4),
+        })
+    pairs.sort(key=lambda pair: pair["source_span"][0])
+    return pairs
+
 def _process_single_chunk_for_paraphrase(
     source_doc_chunk: Document, 
     comparison_stores: Dict[str, FAISS], 
     chat_client, # Pass the initialized client
     min_content_length: int, 
-    min_word_count: int
+    min_word_count: int,
+    embeddings_model = None # Sentence alignment for matches; defaults to the store's embeddings
 ) -> Optional[Dict]:
     source_content = source_doc_chunk.page_content.strip()
     source_metadata = source_doc_chunk.metadata
@@ -222,7 +292,8 @@ def _process_single_chunk_for_paraphrase(
     for comp_filename, comp_vector_store in comparison_stores.items():
         if comp_vector_store is None: continue
         try:
-            results = comp_vector_store.similarity_search_with_score(source_content, k=5)
+            with span("vector_search", "paraphrase", store=comp_filename):
+                results = comp_vector_store.similarity_search_with_score(source_content, k=5)
             best_match_text = None
             best_score = float('inf')
             best_word_sim = 0.0
@@ -249,22 +320,39 @@ COMPARISON: {best_match_text[:500]}...
 If similar/paraphrased, respond: MATCH: YES | REASON: [brief reason]
 If not similar, respond: MATCH: NO"""
                 try:
-                    response = chat_client.invoke(prompt)
+                    check_budget()
+                    # Usage stays with the submission's document scope; the comparison file is only a label
+                    with span("llm_call", "paraphrase", comparison=comp_filename) as attributes:
+                        response = chat_client.invoke(prompt)
+                        record_llm_response("paraphrase", response, attributes)
+                        record_usage("paraphrase", response)
                     content = response.content.strip()
 
                     if "MATCH: YES" in content.upper():
                         reason_match = re.search(r'REASON:\s*([^\n]+)', content, re.IGNORECASE)
                         reason = reason_match.group(1).strip() if reason_match else "Similar content detected"
+                        aligned_sentences = []
+                        alignment_embeddings = embeddings_model or getattr(comp_vector_store, "embeddings", None)
+                        if alignment_embeddings is not None:
+                            try:
+                                aligned_sentences = align_sentences(source_content, best_match_text, alignment_embeddings)
+                            except Exception as e:
+                                print(f"Warning: Sentence alignment failed for {comp_filename}: {e}")
                         return {
                             "source_section_title": section_title,
                             "source_chunk_index": chunk_in_section_idx,
                             "source_text": source_content,
                             "matched_file": comp_filename,
                             "matched_text": best_match_text[:300] + "..." if len(best_match_text) > 300 else best_match_text,
+                            # Full chunk, which the aligned_sentences matched_span offsets index into
+                            "matched_chunk_text": best_match_text,
                             "reason": reason,
                             "vector_score": best_score,
-                            "word_similarity": best_word_sim
+                            "word_similarity": best_word_sim,
+                            "aligned_sentences": aligned_sentences
                         }
+                except BudgetExceeded:
+                    return None # Out of LLM budget: the remaining chunks are skipped the same way
                 except Exception as e:
                     print(f"LLM call failed for chunk comparison: {e}") # Log error
                     continue # Try next comparison store or chunk
@@ -282,7 +370,8 @@ def detect_paraphrased_sections_processing(
     min_word_count: int,
     batch_size: int,
     max_workers: int,
-    progress_callback = None # For Streamlit progress updates
+    progress_callback = None, # For Streamlit progress updates
+    embeddings_model = None
 ) -> List[Dict]:
     if not source_documents or not comparison_vector_stores_map:
         return []
@@ -295,7 +384,7 @@ def detect_paraphrased_sections_processing(
     total_docs = len(meaningful_docs)
     processed_docs = 0
 
-    with ThreadPoolExecutor(max_workers=min(max_workers, os.cpu_count() or 1)) as executor:
+    with ContextThreadPoolExecutor(max_workers=min(max_workers, os.cpu_count() or 1)) as executor:
         futures = {
             executor.submit(
                 _process_single_chunk_for_paraphrase, 
@@ -303,7 +392,8 @@ def detect_paraphrased_sections_processing(
                 comparison_vector_stores_map, 
                 chat_client,
                 min_content_length,
-                min_word_count
+                min_word_count,
+                embeddings_model
             ): doc for doc in meaningful_docs
         }
         
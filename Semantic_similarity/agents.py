@@ -1,8 +1,12 @@
+import asyncio
 import time
 import re
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from collections import deque
+from typing import List, Dict, Any, Optional, Deque
 from abc import ABC, abstractmethod
+from concurrent.futures import wait
 from datetime import datetime
 import numpy as np
 
@@ -17,9 +21,22 @@ from .models import (
     ResearchPaperSection,  # ResearchPaperSection is defined but not used by agents in provided code
 )
 from .pdf_processor import PDFProcessor
+from instrumentation import (
+    ContextThreadPoolExecutor,
+    extract_token_usage,
+    record_llm_response,
+    record_retry,
+    span,
+)
+from usage_tracking import check_budget, record_usage
 
 logger = logging.getLogger(__name__)
 
+# Number of lightweight task records each agent keeps (oldest are dropped first)
+DEFAULT_TASK_HISTORY_SIZE = 200
+# Seconds report generation waits on the LLM insight/summary calls before using fallbacks
+REPORT_LATENCY_BUDGET_SECONDS = 30.0
+
 
 # Enums from original file (if needed by agents directly, or handled by orchestrator)
 class TaskStatus:  # Simplified for this context
@@ -43,22 +60,156 @@ class Task:  # Simplified
         self.status: str = TaskStatus.PENDING
         self.result: Optional[Any] = None
         self.error: Optional[str] = None
+        self.created_at: datetime = datetime.now()
+        self.started_at: Optional[datetime] = None
         self.completed_at: Optional[datetime] = None
+        self.prompt_tokens: int = 0
+        self.completion_tokens: int = 0
+
+
+class TaskRecord:
+    """Lightweight summary of a finished Task; never holds input_data or result."""
+
+    __slots__ = (
+        "id",
+        "action",
+        "status",
+        "queued_seconds",
+        "duration_seconds",
+        "prompt_tokens",
+        "completion_tokens",
+        "error",
+        "completed_at",
+    )
+
+    MAX_ERROR_LENGTH = 500
+
+    def __init__(self, task: Task):
+        finished_at = task.completed_at or datetime.now()
+        started_at = task.started_at or task.created_at
+        self.id = task.id
+        self.action = task.action
+        self.status = task.status
+        self.queued_seconds = (started_at - task.created_at).total_seconds()
+        self.duration_seconds = (finished_at - started_at).total_seconds()
+        self.prompt_tokens = task.prompt_tokens
+        self.completion_tokens = task.completion_tokens
+        self.error = task.error[: self.MAX_ERROR_LENGTH] if task.error else None
+        self.completed_at = finished_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = {slot: getattr(self, slot) for slot in self.__slots__}
+        record["completed_at"] = self.completed_at.isoformat()
+        return record
 
 
 class BaseAgent(ABC):
-    def __init__(self, name: str, llm: ChatOpenAI):  # Expect initialized LLM
+    def __init__(
+        self,
+        name: str,
+        llm: ChatOpenAI,
+        max_history: int = DEFAULT_TASK_HISTORY_SIZE,
+    ):  # Expect initialized LLM
         self.name = name
         self.llm = llm
-        self.task_history: List[Task] = []  # Kept for consistency
+        # Ring buffer of TaskRecords: the agent outlives many analyses in st.session_state,
+        # so full Task objects (paper text, results) must not accumulate here.
+        self.task_history: Deque[TaskRecord] = deque(maxlen=max_history)
+        # Running per-action aggregates, unaffected by ring buffer eviction
+        self._stage_stats: Dict[str, Dict[str, float]] = {}
+        self._history_lock = threading.Lock()  # Agents are shared across worker threads
 
     @abstractmethod
     def execute_task(self, task: Task) -> Any:
         pass
 
+    @abstractmethod
+    async def execute_task_async(self, task: Task) -> Any:
+        pass
+
+    def start_task(self, task: Task):
+        task.status = TaskStatus.IN_PROGRESS
+        task.started_at = datetime.now()
+
     def log_task(self, task: Task):
-        self.task_history.append(task)
-        logger.info(f"[{self.name}] - Task {task.id} ({task.action}): {task.status}")
+        record = TaskRecord(task)
+        with self._history_lock:
+            self.task_history.append(record)
+            stats = self._stage_stats.setdefault(
+                record.action,
+                {
+                    "count": 0,
+                    "failed": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                },
+            )
+            stats["count"] += 1
+            if record.status == TaskStatus.FAILED:
+                stats["failed"] += 1
+            stats["total_seconds"] += record.duration_seconds
+            stats["max_seconds"] = max(stats["max_seconds"], record.duration_seconds)
+            stats["prompt_tokens"] += record.prompt_tokens
+            stats["completion_tokens"] += record.completion_tokens
+        logger.info(
+            f"[{self.name}] - Task {task.id} ({task.action}): {task.status} in {record.duration_seconds:.2f}s"
+        )
+
+    def get_stage_timings(self) -> Dict[str, Dict[str, float]]:
+        """Per-action latency aggregates. Percentiles cover the records still in the history."""
+        with self._history_lock:
+            records = list(self.task_history)
+            stage_stats = {action: dict(stats) for action, stats in self._stage_stats.items()}
+        for action, stats in stage_stats.items():
+            durations = [r.duration_seconds for r in records if r.action == action]
+            stats["mean_seconds"] = stats["total_seconds"] / stats["count"]
+            stats["p50_seconds"] = float(np.percentile(durations, 50)) if durations else 0.0
+            stats["p95_seconds"] = float(np.percentile(durations, 95)) if durations else 0.0
+        return stage_stats
+
+    def _record_token_usage(
+        self, task: Optional[Task], response: Any, span_attributes: Optional[Dict] = None
+    ):
+        record_llm_response(self.name, response, span_attributes)
+        record_usage(self.name, response)
+        if task is None:
+            return
+        prompt_tokens, completion_tokens = extract_token_usage(response)
+        with self._history_lock:
+            task.prompt_tokens += prompt_tokens
+            task.completion_tokens += completion_tokens
+
+    def _build_messages(self, prompt: str) -> list:
+        return [
+            SystemMessage(
+                content=f"You are an expert {self.name} specializing in academic literature."
+            ),
+            HumanMessage(content=prompt),
+        ]
+
+    def _parse_llm_response(self, content: str, parser: PydanticOutputParser) -> Any:
+        # Robust JSON extraction
+        json_match = re.search(r"```json\s*(\{[\s\S]*?\})\s*```", content, re.DOTALL)
+        if not json_match:
+            json_match = re.search(
+                r"(\{[\s\S]*\})", content, re.DOTALL
+            )  # Find first valid JSON block
+
+        if json_match:
+            json_str = json_match.group(1)
+            return parser.parse(json_str)
+        # Try to parse directly if no markdown or clear block, assuming entire content might be JSON
+        try:
+            return parser.parse(content)
+        except Exception as direct_parse_err:
+            logger.error(
+                f"Direct parsing failed after no JSON block found: {direct_parse_err}"
+            )
+            raise ValueError(
+                f"No structured JSON data found in LLM response for {self.name}. Response: {content[:500]}..."
+            )
 
     def _api_call_with_retry(
         self,
@@ -66,48 +217,64 @@ class BaseAgent(ABC):
         parser: PydanticOutputParser,
         max_retries: int = 3,
         initial_delay: int = 1,
+        task: Optional[Task] = None,
+        deadline: Optional[float] = None,
     ) -> Any:
+        # deadline is a time.monotonic() value; past it the caller has stopped waiting, so
+        # no new attempt or backoff is started (an in-flight request still runs to completion)
+        check_budget()  # Over budget is final; retrying wouldn't help
         for attempt in range(max_retries):
+            self._check_deadline(deadline)
             try:
-                response = self.llm.invoke(
-                    [
-                        SystemMessage(
-                            content=f"You are an expert {self.name} specializing in academic literature."
-                        ),
-                        HumanMessage(content=prompt),
-                    ]
-                )
-                content = response.content
-                # Robust JSON extraction
-                json_match = re.search(
-                    r"```json\s*(\{[\s\S]*?\})\s*```", content, re.DOTALL
+                with span("llm_call", self.name, attempt=attempt + 1) as attributes:
+                    response = self.llm.invoke(self._build_messages(prompt))
+                    self._record_token_usage(task, response, attributes)
+                return self._parse_llm_response(response.content, parser)
+            except Exception as e:
+                logger.warning(
+                    f"Attempt {attempt + 1}/{max_retries} failed for {self.name}: {e}"
                 )
-                if not json_match:
-                    json_match = re.search(
-                        r"(\{[\s\S]*\})", content, re.DOTALL
-                    )  # Find first valid JSON block
-
-                if json_match:
-                    json_str = json_match.group(1)
-                    return parser.parse(json_str)
+                delay = initial_delay * (2**attempt)
+                if attempt < max_retries - 1 and (
+                    deadline is None or time.monotonic() + delay < deadline
+                ):
+                    record_retry(self.name)
+                    time.sleep(delay)
                 else:
-                    # Try to parse directly if no markdown or clear block, assuming entire content might be JSON
-                    try:
-                        return parser.parse(content)
-                    except Exception as direct_parse_err:
-                        logger.error(
-                            f"Direct parsing failed after no JSON block found: {direct_parse_err}"
-                        )
-                        raise ValueError(
-                            f"No structured JSON data found in LLM response for {self.name}. Response: {content[:500]}..."
-                        )
+                    logger.error(
+                        f"API call failed after {attempt + 1} attempts for {self.name}."
+                    )
+                    raise
+
+    def _check_deadline(self, deadline: Optional[float]):
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(
+                f"{self.name} skipped an LLM call: the caller's latency budget has passed."
+            )
 
+    async def _api_call_with_retry_async(
+        self,
+        prompt: str,
+        parser: PydanticOutputParser,
+        max_retries: int = 3,
+        initial_delay: int = 1,
+        task: Optional[Task] = None,
+    ) -> Any:
+        # Same retry policy as _api_call_with_retry, but yields the event loop while waiting
+        check_budget()
+        for attempt in range(max_retries):
+            try:
+                with span("llm_call", self.name, attempt=attempt + 1) as attributes:
+                    response = await self.llm.ainvoke(self._build_messages(prompt))
+                    self._record_token_usage(task, response, attributes)
+                return self._parse_llm_response(response.content, parser)
             except Exception as e:
                 logger.warning(
                     f"Attempt {attempt + 1}/{max_retries} failed for {self.name}: {e}"
                 )
                 if attempt < max_retries - 1:
-                    time.sleep(initial_delay * (2**attempt))
+                    record_retry(self.name)
+                    await asyncio.sleep(initial_delay * (2**attempt))
                 else:
                     logger.error(
                         f"API call failed after {max_retries} retries for {self.name}."
@@ -123,7 +290,7 @@ class PDFExtractionAgent(BaseAgent):
         self.pdf_processor = PDFProcessor()
 
     def execute_task(self, task: Task) -> str:
-        task.status = TaskStatus.IN_PROGRESS
+        self.start_task(task)
         pdf_path = ""  # Initialize for robust error message
         try:
             pdf_path = task.input_data.get("pdf_path")
@@ -147,6 +314,31 @@ class PDFExtractionAgent(BaseAgent):
         finally:
             self.log_task(task)
 
+    async def execute_task_async(self, task: Task) -> str:
+        self.start_task(task)
+        pdf_path = ""
+        try:
+            pdf_path = task.input_data.get("pdf_path")
+            if not pdf_path:
+                raise ValueError("PDF path not provided in task input_data.")
+
+            # PyMuPDF/PyPDF2 are blocking, so extraction runs on the default thread pool
+            text = await asyncio.to_thread(self.pdf_processor.extract_text, pdf_path)
+            task.result = text
+            task.status = TaskStatus.COMPLETED
+            task.completed_at = datetime.now()
+            logger.info(
+                f"Successfully extracted {len(text)} characters from {pdf_path}"
+            )
+            return text
+        except Exception as e:
+            task.status = TaskStatus.FAILED
+            task.error = str(e)
+            logger.error(f"PDF extraction failed for {pdf_path or 'unknown path'}: {e}")
+            raise
+        finally:
+            self.log_task(task)
+
 
 class PaperAnalysisAgent(BaseAgent):
     def __init__(self, llm: ChatOpenAI):
@@ -154,7 +346,7 @@ class PaperAnalysisAgent(BaseAgent):
         self.parser = PydanticOutputParser(pydantic_object=ResearchPaperAnalysis)
 
     def execute_task(self, task: Task) -> ResearchPaperAnalysis:
-        task.status = TaskStatus.IN_PROGRESS
+        self.start_task(task)
         paper_id = "unknown_paper"
         try:
             paper_text = task.input_data.get("paper_text")
@@ -163,7 +355,33 @@ class PaperAnalysisAgent(BaseAgent):
                 raise ValueError("No paper text provided for analysis.")
 
             prompt = self._create_analysis_prompt(paper_text)
-            analysis = self._api_call_with_retry(prompt, self.parser)
+            analysis = self._api_call_with_retry(prompt, self.parser, task=task)
+            task.result = analysis
+            task.status = TaskStatus.COMPLETED
+            task.completed_at = datetime.now()
+            logger.info(
+                f"Successfully analyzed paper {paper_id}: {analysis.title if analysis else 'N/A'}"
+            )
+            return analysis
+        except Exception as e:
+            task.status = TaskStatus.FAILED
+            task.error = str(e)
+            logger.error(f"Paper analysis failed for {paper_id}: {e}")
+            raise
+        finally:
+            self.log_task(task)
+
+    async def execute_task_async(self, task: Task) -> ResearchPaperAnalysis:
+        self.start_task(task)
+        paper_id = "unknown_paper"
+        try:
+            paper_text = task.input_data.get("paper_text")
+            paper_id = task.input_data.get("paper_id", "unknown_paper")
+            if not paper_text:
+                raise ValueError("No paper text provided for analysis.")
+
+            prompt = self._create_analysis_prompt(paper_text)
+            analysis = await self._api_call_with_retry_async(prompt, self.parser, task=task)
             task.result = analysis
             task.status = TaskStatus.COMPLETED
             task.completed_at = datetime.now()
@@ -209,26 +427,38 @@ class ComparisonAgent(BaseAgent):
         self.parser = PydanticOutputParser(pydantic_object=PaperSimilarityResult)
 
     def execute_task(self, task: Task) -> PaperSimilarityResult:
-        task.status = TaskStatus.IN_PROGRESS
+        self.start_task(task)
         comparison_id = "unknown_comparison"
         try:
-            paper1_analysis = task.input_data.get("paper1_analysis")
-            paper2_analysis = task.input_data.get("paper2_analysis")
             comparison_id = task.input_data.get("comparison_id", "unknown_comparison")
+            paper1_analysis, paper2_analysis = self._get_validated_inputs(task)
 
-            if not paper1_analysis or not paper2_analysis:
-                raise ValueError(
-                    "Both paper analyses (ResearchPaperAnalysis instances) required for comparison."
-                )
-            if not isinstance(paper1_analysis, ResearchPaperAnalysis) or not isinstance(
-                paper2_analysis, ResearchPaperAnalysis
-            ):
-                raise TypeError(
-                    "Input analyses must be ResearchPaperAnalysis instances."
-                )
+            prompt = self._create_comparison_prompt(paper1_analysis, paper2_analysis)
+            comparison = self._api_call_with_retry(prompt, self.parser, task=task)
+            task.result = comparison
+            task.status = TaskStatus.COMPLETED
+            task.completed_at = datetime.now()
+            logger.info(
+                f"Successfully compared papers {comparison_id}: similarity score {comparison.final_similarity_score if comparison else 'N/A':.2f}"
+            )
+            return comparison
+        except Exception as e:
+            task.status = TaskStatus.FAILED
+            task.error = str(e)
+            logger.error(f"Paper comparison failed for {comparison_id}: {e}")
+            raise
+        finally:
+            self.log_task(task)
+
+    async def execute_task_async(self, task: Task) -> PaperSimilarityResult:
+        self.start_task(task)
+        comparison_id = "unknown_comparison"
+        try:
+            comparison_id = task.input_data.get("comparison_id", "unknown_comparison")
+            paper1_analysis, paper2_analysis = self._get_validated_inputs(task)
 
             prompt = self._create_comparison_prompt(paper1_analysis, paper2_analysis)
-            comparison = self._api_call_with_retry(prompt, self.parser)
+            comparison = await self._api_call_with_retry_async(prompt, self.parser, task=task)
             task.result = comparison
             task.status = TaskStatus.COMPLETED
             task.completed_at = datetime.now()
@@ -244,6 +474,19 @@ class ComparisonAgent(BaseAgent):
         finally:
             self.log_task(task)
 
+    def _get_validated_inputs(self, task: Task):
+        paper1_analysis = task.input_data.get("paper1_analysis")
+        paper2_analysis = task.input_data.get("paper2_analysis")
+        if not paper1_analysis or not paper2_analysis:
+            raise ValueError(
+                "Both paper analyses (ResearchPaperAnalysis instances) required for comparison."
+            )
+        if not isinstance(paper1_analysis, ResearchPaperAnalysis) or not isinstance(
+            paper2_analysis, ResearchPaperAnalysis
+        ):
+            raise TypeError("Input analyses must be ResearchPaperAnalysis instances.")
+        return paper1_analysis, paper2_analysis
+
     def _create_comparison_prompt(
         self, paper1: ResearchPaperAnalysis, paper2: ResearchPaperAnalysis
     ) -> str:
@@ -280,43 +523,34 @@ Ensure your output is a single JSON object.
 
 
 class ReportGenerationAgent(BaseAgent):
-    def __init__(self, llm: ChatOpenAI):
+    def __init__(
+        self, llm: ChatOpenAI, latency_budget: float = REPORT_LATENCY_BUDGET_SECONDS
+    ):
         super().__init__("ReportGenerationAgent", llm)
         self.parser = PydanticOutputParser(
             pydantic_object=AnalysisReport
         )  # For insights prompt
+        self.latency_budget = latency_budget
+        # Reused across reports. Calls that miss the budget are abandoned rather than
+        # awaited, so spare workers keep a straggler from delaying the next report's calls.
+        self._executor = ContextThreadPoolExecutor(max_workers=4)
+
+    def close(self):
+        """Releases the report worker threads; calls still queued are cancelled.
+
+        Calls already running are abandoned, and they stop at their next deadline check.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
     def execute_task(self, task: Task) -> AnalysisReport:
-        task.status = TaskStatus.IN_PROGRESS
+        self.start_task(task)
         try:
-            data = task.input_data
-            target_analysis = data.get("target_analysis")
-            comparison_analyses = data.get("comparison_analyses", [])
-            similarity_results = data.get("similarity_results", [])
-
-            if not target_analysis or not comparison_analyses or not similarity_results:
-                raise ValueError(
-                    "Missing data for report generation: target_analysis, comparison_analyses, or similarity_results."
-                )
-            if not isinstance(target_analysis, ResearchPaperAnalysis):
-                raise TypeError(
-                    "target_analysis must be a ResearchPaperAnalysis instance."
-                )
-            if not all(
-                isinstance(ca, ResearchPaperAnalysis) for ca in comparison_analyses
-            ):
-                raise TypeError(
-                    "All items in comparison_analyses must be ResearchPaperAnalysis instances."
-                )
-            if not all(
-                isinstance(sr, PaperSimilarityResult) for sr in similarity_results
-            ):
-                raise TypeError(
-                    "All items in similarity_results must be PaperSimilarityResult instances."
-                )
+            target_analysis, comparison_analyses, similarity_results = (
+                self._get_validated_inputs(task)
+            )
 
             report = self._create_comprehensive_report(
-                target_analysis, comparison_analyses, similarity_results
+                target_analysis, comparison_analyses, similarity_results, task
             )
             task.result = report
             task.status = TaskStatus.COMPLETED
@@ -331,62 +565,219 @@ class ReportGenerationAgent(BaseAgent):
         finally:
             self.log_task(task)
 
-    def _create_comprehensive_report(
-        self,
-        target_analysis: ResearchPaperAnalysis,
-        comparison_analyses: List[ResearchPaperAnalysis],
-        similarity_results: List[PaperSimilarityResult],
-    ) -> AnalysisReport:
-        generated_insights = []
+    async def execute_task_async(self, task: Task) -> AnalysisReport:
+        self.start_task(task)
         try:
-            insights_prompt = self._create_insights_prompt(
-                target_analysis, comparison_analyses, similarity_results
-            )
-            # Use self.parser which is PydanticOutputParser(pydantic_object=AnalysisReport)
-            # The LLM is expected to return a JSON adhering to AnalysisReport, from which we extract key_insights
-            parsed_insights_report = self._api_call_with_retry(
-                prompt=insights_prompt, parser=self.parser
+            target_analysis, comparison_analyses, similarity_results = (
+                self._get_validated_inputs(task)
             )
-            generated_insights = (
-                parsed_insights_report.key_insights if parsed_insights_report else []
+
+            report = await self._create_comprehensive_report_async(
+                target_analysis, comparison_analyses, similarity_results, task
             )
+            task.result = report
+            task.status = TaskStatus.COMPLETED
+            task.completed_at = datetime.now()
+            logger.info("Successfully generated comprehensive analysis report.")
+            return report
         except Exception as e:
-            logger.warning(
-                f"LLM-based insight generation failed: {e}. Falling back to programmatic insights."
+            task.status = TaskStatus.FAILED
+            task.error = str(e)
+            logger.error(f"Report generation failed: {e}")
+            raise
+        finally:
+            self.log_task(task)
+
+    def _get_validated_inputs(self, task: Task):
+        data = task.input_data
+        target_analysis = data.get("target_analysis")
+        comparison_analyses = data.get("comparison_analyses", [])
+        similarity_results = data.get("similarity_results", [])
+
+        if not target_analysis or not comparison_analyses or not similarity_results:
+            raise ValueError(
+                "Missing data for report generation: target_analysis, comparison_analyses, or similarity_results."
             )
-            generated_insights = self._extract_key_insights_programmatically(
-                similarity_results, comparison_analyses, target_analysis
+        if not isinstance(target_analysis, ResearchPaperAnalysis):
+            raise TypeError("target_analysis must be a ResearchPaperAnalysis instance.")
+        if not all(isinstance(ca, ResearchPaperAnalysis) for ca in comparison_analyses):
+            raise TypeError(
+                "All items in comparison_analyses must be ResearchPaperAnalysis instances."
             )
-
-        if not generated_insights:  # Double fallback
-            generated_insights = self._extract_key_insights_programmatically(
-                similarity_results, comparison_analyses, target_analysis
+        if not all(isinstance(sr, PaperSimilarityResult) for sr in similarity_results):
+            raise TypeError(
+                "All items in similarity_results must be PaperSimilarityResult instances."
             )
+        return target_analysis, comparison_analyses, similarity_results
 
+    def _create_comprehensive_report(
+        self,
+        target_analysis: ResearchPaperAnalysis,
+        comparison_analyses: List[ResearchPaperAnalysis],
+        similarity_results: List[PaperSimilarityResult],
+        task: Optional[Task] = None,
+    ) -> AnalysisReport:
+        # Programmatic insights are cheap, so they are ready before any LLM call starts.
+        # They prime the summary prompt and are the fallback if LLM insights miss the budget.
+        programmatic_insights = self._extract_key_insights_programmatically(
+            similarity_results, comparison_analyses, target_analysis
+        )
+        insights_prompt = self._create_insights_prompt(
+            target_analysis, comparison_analyses, similarity_results
+        )
         summary_prompt = self._create_summary_prompt(
-            target_analysis, comparison_analyses, similarity_results, generated_insights
+            target_analysis, comparison_analyses, similarity_results, programmatic_insights
+        )
+
+        # Stragglers see the deadline and stop retrying instead of spending more calls
+        deadline = time.monotonic() + self.latency_budget
+        insights_future = self._executor.submit(
+            self._generate_llm_insights, insights_prompt, task, deadline
+        )
+        summary_future = self._executor.submit(
+            self._generate_llm_summary, summary_prompt, task, deadline
+        )
+        done, not_done = wait([insights_future, summary_future], timeout=self.latency_budget)
+        # Don't hold the report back for stragglers; their results are discarded
+        for future in not_done:
+            future.cancel()
+
+        generated_insights = self._get_completed_result(
+            insights_future, done, "insight"
+        )
+        generated_summary = self._get_completed_result(summary_future, done, "summary")
+        return self._finalize_report(
+            target_analysis,
+            similarity_results,
+            generated_insights or programmatic_insights,
+            generated_summary,
+        )
+
+    async def _create_comprehensive_report_async(
+        self,
+        target_analysis: ResearchPaperAnalysis,
+        comparison_analyses: List[ResearchPaperAnalysis],
+        similarity_results: List[PaperSimilarityResult],
+        task: Optional[Task] = None,
+    ) -> AnalysisReport:
+        programmatic_insights = self._extract_key_insights_programmatically(
+            similarity_results, comparison_analyses, target_analysis
+        )
+        insights_prompt = self._create_insights_prompt(
+            target_analysis, comparison_analyses, similarity_results
+        )
+        summary_prompt = self._create_summary_prompt(
+            target_analysis, comparison_analyses, similarity_results, programmatic_insights
+        )
+
+        insights_future = asyncio.ensure_future(
+            self._generate_llm_insights_async(insights_prompt, task)
+        )
+        summary_future = asyncio.ensure_future(
+            self._generate_llm_summary_async(summary_prompt, task)
         )
+        done, pending = await asyncio.wait(
+            {insights_future, summary_future}, timeout=self.latency_budget
+        )
+        for future in pending:
+            future.cancel()
+
+        generated_insights = self._get_completed_result(
+            insights_future, done, "insight"
+        )
+        generated_summary = self._get_completed_result(summary_future, done, "summary")
+        return self._finalize_report(
+            target_analysis,
+            similarity_results,
+            generated_insights or programmatic_insights,
+            generated_summary,
+        )
+
+    def _generate_llm_insights(
+        self,
+        insights_prompt: str,
+        task: Optional[Task] = None,
+        deadline: Optional[float] = None,
+    ) -> List[str]:
+        # Use self.parser which is PydanticOutputParser(pydantic_object=AnalysisReport)
+        # The LLM is expected to return a JSON adhering to AnalysisReport, from which we extract key_insights
+        parsed_insights_report = self._api_call_with_retry(
+            prompt=insights_prompt, parser=self.parser, task=task, deadline=deadline
+        )
+        return parsed_insights_report.key_insights if parsed_insights_report else []
+
+    async def _generate_llm_insights_async(
+        self, insights_prompt: str, task: Optional[Task] = None
+    ) -> List[str]:
+        parsed_insights_report = await self._api_call_with_retry_async(
+            prompt=insights_prompt, parser=self.parser, task=task
+        )
+        return parsed_insights_report.key_insights if parsed_insights_report else []
+
+    def _generate_llm_summary(
+        self,
+        summary_prompt: str,
+        task: Optional[Task] = None,
+        deadline: Optional[float] = None,
+    ) -> str:
         # For summary, a plain text response is fine, no Pydantic parsing needed here.
-        try:
-            response = self.llm.invoke(
-                [
-                    SystemMessage(
-                        content="You are an expert report writer, generating concise executive summaries for academic research."
-                    ),
-                    HumanMessage(content=summary_prompt),
-                ]
+        check_budget()
+        self._check_deadline(deadline)
+        with span("llm_call", self.name, purpose="summary") as attributes:
+            response = self.llm.invoke(self._build_summary_messages(summary_prompt))
+            self._record_token_usage(task, response, attributes)
+        return response.content.strip()
+
+    async def _generate_llm_summary_async(
+        self, summary_prompt: str, task: Optional[Task] = None
+    ) -> str:
+        check_budget()
+        with span("llm_call", self.name, purpose="summary") as attributes:
+            response = await self.llm.ainvoke(self._build_summary_messages(summary_prompt))
+            self._record_token_usage(task, response, attributes)
+        return response.content.strip()
+
+    def _get_completed_result(self, future, done, label: str) -> Optional[Any]:
+        # Works for both concurrent.futures and asyncio futures
+        if future not in done:
+            logger.warning(
+                f"LLM-based {label} generation exceeded the {self.latency_budget}s latency budget. Using fallback."
             )
-            generated_summary = response.content.strip()
-        except Exception as e:
+            return None
+        if future.exception() is not None:
             logger.warning(
-                f"LLM-based summary generation failed: {e}. Using a template summary."
+                f"LLM-based {label} generation failed: {future.exception()}. Using fallback."
             )
-            generated_summary = f"Summary of analysis for '{target_analysis.title}'. {len(similarity_results)} comparisons made. Key insights: {'; '.join(generated_insights[:2]) if generated_insights else 'N/A'}"
+            return None
+        return future.result()
+
+    def _finalize_report(
+        self, target_analysis, similarity_results, insights, summary
+    ) -> AnalysisReport:
+        if not summary:
+            summary = self._create_template_summary(
+                target_analysis, similarity_results, insights
+            )
+        return self._assemble_report(summary, insights)
+
+    def _build_summary_messages(self, summary_prompt: str) -> list:
+        return [
+            SystemMessage(
+                content="You are an expert report writer, generating concise executive summaries for academic research."
+            ),
+            HumanMessage(content=summary_prompt),
+        ]
+
+    def _create_template_summary(
+        self, target_analysis, similarity_results, insights
+    ) -> str:
+        return f"Summary of analysis for '{target_analysis.title}'. {len(similarity_results)} comparisons made. Key insights: {'; '.join(insights[:2]) if insights else 'N/A'}"
 
+    def _assemble_report(self, summary: str, insights: List[str]) -> AnalysisReport:
         return AnalysisReport(
-            summary=generated_summary,
+            summary=summary,
             methodology_overview="Multi-agent system employing LLM-based semantic analysis, PDF text extraction, and structured data comparison to assess research paper similarity.",
-            key_insights=generated_insights,
+            key_insights=insights,
         )
 
     def _create_insights_prompt(
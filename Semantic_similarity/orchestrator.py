@@ -1,10 +1,11 @@
+import asyncio
 import datetime
 import os
 import time
 import json
 import logging
 from typing import List, Dict, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 from tqdm.auto import tqdm # For console progress, not Streamlit
 
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings # For type hinting
@@ -13,9 +14,12 @@ from .agents import (
     PDFExtractionAgent, PaperAnalysisAgent, ComparisonAgent, ReportGenerationAgent, Task, AgentAction
 )
 from .models import ResearchPaperAnalysis, PaperSimilarityResult, AnalysisReport
+from instrumentation import ContextThreadPoolExecutor
+from usage_tracking import usage_document
 
 logger = logging.getLogger(__name__)
 MAX_WORKERS_SEMANTIC = 5 # Default from original, can be configured
+MAX_CONCURRENCY_SEMANTIC_ASYNC = 50 # In-flight agent calls for the asyncio entry point
 
 class AgenticResearchPaperAnalyzer:
     def __init__(self, llm_client: ChatOpenAI, embeddings_model_client: OpenAIEmbeddings, max_workers: int = MAX_WORKERS_SEMANTIC):
@@ -29,18 +33,31 @@ class AgenticResearchPaperAnalyzer:
 
         self.task_counter = 0
         # self.results_cache = {} # Original had this, but not used.
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.executor = ContextThreadPoolExecutor(max_workers=max_workers)
+
+    def close(self):
+        """Releases the worker threads. The analyzer is reusable across runs until this is called."""
+        self.executor.shutdown(wait=False)
+        self.report_agent.close()
 
     def _generate_task_id(self) -> str:
         self.task_counter += 1
         return f"task_{self.task_counter}_{int(time.time())}"
 
+    def get_stage_timings(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Per-agent, per-action latency and token aggregates across all runs of this analyzer."""
+        agents = [self.pdf_agent, self.analysis_agent, self.comparison_agent, self.report_agent]
+        return {agent.name: agent.get_stage_timings() for agent in agents}
+
     def _get_paper_title_from_analysis(self, analysis: ResearchPaperAnalysis) -> str:
         # Helper to get title for mapping, assuming analysis object is available
         return analysis.title if analysis and analysis.title else "Untitled Paper"
 
     def analyze_papers_from_pdfs(self, target_pdf_path: str, comparison_pdf_paths: List[str],
-                                output_dir: str = "analysis_results_semantic") -> Dict[str, Any]:
+                                output_dir: str = "analysis_results_semantic",
+                                progress_callback=None) -> Dict[str, Any]:
+        """Runs the full pipeline. progress_callback(fraction, message, partial_results), if given,
+        is called after each step with the results gathered so far."""
         os.makedirs(output_dir, exist_ok=True)
         logger.info(f"Starting agentic analysis of {target_pdf_path} against {len(comparison_pdf_paths)} papers.")
         
@@ -80,6 +97,8 @@ class AgenticResearchPaperAnalyzer:
 
             if not extracted_texts["target"]:
                 raise ValueError("Target PDF text extraction failed. Cannot proceed.")
+            if progress_callback:
+                progress_callback(0.2, "Extracted text from PDFs", all_results)
 
             # --- Step 2: Analyze paper content in parallel ---
             logger.info("Step 2: Analyzing paper content...")
@@ -111,6 +130,9 @@ class AgenticResearchPaperAnalyzer:
             if not all_results["target_analysis"] or not isinstance(all_results["target_analysis"], ResearchPaperAnalysis) :
                 raise ValueError("Target paper analysis failed or yielded invalid result. Cannot proceed.")
 
+            if progress_callback:
+                progress_callback(0.5, "Analyzed papers", all_results)
+
             # --- Step 3: Compare target paper with each comparison paper in parallel ---
             logger.info("Step 3: Comparing papers...")
             comparison_futures = {}
@@ -130,8 +152,9 @@ class AgenticResearchPaperAnalyzer:
                     all_results["similarity_results"][comp_index] = f"COMPARISON_FAILED: {e}"
             
             # Filter out failed comparisons for report generation
-            valid_comparison_analyses = [ca for ca in all_results["comparison_analyses"] if isinstance(ca, ResearchPaperAnalysis)]
-            valid_similarity_results = [sr for sr in all_results["similarity_results"] if isinstance(sr, PaperSimilarityResult)]
+            valid_comparison_analyses, valid_similarity_results = self._get_valid_report_inputs(all_results)
+            if progress_callback:
+                progress_callback(0.8, "Compared papers", all_results)
 
 
             # --- Step 4: Generate comprehensive report ---
@@ -144,11 +167,7 @@ class AgenticResearchPaperAnalyzer:
                 )
             else:
                 logger.warning("Not enough valid comparison data to generate a full report. Report will be minimal.")
-                all_results["report"] = AnalysisReport(
-                    summary=f"Analysis for '{all_results['target_analysis'].title}' completed with issues. Limited comparison data available.",
-                    methodology_overview="Standard multi-agent analysis attempted.",
-                    key_insights=["Report generation limited due to failures in prior steps."]
-                )
+                all_results["report"] = self._create_minimal_report(all_results["target_analysis"])
 
 
             self._save_results_to_files(all_results, output_dir)
@@ -160,8 +179,123 @@ class AgenticResearchPaperAnalyzer:
             # Save whatever partial results might exist
             self._save_results_to_files(all_results, output_dir, error_suffix="_ERROR")
             raise # Re-raise the exception to be caught by the UI layer
-        finally:
-            self.executor.shutdown(wait=False) # Allow main thread to exit, don't wait for all tasks if error
+
+    async def analyze_papers_from_pdfs_async(self, target_pdf_path: str, comparison_pdf_paths: List[str],
+                                             output_dir: str = "analysis_results_semantic",
+                                             max_concurrency: int = MAX_CONCURRENCY_SEMANTIC_ASYNC) -> Dict[str, Any]:
+        """Asyncio counterpart of analyze_papers_from_pdfs.
+
+        Each comparison paper runs as its own extract -> analyze -> compare pipeline on one
+        event loop, so a comparison starts as soon as both its analysis and the target
+        analysis are ready. max_concurrency bounds the number of in-flight agent calls.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        logger.info(f"Starting async agentic analysis of {target_pdf_path} against {len(comparison_pdf_paths)} papers.")
+
+        all_results = {
+            "report": None, "target_analysis": None,
+            "comparison_analyses": [None] * len(comparison_pdf_paths),
+            "similarity_results": [None] * len(comparison_pdf_paths)
+        }
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def bounded(agent_call, *args):
+            async with semaphore:
+                return await agent_call(*args)
+
+        async def prepare_target() -> ResearchPaperAnalysis:
+            try:
+                target_text = await bounded(self._extract_pdf_text_async, target_pdf_path, "target")
+            except Exception as e:
+                raise Exception(f"Target PDF extraction failed: {e}") from e
+            if not target_text:
+                raise ValueError("Target PDF text extraction failed. Cannot proceed.")
+            try:
+                target_analysis = await bounded(self._analyze_paper_async, target_text, "target")
+            except Exception as e:
+                raise Exception(f"Target paper analysis failed: {e}") from e
+            if not isinstance(target_analysis, ResearchPaperAnalysis):
+                raise ValueError("Target paper analysis failed or yielded invalid result. Cannot proceed.")
+            return target_analysis
+
+        async def process_comparison(index: int, comp_pdf_path: str):
+            try:
+                comp_text = await bounded(self._extract_pdf_text_async, comp_pdf_path, f"comparison_{index}")
+            except Exception as e:
+                logger.error(f"Failed text extraction for comparison {index}: {e}")
+                all_results["comparison_analyses"][index] = f"ANALYSIS_SKIPPED_DUE_TO_EXTRACTION_FAILURE: EXTRACTION_FAILED: {e}"
+                return
+            try:
+                comp_analysis = await bounded(self._analyze_paper_async, comp_text, f"comparison_{index}")
+            except Exception as e:
+                logger.error(f"Failed paper analysis for comparison {index}: {e}")
+                all_results["comparison_analyses"][index] = f"ANALYSIS_FAILED: {e}"
+                return
+            all_results["comparison_analyses"][index] = comp_analysis
+
+            target_analysis = await target_future # Raises if the target failed; the pipeline is then cancelled
+            try:
+                all_results["similarity_results"][index] = await bounded(
+                    self._compare_papers_async, target_analysis, comp_analysis, f"target_vs_comp_{index}"
+                )
+            except Exception as e:
+                logger.error(f"Failed comparison for comparison paper index {index}: {e}")
+                all_results["similarity_results"][index] = f"COMPARISON_FAILED: {e}"
+
+        try:
+            # --- Steps 1-3: Extract, analyze and compare, pipelined per paper ---
+            logger.info("Steps 1-3: Extracting, analyzing and comparing papers...")
+            target_future = asyncio.ensure_future(prepare_target())
+            comparison_futures = [
+                asyncio.ensure_future(process_comparison(i, path)) for i, path in enumerate(comparison_pdf_paths)
+            ]
+            try:
+                all_results["target_analysis"] = await target_future
+            except Exception:
+                for future in comparison_futures:
+                    future.cancel()
+                await asyncio.gather(*comparison_futures, return_exceptions=True)
+                raise
+            await asyncio.gather(*comparison_futures)
+
+            valid_comparison_analyses, valid_similarity_results = self._get_valid_report_inputs(all_results)
+
+            # --- Step 4: Generate comprehensive report ---
+            logger.info("Step 4: Generating comprehensive report...")
+            if valid_comparison_analyses and valid_similarity_results:
+                all_results["report"] = await bounded(
+                    self._generate_report_async,
+                    all_results["target_analysis"], valid_comparison_analyses, valid_similarity_results
+                )
+            else:
+                logger.warning("Not enough valid comparison data to generate a full report. Report will be minimal.")
+                all_results["report"] = self._create_minimal_report(all_results["target_analysis"])
+
+            await asyncio.to_thread(self._save_results_to_files, all_results, output_dir)
+            logger.info("Async agentic analysis completed!")
+            return all_results
+
+        except Exception as e:
+            logger.error(f"Overall async agentic analysis pipeline failed: {e}", exc_info=True)
+            await asyncio.to_thread(self._save_results_to_files, all_results, output_dir, "_ERROR")
+            raise
+
+    def _get_valid_report_inputs(self, all_results: Dict[str, Any]):
+        valid_comparison_analyses = []
+        valid_similarity_results = []
+        # Keep analyses and similarity results paired so the report lines them up correctly
+        for comp_analysis, similarity_result in zip(all_results["comparison_analyses"], all_results["similarity_results"]):
+            if isinstance(comp_analysis, ResearchPaperAnalysis) and isinstance(similarity_result, PaperSimilarityResult):
+                valid_comparison_analyses.append(comp_analysis)
+                valid_similarity_results.append(similarity_result)
+        return valid_comparison_analyses, valid_similarity_results
+
+    def _create_minimal_report(self, target_analysis: ResearchPaperAnalysis) -> AnalysisReport:
+        return AnalysisReport(
+            summary=f"Analysis for '{target_analysis.title}' completed with issues. Limited comparison data available.",
+            methodology_overview="Standard multi-agent analysis attempted.",
+            key_insights=["Report generation limited due to failures in prior steps."]
+        )
 
     def _extract_pdf_text(self, pdf_path: str, paper_id: str) -> str:
         task = Task(id=self._generate_task_id(), action=AgentAction.EXTRACT_PDF, 
@@ -171,7 +305,8 @@ class AgenticResearchPaperAnalyzer:
     def _analyze_paper(self, paper_text: str, paper_id: str) -> ResearchPaperAnalysis:
         task = Task(id=self._generate_task_id(), action=AgentAction.ANALYZE_PAPER, 
                     input_data={"paper_text": paper_text, "paper_id": paper_id})
-        return self.analysis_agent.execute_task(task)
+        with usage_document(paper_id):
+            return self.analysis_agent.execute_task(task)
 
     def _compare_papers(self, paper1_analysis: ResearchPaperAnalysis, 
                        paper2_analysis: ResearchPaperAnalysis, comparison_id: str) -> PaperSimilarityResult:
@@ -179,7 +314,8 @@ class AgenticResearchPaperAnalyzer:
                     input_data={"paper1_analysis": paper1_analysis, 
                                 "paper2_analysis": paper2_analysis, 
                                 "comparison_id": comparison_id})
-        return self.comparison_agent.execute_task(task)
+        with usage_document(comparison_id):
+            return self.comparison_agent.execute_task(task)
 
     def _generate_report(self, target_analysis, comparison_analyses, similarity_results) -> AnalysisReport:
         task = Task(id=self._generate_task_id(), action="generate_report",
@@ -188,6 +324,33 @@ class AgenticResearchPaperAnalyzer:
                                 "similarity_results": similarity_results})
         return self.report_agent.execute_task(task)
 
+    async def _extract_pdf_text_async(self, pdf_path: str, paper_id: str) -> str:
+        task = Task(id=self._generate_task_id(), action=AgentAction.EXTRACT_PDF,
+                    input_data={"pdf_path": pdf_path, "paper_id": paper_id})
+        return await self.pdf_agent.execute_task_async(task)
+
+    async def _analyze_paper_async(self, paper_text: str, paper_id: str) -> ResearchPaperAnalysis:
+        task = Task(id=self._generate_task_id(), action=AgentAction.ANALYZE_PAPER,
+                    input_data={"paper_text": paper_text, "paper_id": paper_id})
+        with usage_document(paper_id):
+            return await self.analysis_agent.execute_task_async(task)
+
+    async def _compare_papers_async(self, paper1_analysis: ResearchPaperAnalysis,
+                                    paper2_analysis: ResearchPaperAnalysis, comparison_id: str) -> PaperSimilarityResult:
+        task = Task(id=self._generate_task_id(), action="compare_papers",
+                    input_data={"paper1_analysis": paper1_analysis,
+                                "paper2_analysis": paper2_analysis,
+                                "comparison_id": comparison_id})
+        with usage_document(comparison_id):
+            return await self.comparison_agent.execute_task_async(task)
+
+    async def _generate_report_async(self, target_analysis, comparison_analyses, similarity_results) -> AnalysisReport:
+        task = Task(id=self._generate_task_id(), action="generate_report",
+                    input_data={"target_analysis": target_analysis,
+                                "comparison_analyses": comparison_analyses,
+                                "similarity_results": similarity_results})
+        return await self.report_agent.execute_task_async(task)
+
     def _save_results_to_files(self, results_dict: Dict[str, Any], output_dir: str, error_suffix=""):
         # Save main report if it exists
         if results_dict.get("report") and isinstance(results_dict["report"], AnalysisReport):
@@ -4,6 +4,8 @@ import PyPDF2
 import logging
 import re
 
+from instrumentation import traced
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,6 +37,7 @@ class PDFProcessor:
             return ""
 
     @classmethod
+    @traced("extract_text", "semantic")
     def extract_text(cls, pdf_path: str) -> str:
         if not os.path.exists(pdf_path):
             # Log and raise for orchestrator to handle
@@ -10,7 +10,7 @@ import plotly.graph_objects as go
 import pandas as pd
 import logging
 
-from .orchestrator import AgenticResearchPaperAnalyzer
+from job_queue import get_job, submit_job
 from .models import (
     ResearchPaperAnalysis,
     PaperSimilarityResult,
@@ -19,6 +19,8 @@ from .models import (
 
 logger = logging.getLogger(__name__)
 
+JOB_POLL_SECONDS = 2
+
 
 # --- Helper functions from app.py (adapted) ---
 def save_uploaded_file_temp(uploaded_file, prefix: str) -> str:
@@ -236,6 +238,24 @@ def render_detailed_comparison_metrics(
             st.info(result.reasoning)
 
 
+def restore_semantic_results(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuilds the models in a job's JSON results; failure strings are kept as they are."""
+
+    def restore(model, value):
+        return model.model_validate(value) if isinstance(value, dict) else value
+
+    return {
+        "report": restore(AnalysisReport, results.get("report")),
+        "target_analysis": restore(ResearchPaperAnalysis, results.get("target_analysis")),
+        "comparison_analyses": [
+            restore(ResearchPaperAnalysis, item) for item in results.get("comparison_analyses") or []
+        ],
+        "similarity_results": [
+            restore(PaperSimilarityResult, item) for item in results.get("similarity_results") or []
+        ],
+    }
+
+
 def render_semantic_analyzer_ui(llm_client, embeddings_model_client):
     st.header("Semantic Similarity Analyzer for Research Papers")
     st.markdown(
@@ -243,23 +263,6 @@ def render_semantic_analyzer_ui(llm_client, embeddings_model_client):
     )
     st.markdown("---")
 
-    # Initialize analyzer if not already done (e.g. if API key was entered later)
-    # For this structure, analyzer is created once in main_app.py
-    # Here we assume it's passed and valid.
-    if (
-        "semantic_analyzer_instance" not in st.session_state
-        or st.session_state.semantic_analyzer_instance is None
-    ):
-        try:
-            st.session_state.semantic_analyzer_instance = AgenticResearchPaperAnalyzer(
-                llm_client=llm_client, embeddings_model_client=embeddings_model_client
-            )  # Use clients passed from main_app
-        except Exception as e:
-            st.error(f"Failed to initialize Semantic Analyzer: {e}")
-            return
-
-    analyzer: AgenticResearchPaperAnalyzer = st.session_state.semantic_analyzer_instance
-
     # File Uploads
     col1, col2 = st.columns(2)
     with col1:
@@ -305,34 +308,53 @@ def render_semantic_analyzer_ui(llm_client, embeddings_model_client):
                     os.unlink(p)
             return
 
-        status_placeholder = st.empty()
         try:
-            status_placeholder.info(
-                "🔄 Analysis in progress... This may take several minutes depending on the number and size of papers."
-            )
-
-            # This is a blocking call. For true async UI, would need more complex setup.
-            # The orchestrator itself uses ThreadPoolExecutor for internal parallelism.
-            results = analyzer.analyze_papers_from_pdfs(
-                source_temp_path, comparison_temp_paths
+            # The worker process runs the analysis; reruns of this script only poll the job
+            st.session_state.semantic_job_id = submit_job(
+                "semantic", source_temp_path, extra_inputs=comparison_temp_paths
             )
-
-            st.session_state.semantic_analysis_results = results
-            st.session_state.semantic_processing_status = "completed"
-            status_placeholder.success("✅ Semantic analysis completed!")
-
         except Exception as e:
             st.session_state.semantic_processing_status = "error"
-            status_placeholder.error(f"❌ Analysis failed: {e}")
-            logger.error("Semantic analysis pipeline error", exc_info=True)
+            st.error(f"❌ Could not queue the analysis: {e}")
+            logger.error("Semantic analysis submission error", exc_info=True)
         finally:
-            # Clean up temporary files
+            # Clean up temporary files; the job store keeps its own copies
             if source_temp_path and os.path.exists(source_temp_path):
                 os.unlink(source_temp_path)
             for p in comparison_temp_paths:
                 if p and os.path.exists(p):
                     os.unlink(p)
 
+    job_id = st.session_state.get("semantic_job_id")
+    if job_id and st.session_state.get("semantic_processing_status") == "processing":
+        job = get_job(job_id)
+        if job is None or job["status"] == "failed":
+            st.session_state.semantic_processing_status = "error"
+            st.error(f"❌ Analysis failed: {job['error'] if job else 'job not found'}")
+        elif job["status"] == "done":
+            if job["result"].get("error"):
+                st.session_state.semantic_processing_status = "error"
+                st.error(f"❌ Analysis failed: {job['result']['error']}")
+            else:
+                st.session_state.semantic_analysis_results = restore_semantic_results(job["result"])
+                st.session_state.semantic_processing_status = "completed"
+                st.success("✅ Semantic analysis completed!")
+                usage = job["result"].get("usage")
+                if usage:
+                    st.caption(f"LLM usage: {usage['requests']} calls, {usage['total_tokens']:,} tokens")
+        else:
+            st.progress(
+                job["progress"],
+                text=f"🔄 {job['message']}... This may take several minutes depending on the number and size of papers.",
+            )
+            partial = job["partial"] or {}
+            if isinstance(partial.get("target_analysis"), dict):
+                render_paper_analysis_details(
+                    ResearchPaperAnalysis.model_validate(partial["target_analysis"]), "Source Paper"
+                )
+            time.sleep(JOB_POLL_SECONDS)
+            st.rerun()
+
     # Display Results
     if st.session_state.get("semantic_analysis_results"):
         results = st.session_state.semantic_analysis_results
@@ -1,8 +1,16 @@
 import streamlit as st
+import html
 import tempfile
+import time
 import os
-from modules.summarizer import analyze_paper
-from modules.citation_verifier import verify_citations
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from job_queue import get_job, submit_job
+
+JOB_POLL_SECONDS = 2
 
 st.set_page_config(page_title="Research Paper Analyzer", layout="wide")
 st.sidebar.title("Navigation")
@@ -20,15 +28,62 @@ if "processing" not in st.session_state:
     st.session_state["processing"] = False
 if "pdf_path" not in st.session_state:
     st.session_state["pdf_path"] = None
+if "job_id" not in st.session_state:
+    st.session_state["job_id"] = None
+
+RESULT_LABELS = {
+    "summary": "Summary",
+    "novelty": "Novelty",
+    "citation_results": "Citation verification",
+}
+
+def ai_score_category(score):
+    if score <= 20:
+        return "🟥 AI Generated", "red"
+    elif score <= 40:
+        return "🟧 Likely AI", "orange"
+    elif score <= 60:
+        return "🟨 Uncertain", "goldenrod"
+    elif score <= 80:
+        return "🟩 Mostly Human", "limegreen"
+    return "🟩 Human Written", "green"
 
 def process_pdf(uploaded_file):
+    """Queues the analysis on the background worker and returns the job ID."""
     with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
         tmp.write(uploaded_file.read())
         tmp_path = tmp.name
-    st.session_state["pdf_path"] = tmp_path
-    summary, novelty = analyze_paper(tmp_path)
-    citation_results = verify_citations(tmp_path)
-    return summary, novelty, citation_results
+    try:
+        return submit_job("paper_analysis", tmp_path)
+    finally:
+        # The job store keeps its own copy of the upload
+        os.remove(tmp_path)
+
+def show_partial_result(container, name, result):
+    with container.expander(f"{RESULT_LABELS[name]} ready", expanded=False):
+        if name == "citation_results":
+            if result.get("error"):
+                st.error(result["error"])
+            else:
+                st.write(f"{len(result.get('enhanced_references', []))} references verified.")
+        else:
+            st.markdown(result)
+
+def sync_job_results():
+    """Loads the results of a finished job into the session; returns the job record."""
+    job = get_job(st.session_state["job_id"]) if st.session_state["job_id"] else None
+    if job and job["status"] == "done" and not st.session_state["pdf_uploaded"]:
+        for name in RESULT_LABELS:
+            st.session_state[name] = job["result"][name]
+        st.session_state["pdf_path"] = job["input_path"]
+        st.session_state["pdf_uploaded"] = True
+        st.session_state["processing"] = False
+    elif job and job["status"] == "failed":
+        st.session_state["processing"] = False
+    return job
+
+# Picks up a job that finished while another page was open
+job = sync_job_results()
 
 if page == "Home":
     st.title("Copy_Catch - Research Paper Analyzer")
@@ -40,18 +95,26 @@ if page == "Home":
     """)
     uploaded_file = st.file_uploader("Upload a research paper", type=["pdf"])
     if st.button("Analyze Paper") and uploaded_file:
+        st.session_state["job_id"] = process_pdf(uploaded_file)
+        st.session_state["pdf_uploaded"] = False
         st.session_state["processing"] = True
-        with st.spinner("Analyzing... (this may take a few minutes)"):
-            summary, novelty, citation_results = process_pdf(uploaded_file)
-            st.session_state["summary"] = summary
-            st.session_state["novelty"] = novelty
-            st.session_state["citation_results"] = citation_results
-            st.session_state["pdf_uploaded"] = True
-            st.session_state["processing"] = False
-        st.success("Analysis complete! You can now view results from the sidebar.")
+        job = sync_job_results()
 
-    if st.session_state["processing"]:
-        st.info("Processing... Please wait.")
+    if job and job["status"] in ("queued", "running"):
+        # The analysis runs in the worker process; this page only polls it, so reruns don't restart it
+        st.progress(job["progress"], text=f"Analyzing... {job['message']} (this may take a few minutes)")
+        results_container = st.container()
+        for name, result in (job["partial"] or {}).items():
+            show_partial_result(results_container, name, result)
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+    elif job and job["status"] == "failed":
+        st.error(f"Analysis failed: {job['error']}")
+    elif job and job["status"] == "done":
+        st.success("Analysis complete! You can now view results from the sidebar.")
+        usage = job["result"].get("usage")
+        if usage:
+            st.caption(f"LLM usage: {usage['requests']} calls, {usage['total_tokens']:,} tokens")
 
 elif page == "Summary":
     st.title("Summary of Research Paper")
@@ -182,26 +245,46 @@ elif page == "AI Content Detection":
         if st.button("Detect AI-generated Content"):
             with st.spinner("Analyzing for AI-generated content..."):
                 result = analyze_pdf_for_ai_content(st.session_state["pdf_path"])
-            if result:
+            if result and result.get("error"):
+                st.error(f"AI detection failed: {result['error']}")
+            elif result:
                 score = result.get("score", 0)
-                if score <= 20:
-                    label = "🟥 AI Generated"
-                    color = "red"
-                elif score <= 40:
-                    label = "🟧 Likely AI"
-                    color = "orange"
-                elif score <= 60:
-                    label = "🟨 Uncertain"
-                    color = "goldenrod"
-                elif score <= 80:
-                    label = "🟩 Mostly Human"
-                    color = "limegreen"
-                else:
-                    label = "🟩 Human Written"
-                    color = "green"
+                label, color = ai_score_category(score)
                 st.markdown(f"### 🧠 Prediction Score: `{score:.2f}`")
                 st.markdown(f"**Prediction Category:** <span style='color:{color}; font-size: 18px;'>{label}</span>", unsafe_allow_html=True)
                 st.progress(int(score))
+                if result.get("backend_mode"):
+                    st.caption(
+                        f"Scoring mode: {result['backend_mode']} · "
+                        f"{result.get('remote_windows', 0)} of {len(result.get('windows', []))} windows sent to the detection API"
+                    )
+                if result.get("failed_windows"):
+                    st.warning(f"{result['failed_windows']} text window(s) could not be scored and were left out.")
+
+                sections = result.get("sections", [])
+                if sections:
+                    st.subheader("🗺️ Score by Section")
+                    section_rows = []
+                    for section in sections:
+                        section_label, section_color = ai_score_category(section["score"])
+                        section_rows.append(
+                            f"<div style='display: flex; justify-content: space-between; padding: 4px 8px; "
+                            f"border-left: 8px solid {section_color}; margin-bottom: 4px;'>"
+                            f"<span>{html.escape(section['section'])}</span><span>{section['score']:.1f} · {section_label}</span></div>"
+                        )
+                    st.markdown("".join(section_rows), unsafe_allow_html=True)
+
+                scored_windows = [w for w in result.get("windows", []) if "score" in w]
+                if len(scored_windows) > 1:
+                    import pandas as pd
+                    st.subheader("📈 Score by Text Window")
+                    window_df = pd.DataFrame(
+                        {
+                            "Window": [f"{w['index'] + 1}: {w['section']}" for w in scored_windows],
+                            "Score": [w["score"] for w in scored_windows],
+                        }
+                    ).set_index("Window")
+                    st.bar_chart(window_df)
                 with st.expander("📋 Raw API Response"):
                     st.json(result)
             else:
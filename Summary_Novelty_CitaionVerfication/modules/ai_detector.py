@@ -1,12 +1,75 @@
 import os
+import re
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 from PyPDF2 import PdfReader
+from instrumentation import ContextThreadPoolExecutor, record_cache_lookup, record_retry, span, traced
+from modules.local_ai_scorer import score_text_locally
+from modules.persistent_cache import get_cache
+from modules.section_extractor import NEXT_SECTION_PATTERN
 
 load_dotenv()
 API_KEY = os.getenv("WINSTON_API_KEY")
+WINSTON_API_URL = "https://api.gowinston.ai/v2/ai-content-detection"
 
+# Windows stay well under the provider's per-request limit; it rejects texts under ~300 characters
+AI_DETECTOR_WINDOW_CHARS = int(os.getenv("AI_DETECTOR_WINDOW_CHARS", "10000"))
+AI_DETECTOR_MIN_WINDOW_CHARS = 300
+AI_DETECTOR_MAX_WORKERS = int(os.getenv("AI_DETECTOR_MAX_WORKERS", "4"))
+AI_DETECTOR_TIMEOUT = (5, 60)  # (connect, read) seconds
+AI_DETECTION_CACHE_TTL_DAYS = float(os.getenv("AI_DETECTION_CACHE_TTL_DAYS", "7"))
+EXTRACTED_TEXT_MEMO_SIZE = 16
+# "hybrid" (default with an API key), "local" (default without one) or "remote"
+AI_DETECTOR_BACKEND = os.getenv("AI_DETECTOR_BACKEND", "").lower()
+# Hybrid mode only asks the provider about windows whose local score falls strictly inside this band
+AI_LOCAL_UNCERTAIN_LOW = float(os.getenv("AI_LOCAL_UNCERTAIN_LOW", "30"))
+AI_LOCAL_UNCERTAIN_HIGH = float(os.getenv("AI_LOCAL_UNCERTAIN_HIGH", "70"))
 
+_extracted_text = OrderedDict()
+_extracted_text_lock = threading.Lock()
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session():
+    """Shared session whose connection pool matches the worker count.
+
+    Detection requests are billed once sent, so only failures where the provider did no
+    work are retried: connection errors before the request went out, and 429/503
+    responses (after any Retry-After delay). Read timeouts, dropped connections and
+    other 5xx responses are not repeated.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=3,
+                connect=3,
+                read=0,
+                other=0,
+                status=3,
+                backoff_factor=1,
+                status_forcelist=[429, 503],
+                respect_retry_after_header=True,
+                allowed_methods=["POST"],
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1, pool_maxsize=AI_DETECTOR_MAX_WORKERS, max_retries=retry
+            )
+            _session = requests.Session()
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+@traced("extract_text", "ai_detector")
 def extract_text_from_pdf(pdf_path):
     reader = PdfReader(pdf_path)
     text = ""
@@ -17,24 +80,255 @@ def extract_text_from_pdf(pdf_path):
     return text
 
 
+def _text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _detection_cache():
+    return get_cache("ai_detection", AI_DETECTION_CACHE_TTL_DAYS * 24 * 3600)
+
+
+def _file_hash(pdf_path):
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as pdf_file:
+        for block in iter(lambda: pdf_file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_text_from_pdf_cached(pdf_path):
+    """extract_text_from_pdf memoized by file content, so re-uploads and reruns skip PyPDF2."""
+    file_hash = _file_hash(pdf_path)
+    with _extracted_text_lock:
+        if file_hash in _extracted_text:
+            _extracted_text.move_to_end(file_hash)
+            record_cache_lookup("extracted_text", True)
+            return _extracted_text[file_hash]
+    record_cache_lookup("extracted_text", False)
+    text = extract_text_from_pdf(pdf_path)
+    with _extracted_text_lock:
+        _extracted_text[file_hash] = text
+        if len(_extracted_text) > EXTRACTED_TEXT_MEMO_SIZE:
+            _extracted_text.popitem(last=False)
+    return text
+
+
+def _window_end(text, start, max_chars, min_chars):
+    limit = start + max_chars
+    if limit >= len(text):
+        return len(text)
+    # Prefer a paragraph break, then a sentence end, then any whitespace, within the window
+    for boundary_pattern in (r"\n\s*\n", r"[.!?][\"')\]]?\s", r"\s"):
+        boundaries = [
+            match.end()
+            for match in re.finditer(boundary_pattern, text[start + min_chars : limit])
+        ]
+        if boundaries:
+            return start + min_chars + boundaries[-1]
+    return limit
+
+
+def split_into_windows(text, max_chars=AI_DETECTOR_WINDOW_CHARS, min_chars=AI_DETECTOR_MIN_WINDOW_CHARS):
+    """Splits text into (start, end) windows of at most ~max_chars, cut at paragraph boundaries where possible."""
+    windows = []
+    start = 0
+    while start < len(text):
+        end = _window_end(text, start, max_chars, min_chars)
+        windows.append((start, end))
+        start = end
+    # A tail too short for the provider is folded into the previous window
+    if len(windows) > 1 and windows[-1][1] - windows[-1][0] < min_chars:
+        _, tail_end = windows.pop()
+        windows[-1] = (windows[-1][0], tail_end)
+    return windows
+
+
+def _section_at(headings, position):
+    section = "Front matter"
+    for heading_start, heading in headings:
+        if heading_start > position:
+            break
+        section = heading
+    return section
+
+
+def _default_backend_mode():
+    if AI_DETECTOR_BACKEND in ("local", "remote", "hybrid"):
+        return AI_DETECTOR_BACKEND
+    # Without provider credentials, fall back to scoring entirely in-process
+    return "hybrid" if API_KEY else "local"
+
+
 def detect_ai_generated_text(text):
-    url = "https://api.gowinston.ai/v2/ai-content-detection"
     headers = {
         "Authorization": f"Bearer {API_KEY}",
         "Content-Type": "application/json"
     }
     data = {"text": text}
     try:
-        response = requests.post(url, headers=headers, json=data)
+        with span("external_lookup", "winston"):
+            response = _get_session().post(
+                WINSTON_API_URL, headers=headers, json=data, timeout=AI_DETECTOR_TIMEOUT
+            )
+        # urllib3 keeps the attempts its Retry policy made for this request
+        retries = getattr(getattr(response.raw, "retries", None), "history", ())
+        record_retry("winston", len(retries))
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
         return {"error": str(e)}
 
 
+class DetectorBackend(ABC):
+    """Scores one text window; results use the provider's shape ({"score": 0-100} or {"error": ...})."""
+
+    name = "base"
+
+    @abstractmethod
+    def score(self, text):
+        pass
+
+
+class WinstonBackend(DetectorBackend):
+    name = "winston"
+
+    def score(self, text):
+        return detect_ai_generated_text(text)
+
+
+class LocalStatisticalBackend(DetectorBackend):
+    name = "local"
+
+    def score(self, text):
+        return score_text_locally(text)
+
+
+def _score_remote(backend, texts, max_workers):
+    """Scores texts with a remote backend in parallel, reusing cached responses per window hash."""
+    cache = _detection_cache()
+    keys = ["window:" + _text_hash(text) for text in texts]
+    responses = [cache.get(key) for key in keys]
+    # Only windows not scored before (e.g. the edited parts of a revised paper) go to the provider
+    pending = [index for index, response in enumerate(responses) if response is None]
+    if pending:
+        with ContextThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as executor:
+            fetched = executor.map(lambda index: backend.score(texts[index]), pending)
+            for index, response in zip(pending, fetched):
+                responses[index] = response
+                if "error" not in response:
+                    cache.set(keys[index], response)
+    return responses
+
+
+def _has_score(response):
+    return "error" not in response and isinstance(response.get("score"), (int, float))
+
+
+def detect_ai_generated_text_windows(text, max_workers=AI_DETECTOR_MAX_WORKERS, backend_mode=None):
+    """Scores text window by window.
+
+    backend_mode is "local" (in-process only), "remote" (provider only) or "hybrid":
+    every window is scored locally and only those inside the uncertainty band go to
+    the provider. Returns the provider-style "score" (0-100, higher is more human) as
+    the length-weighted mean of the window scores, plus "windows" and "sections"
+    lists for a heatmap. Windows that couldn't be scored are reported with an "error".
+    """
+    backend_mode = backend_mode or _default_backend_mode()
+    windows = split_into_windows(text)
+    if not windows:
+        return {"error": "No text to analyze."}
+    headings = [
+        (match.start(), " ".join(match.group(0).split()))
+        for match in NEXT_SECTION_PATTERN.finditer(text)
+    ]
+    window_texts = [text[start:end] for start, end in windows]
+
+    local_responses = [None] * len(windows)
+    if backend_mode in ("local", "hybrid"):
+        local_backend = LocalStatisticalBackend()
+        local_responses = [local_backend.score(window_text) for window_text in window_texts]
+    if backend_mode == "remote":
+        remote_indices = list(range(len(windows)))
+    elif backend_mode == "hybrid":
+        remote_indices = [
+            index
+            for index, response in enumerate(local_responses)
+            if not _has_score(response)
+            or AI_LOCAL_UNCERTAIN_LOW < response["score"] < AI_LOCAL_UNCERTAIN_HIGH
+        ]
+    else:
+        remote_indices = []
+
+    responses = list(local_responses)
+    backends = [LocalStatisticalBackend.name] * len(windows)
+    remote_failures = 0
+    if remote_indices:
+        remote_responses = _score_remote(
+            WinstonBackend(), [window_texts[index] for index in remote_indices], max_workers
+        )
+        for index, response in zip(remote_indices, remote_responses):
+            if not _has_score(response):
+                remote_failures += 1
+                # In hybrid mode a provider failure keeps the local score rather than losing the window
+                if responses[index] is not None and _has_score(responses[index]):
+                    continue
+            responses[index] = response
+            backends[index] = WinstonBackend.name
+
+    window_results = []
+    for index, ((start, end), response) in enumerate(zip(windows, responses)):
+        window_result = {
+            "index": index,
+            "section": _section_at(headings, start),
+            "start": start,
+            "end": end,
+            "chars": end - start,
+            "backend": backends[index],
+        }
+        if _has_score(response):
+            window_result["score"] = float(response["score"])
+        else:
+            window_result["error"] = response.get("error", "No score returned.")
+        if local_responses[index] is not None and _has_score(local_responses[index]):
+            window_result["local_score"] = float(local_responses[index]["score"])
+        window_results.append(window_result)
+
+    scored = [window for window in window_results if "score" in window]
+    if not scored:
+        return {"error": window_results[0].get("error", "AI detection failed."), "windows": window_results}
+
+    sections = {}
+    for window in scored:
+        section = sections.setdefault(window["section"], {"section": window["section"], "chars": 0, "weighted": 0.0})
+        section["chars"] += window["chars"]
+        section["weighted"] += window["score"] * window["chars"]
+    total_chars = sum(window["chars"] for window in scored)
+    return {
+        "score": sum(window["score"] * window["chars"] for window in scored) / total_chars,
+        "windows": window_results,
+        "sections": [
+            {"section": s["section"], "chars": s["chars"], "score": s["weighted"] / s["chars"]}
+            for s in sections.values()
+        ],
+        "failed_windows": len(window_results) - len(scored),
+        "backend_mode": backend_mode,
+        "remote_windows": len(remote_indices),
+        "remote_failures": remote_failures,
+    }
+
+
 def analyze_pdf_for_ai_content(pdf_path):
-    text = extract_text_from_pdf(pdf_path)
+    text = extract_text_from_pdf_cached(pdf_path)
     if not text:
         return {"error": "No text found in the PDF."}
-    result = detect_ai_generated_text(text)
-    return result 
\ No newline at end of file
+    backend_mode = _default_backend_mode()
+    cache = _detection_cache()
+    document_key = f"document:{backend_mode}:" + _text_hash(text)
+    cached_result = cache.get(document_key)
+    if cached_result is not None:
+        return cached_result
+    result = detect_ai_generated_text_windows(text, backend_mode=backend_mode)
+    # Partial results aren't cached, so the failed windows are retried next time
+    if "error" not in result and not result.get("failed_windows") and not result.get("remote_failures"):
+        cache.set(document_key, result)
+    return result
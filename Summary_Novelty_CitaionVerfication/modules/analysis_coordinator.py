@@ -0,0 +1,63 @@
+"""Runs summary, novelty and citation verification for one paper concurrently.
+
+The PDF is read once; the analyses share its pages and chunks. All three run at
+once: novelty reuses the section summaries from the summary's cached map phase but
+never waits for the final summary, so wall time is the slowest analysis rather than
+the sum.
+"""
+from concurrent.futures import as_completed
+from instrumentation import ContextThreadPoolExecutor
+from modules.clients import get_llm_and_tools
+from modules.summarizer import assess_novelty, chunk_documents, summarize_documents
+from modules.citation_verifier import verify_citations
+from modules.utils import load_pdf_documents
+
+ANALYSES = ("summary", "novelty", "citation_results")
+
+
+def _failed_result(name, error):
+    if name == "citation_results":
+        return {"error": f"Citation verification failed: {error}"}
+    return f"ERROR: {name.capitalize()} generation failed: {error}"
+
+
+def run_analysis(pdf_path, on_result=None, llm=None, tools=None):
+    """Analyzes a paper and returns {"summary", "novelty", "citation_results"}.
+
+    ``on_result(name, result)`` is called from the calling thread as each analysis
+    finishes, so UIs can show results progressively. A failing analysis yields an
+    error result instead of aborting the others.
+    """
+    if llm is None or tools is None:
+        llm, tools = get_llm_and_tools()
+
+    try:
+        documents = load_pdf_documents(pdf_path)
+    except Exception as e:
+        results = {name: _failed_result(name, f"could not load PDF: {e}") for name in ANALYSES}
+        if on_result:
+            for name in ANALYSES:
+                on_result(name, results[name])
+        return results
+    pdf_pages = [doc.page_content for doc in documents]
+    chunks = chunk_documents(documents)
+
+    results = {}
+    with ContextThreadPoolExecutor(max_workers=len(ANALYSES)) as executor:
+        futures = {
+            executor.submit(summarize_documents, llm, chunks): "summary",
+            executor.submit(assess_novelty, llm, chunks): "novelty",
+            executor.submit(
+                verify_citations, pdf_path, llm=llm, tools=tools, pdf_pages=pdf_pages
+            ): "citation_results",
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"Warning: {name} analysis failed: {e}")
+                results[name] = _failed_result(name, e)
+            if on_result:
+                on_result(name, results[name])
+    return results
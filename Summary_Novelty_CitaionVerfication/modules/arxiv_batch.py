@@ -0,0 +1,85 @@
+import os
+import re
+import xml.etree.ElementTree as ET
+import requests
+from modules.utils import clean_arxiv_id
+from instrumentation import span
+
+# Point ARXIV_API_URL at a local stand-in server to exercise this without reaching arXiv
+ARXIV_API_URL = os.getenv("ARXIV_API_URL", "http://export.arxiv.org/api/query")
+ARXIV_ID_LIST_BATCH_SIZE = int(os.getenv("ARXIV_ID_LIST_BATCH_SIZE", "100"))
+ARXIV_REQUEST_TIMEOUT = (5, 60)  # (connect, read) seconds
+ATOM_NAMESPACE = "{http://www.w3.org/2005/Atom}"
+
+
+def _base_arxiv_id(arxiv_id: str) -> str:
+    return re.sub(r"v\d+$", "", arxiv_id)
+
+
+def _parse_arxiv_feed(feed_xml: str) -> dict:
+    """Parses an arXiv Atom feed into {base arXiv ID: {"title", "authors", "summary"}}."""
+    entries = {}
+    root = ET.fromstring(feed_xml)
+    for entry in root.findall(f"{ATOM_NAMESPACE}entry"):
+        entry_id = entry.findtext(f"{ATOM_NAMESPACE}id", default="")
+        cleaned_id = clean_arxiv_id(entry_id)
+        # Unknown IDs come back as an entry pointing at arxiv.org/api/errors
+        if not cleaned_id or "/api/errors" in entry_id:
+            continue
+        summary = entry.findtext(f"{ATOM_NAMESPACE}summary", default="")
+        if not summary.strip():
+            continue
+        entries[_base_arxiv_id(cleaned_id)] = {
+            "title": " ".join(entry.findtext(f"{ATOM_NAMESPACE}title", default="").split()),
+            "authors": ", ".join(
+                " ".join(author.findtext(f"{ATOM_NAMESPACE}name", default="").split())
+                for author in entry.findall(f"{ATOM_NAMESPACE}author")
+            ),
+            "summary": " ".join(summary.split()),
+        }
+    return entries
+
+
+def fetch_arxiv_metadata_batch(
+    arxiv_ids,
+    batch_size: int = ARXIV_ID_LIST_BATCH_SIZE,
+    api_url: str = ARXIV_API_URL,
+    session=None,
+) -> dict:
+    """Resolves many arXiv IDs with a few id_list queries instead of one query per ID.
+
+    Returns {base arXiv ID: {"title", "authors", "summary"}} for every ID arXiv knows.
+    IDs from a batch that failed are simply missing, so callers can fall back to
+    single lookups for them.
+    """
+    unique_ids = []
+    seen_base_ids = set()
+    for arxiv_id in arxiv_ids:
+        cleaned_id = clean_arxiv_id(arxiv_id)
+        # Results are keyed by base ID, so asking for several versions of a paper is wasted
+        if cleaned_id and _base_arxiv_id(cleaned_id) not in seen_base_ids:
+            seen_base_ids.add(_base_arxiv_id(cleaned_id))
+            unique_ids.append(cleaned_id)
+    if not unique_ids:
+        return {}
+
+    http = session or requests.Session()
+    metadata = {}
+    try:
+        for start in range(0, len(unique_ids), batch_size):
+            batch = unique_ids[start : start + batch_size]
+            try:
+                with span("external_lookup", "arxiv_batch", ids=len(batch)):
+                    response = http.get(
+                        api_url,
+                        params={"id_list": ",".join(batch), "max_results": len(batch)},
+                        timeout=ARXIV_REQUEST_TIMEOUT,
+                    )
+                    response.raise_for_status()
+                metadata.update(_parse_arxiv_feed(response.text))
+            except (requests.exceptions.RequestException, ET.ParseError) as e:
+                print(f"Warning: arXiv batch lookup failed for {len(batch)} IDs: {e}")
+    finally:
+        if session is None:
+            http.close()
+    return metadata
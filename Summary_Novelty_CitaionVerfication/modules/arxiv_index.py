@@ -0,0 +1,204 @@
+"""Offline arXiv metadata index built from the public JSON-lines metadata snapshot.
+
+Build it once with:
+
+    python -m modules.arxiv_index arxiv-metadata-oai-snapshot.json --index arxiv_index.sqlite3
+
+and set ARXIV_INDEX_PATH so citation verification resolves references locally.
+"""
+import os
+import re
+import json
+import zlib
+import sqlite3
+import argparse
+import threading
+from modules.utils import clean_arxiv_id
+
+ARXIV_INDEX_PATH = os.getenv("ARXIV_INDEX_PATH", "")
+# Skip arXiv network lookups entirely (air-gapped environments rely on the index alone)
+ARXIV_OFFLINE = os.getenv("ARXIV_OFFLINE", "").lower() in ("1", "true", "yes")
+TITLE_MATCH_MIN_SIMILARITY = 0.8
+IMPORT_BATCH_SIZE = 5000
+
+
+def _normalize_title(title: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", str(title or "").lower()))
+
+
+def _base_arxiv_id(arxiv_id: str) -> str:
+    return re.sub(r"v\d+$", "", str(arxiv_id or "").strip())
+
+
+def _title_similarity(title1: str, title2: str) -> float:
+    words1 = set(_normalize_title(title1).split())
+    words2 = set(_normalize_title(title2).split())
+    if not words1 or not words2:
+        return 0.0
+    return len(words1 & words2) / len(words1 | words2)
+
+
+def _fts5_available(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp.fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _create_schema(conn: sqlite3.Connection) -> bool:
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS papers (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            authors TEXT NOT NULL,
+            abstract BLOB NOT NULL
+        )"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS title_lookup (
+            normalized_title TEXT PRIMARY KEY,
+            id TEXT NOT NULL
+        )"""
+    )
+    has_fts = _fts5_available(conn)
+    if has_fts:
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS paper_titles USING fts5(title, content='papers', content_rowid='rowid')"
+        )
+    return has_fts
+
+
+def import_arxiv_snapshot(snapshot_path: str, index_path: str, batch_size: int = IMPORT_BATCH_SIZE) -> int:
+    """Streams the arXiv metadata snapshot into a compact SQLite index. Returns the number of papers imported."""
+    conn = sqlite3.connect(index_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    has_fts = _create_schema(conn)
+    imported = 0
+    batch = []
+
+    def flush():
+        conn.executemany(
+            "INSERT OR REPLACE INTO papers (id, title, authors, abstract) VALUES (?, ?, ?, ?)",
+            [(r[0], r[1], r[2], r[3]) for r in batch],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO title_lookup (normalized_title, id) VALUES (?, ?)",
+            [(r[4], r[0]) for r in batch if r[4]],
+        )
+        conn.commit()
+        batch.clear()
+
+    with open(snapshot_path, "r", encoding="utf-8") as snapshot:
+        for line in snapshot:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            paper_id = _base_arxiv_id(record.get("id", ""))
+            abstract = " ".join(str(record.get("abstract") or "").split())
+            if not paper_id or not abstract:
+                continue
+            title = " ".join(str(record.get("title") or "").split())
+            authors = " ".join(str(record.get("authors") or "").split())
+            batch.append(
+                (paper_id, title, authors, zlib.compress(abstract.encode("utf-8")), _normalize_title(title))
+            )
+            imported += 1
+            if len(batch) >= batch_size:
+                flush()
+                print(f"Imported {imported} papers...")
+    if batch:
+        flush()
+    if has_fts:
+        # Rebuild once at the end; keeping the external-content FTS table in sync row by row is far slower
+        conn.execute("INSERT INTO paper_titles(paper_titles) VALUES ('rebuild')")
+        conn.commit()
+    conn.execute("PRAGMA optimize")
+    conn.close()
+    return imported
+
+
+class ArxivIndex:
+    """Read-only lookups by arXiv ID and by title against an imported snapshot."""
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True, check_same_thread=False)
+        self._has_fts = (
+            self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'paper_titles'"
+            ).fetchone()
+            is not None
+        )
+
+    def _row_to_metadata(self, row):
+        return {
+            "arxiv_id": row[0],
+            "title": row[1],
+            "authors": row[2],
+            "summary": zlib.decompress(row[3]).decode("utf-8"),
+        }
+
+    def get(self, arxiv_id: str):
+        paper_id = _base_arxiv_id(clean_arxiv_id(arxiv_id))
+        if not paper_id:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, title, authors, abstract FROM papers WHERE id = ?", (paper_id,)
+            ).fetchone()
+        return self._row_to_metadata(row) if row else None
+
+    def search_title(self, title: str):
+        normalized_title = _normalize_title(title)
+        if not normalized_title:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT p.id, p.title, p.authors, p.abstract FROM title_lookup t JOIN papers p ON p.id = t.id WHERE t.normalized_title = ?",
+                (normalized_title,),
+            ).fetchone()
+            if row is None and self._has_fts:
+                # OR the terms so stray tokens in a citation (years, venues) don't rule out the match
+                fts_query = " OR ".join(f'"{word}"' for word in normalized_title.split())
+                candidates = self._conn.execute(
+                    "SELECT p.id, p.title, p.authors, p.abstract FROM paper_titles JOIN papers p ON p.rowid = paper_titles.rowid WHERE paper_titles MATCH ? ORDER BY rank LIMIT 5",
+                    (fts_query,),
+                ).fetchall()
+                # bm25 only ranks by term overlap, so confirm a candidate really is the same title
+                for candidate in candidates:
+                    if _title_similarity(title, candidate[1]) >= TITLE_MATCH_MIN_SIMILARITY:
+                        row = candidate
+                        break
+        return self._row_to_metadata(row) if row else None
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_arxiv_index():
+    """Returns the shared index when ARXIV_INDEX_PATH points at an imported snapshot, else None."""
+    global _index
+    if not ARXIV_INDEX_PATH or not os.path.exists(ARXIV_INDEX_PATH):
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = ArxivIndex(ARXIV_INDEX_PATH)
+        return _index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import the arXiv JSON-lines metadata snapshot into a local index.")
+    parser.add_argument("snapshot", help="Path to arxiv-metadata-oai-snapshot.json")
+    parser.add_argument("--index", default=ARXIV_INDEX_PATH or "arxiv_index.sqlite3", help="Output index path")
+    args = parser.parse_args()
+    count = import_arxiv_snapshot(args.snapshot, args.index)
+    print(f"Indexed {count} papers into {args.index}")
@@ -1,103 +1,242 @@
 import os
 import json
-from modules.llm_tools import get_llm_and_tools
+from instrumentation import ContextThreadPoolExecutor
+from modules.clients import get_llm_and_tools
+from modules.llm_tools import get_llm_and_tools as build_llm_and_tools, plan_citation_evaluation_batches
+from modules.arxiv_batch import fetch_arxiv_metadata_batch
+from modules.arxiv_index import ARXIV_OFFLINE, get_arxiv_index
+from modules.persistent_cache import get_reference_cache
+from modules.service_limits import service_slot
+from modules.section_extractor import LOCAL_ABSTRACT_MIN_CONFIDENCE, extract_abstract_locally
+from modules.utils import arxiv_cache_key, load_pdf_pages, reference_cache_key
 
-def verify_citations(pdf_path):
-    llm, tools = get_llm_and_tools()
-    load_pdf_tool = next((t for t in tools if t.name == "LoadPDFContent"), None)
+DEFAULT_CITATION_MAX_WORKERS = int(os.getenv("CITATION_MAX_WORKERS", "8"))
+
+def _call_service(service, func, *args):
+    """Runs a single-request lookup (arXiv, Tavily) within the service's concurrency cap.
+
+    The OpenAI-backed tools take their own slot per LLM request inside llm_tools, so
+    they are called directly; wrapping them here would hold a slot across their fan-out.
+    """
+    with service_slot(service):
+        return func(*args)
+
+
+def _prefetch_arxiv_summaries(references_array, reference_cache, arxiv_index):
+    """Fills summaries for every arXiv-identified reference from the local index and cache,
+    then a few batched queries for the rest."""
+    summaries = {}
+    missing_ids = []
+    for ref in references_array:
+        cache_key = arxiv_cache_key(ref.get("arxiv_id"))
+        if not cache_key or cache_key in summaries:
+            continue
+        indexed_paper = arxiv_index.get(ref["arxiv_id"]) if arxiv_index else None
+        cached_summary = indexed_paper["summary"] if indexed_paper else reference_cache.get(cache_key)
+        if cached_summary:
+            summaries[cache_key] = cached_summary
+        elif ref["arxiv_id"] not in missing_ids:
+            missing_ids.append(ref["arxiv_id"])
+    if missing_ids and not ARXIV_OFFLINE:
+        fetched = _call_service("arxiv", fetch_arxiv_metadata_batch, missing_ids)
+        for base_id, metadata in fetched.items():
+            cache_key = "arxiv:" + base_id
+            summaries[cache_key] = metadata["summary"]
+            reference_cache.set(cache_key, metadata["summary"])
+    return summaries
+
+
+def _resolve_reference(
+    ref,
+    arxiv_search_tool,
+    web_search_tool,
+    reference_cache,
+    prefetched_summaries,
+    arxiv_index,
+):
+    enhanced_ref = {
+        "title": ref.get("title", ""),
+        "arxiv_id": ref.get("arxiv_id", ""),
+        "authors": ref.get("authors", ""),
+        "entire_citation": ref.get("entire_citation", ""),
+        "summary": "",
+        "citation_evaluation": {},
+    }
+    arxiv_id_val = ref.get("arxiv_id")
+    summary_found = False
+    # arXiv summaries are prefetched (and cached) by ID; this key covers web lookups and
+    # lets citations of the same paper without an arXiv ID reuse an arXiv summary.
+    title_key = reference_cache_key(ref.get("title", ""), ref.get("authors", ""))
+
+    if arxiv_id_val and arxiv_cache_key(arxiv_id_val) in prefetched_summaries:
+        enhanced_ref["summary"] = prefetched_summaries[arxiv_cache_key(arxiv_id_val)]
+        summary_found = True
+        reference_cache.set(title_key, enhanced_ref["summary"])
+
+    if not summary_found and arxiv_id_val and arxiv_search_tool:
+        arxiv_summary = _call_service("arxiv", arxiv_search_tool.func, arxiv_id_val)
+        if arxiv_summary and not arxiv_summary.startswith("ERROR"):
+            enhanced_ref["summary"] = arxiv_summary
+            summary_found = True
+            reference_cache.set(title_key, arxiv_summary)
+
+    if not summary_found:
+        cached_summary = reference_cache.get(title_key)
+        if cached_summary:
+            enhanced_ref["summary"] = cached_summary
+            summary_found = True
+
+    if not summary_found and arxiv_index and ref.get("title"):
+        indexed_paper = arxiv_index.search_title(ref["title"])
+        if indexed_paper:
+            enhanced_ref["summary"] = indexed_paper["summary"]
+            summary_found = True
+
+    if not summary_found and web_search_tool:
+        query_parts = []
+        if ref.get("title"):
+            query_parts.append(f'title: "{ref["title"]}"')
+        if ref.get("authors"):
+            query_parts.append(f'authors: "{ref["authors"]}"')
+        query = " ".join(query_parts).strip()
+        if not query and ref.get("entire_citation"):
+            query = ref.get("entire_citation", "")
+        if query:
+            web_summary = _call_service("tavily", web_search_tool.func, query)
+            if web_summary and not web_summary.startswith("ERROR"):
+                enhanced_ref["summary"] = web_summary
+                summary_found = True
+                reference_cache.set(title_key, web_summary)
+
+    return enhanced_ref
+
+
+def _unable_to_evaluate(enhanced_ref, main_abstract_content):
+    reason = "Missing citation summary for evaluation."
+    if not main_abstract_content:
+        reason = "Missing main abstract for evaluation."
+    if not enhanced_ref["summary"] and not main_abstract_content:
+        reason = "Missing main abstract and citation summary."
+    return {
+        "evaluation": "unable_to_evaluate",
+        "confidence": 0.0,
+        "reasoning": reason,
+        "relevance_score": 0.0,
+        "relationship_type": "unrelated",
+    }
+
+
+def _evaluate_references(
+    executor, enhanced_references, main_abstract_content, evaluate_citation_quality_batch_tool
+):
+    evaluable_refs = []
+    for enhanced_ref in enhanced_references:
+        if enhanced_ref["summary"] and main_abstract_content:
+            evaluable_refs.append(enhanced_ref)
+        else:
+            enhanced_ref["citation_evaluation"] = _unable_to_evaluate(
+                enhanced_ref, main_abstract_content
+            )
+    if not evaluable_refs:
+        return
+
+    citations = [
+        {"citation_summary": ref["summary"], "citation_title": ref["title"]}
+        for ref in evaluable_refs
+    ]
+    # The main abstract is sent once per batch rather than once per reference
+    batches = plan_citation_evaluation_batches(main_abstract_content, citations)
+
+    def evaluate_batch(batch_indices):
+        evaluation_input = json.dumps(
+            {
+                "main_abstract": main_abstract_content,
+                "citations": [citations[i] for i in batch_indices],
+            }
+        )
+        return json.loads(
+            evaluate_citation_quality_batch_tool.func(evaluation_input)
+        )
+
+    for batch_indices, evaluations in zip(batches, executor.map(evaluate_batch, batches)):
+        for i, citation_evaluation in zip(batch_indices, evaluations):
+            evaluable_refs[i]["citation_evaluation"] = citation_evaluation
+
+
+def verify_citations(
+    pdf_path, max_workers=DEFAULT_CITATION_MAX_WORKERS, llm=None, tools=None, pdf_pages=None
+):
+    if tools is None:
+        llm, tools = build_llm_and_tools(llm=llm) if llm is not None else get_llm_and_tools()
     extract_abstract_tool = next((t for t in tools if t.name == "ExtractAbstract"), None)
     extract_references_section_tool = next((t for t in tools if t.name == "ExtractReferencesSection"), None)
     parse_references_tool = next((t for t in tools if t.name == "ParseReferences"), None)
     arxiv_search_tool = next((t for t in tools if t.name == "ArxivSearch"), None)
     web_search_tool = next((t for t in tools if t.name == "WebSearch"), None)
-    evaluate_citation_quality_tool = next((t for t in tools if t.name == "EvaluateCitationQuality"), None)
-
-    pdf_content = load_pdf_tool.func(pdf_path)
-    if "ERROR" in pdf_content:
-        return {"error": f"Failed to load PDF: {pdf_content}"}
-
-    main_abstract_content = extract_abstract_tool.func(pdf_content)
-    if "ERROR" in main_abstract_content or "Abstract not found." in main_abstract_content:
-        main_abstract_content = "Abstract could not be extracted or was not found."
-
-    references_content_raw = extract_references_section_tool.func(pdf_content)
-    if "ERROR" in references_content_raw or references_content_raw == "NO_REFERENCES_SECTION_FOUND":
-        return {
-            "main_abstract": main_abstract_content,
-            "enhanced_references": [],
-        }
-
-    parsed_references_json_str = parse_references_tool.func(references_content_raw)
-    references_array = json.loads(parsed_references_json_str)
-    if not references_array:
-        return {
-            "main_abstract": main_abstract_content,
-            "enhanced_references": [],
-        }
-
-    enhanced_references = []
-    for ref in references_array:
-        enhanced_ref = {
-            "title": ref.get("title", ""),
-            "arxiv_id": ref.get("arxiv_id", ""),
-            "authors": ref.get("authors", ""),
-            "entire_citation": ref.get("entire_citation", ""),
-            "summary": "",
-            "citation_evaluation": {},
-        }
-        arxiv_id_val = ref.get("arxiv_id")
-        summary_found = False
-
-        if arxiv_id_val and arxiv_search_tool:
-            arxiv_summary = arxiv_search_tool.func(arxiv_id_val)
-            if arxiv_summary and not arxiv_summary.startswith("ERROR"):
-                enhanced_ref["summary"] = arxiv_summary
-                summary_found = True
+    evaluate_citation_quality_batch_tool = next((t for t in tools if t.name == "EvaluateCitationQualityBatch"), None)
+    reference_cache = get_reference_cache()
+    arxiv_index = get_arxiv_index()
 
-        if not summary_found and web_search_tool:
-            query_parts = []
-            if ref.get("title"):
-                query_parts.append(f'title: "{ref["title"]}"')
-            if ref.get("authors"):
-                query_parts.append(f'authors: "{ref["authors"]}"')
-            query = " ".join(query_parts).strip()
-            if not query and ref.get("entire_citation"):
-                query = ref.get("entire_citation", "")
-            if query:
-                web_summary = web_search_tool.func(query)
-                if web_summary and not web_summary.startswith("ERROR"):
-                    enhanced_ref["summary"] = web_summary
-                    summary_found = True
+    if pdf_pages is None:
+        try:
+            pdf_pages = load_pdf_pages(pdf_path)
+        except Exception as e:
+            return {"error": f"Failed to load PDF: ERROR: An error occurred while loading the PDF: {e}"}
+    # Newlines keep a heading at the top of a page on its own line for the heading patterns
+    pdf_content = "\n".join(pdf_pages)
 
-        if enhanced_ref["summary"] and main_abstract_content:
-            evaluation_input = json.dumps(
-                {
-                    "main_abstract": main_abstract_content,
-                    "citation_summary": enhanced_ref["summary"],
-                    "citation_title": enhanced_ref["title"],
-                }
-            )
-            citation_evaluation_json_str = (
-                evaluate_citation_quality_tool.func(evaluation_input)
-            )
-            citation_evaluation = json.loads(citation_evaluation_json_str)
-            enhanced_ref["citation_evaluation"] = citation_evaluation
+    with ContextThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        # Page boundaries make the abstract heading easy to find; the LLM is only needed when the
+        # heuristic isn't confident, and then runs while the references are parsed
+        local_abstract, local_confidence = extract_abstract_locally(pdf_pages)
+        if local_confidence >= LOCAL_ABSTRACT_MIN_CONFIDENCE:
+            abstract_future = None
+        else:
+            abstract_future = executor.submit(extract_abstract_tool.func, pdf_content)
+
+        references_content_raw = extract_references_section_tool.func(pdf_content)
+        if "ERROR" in references_content_raw or references_content_raw == "NO_REFERENCES_SECTION_FOUND":
+            references_array = []
         else:
-            reason = "Missing citation summary for evaluation."
-            if not main_abstract_content:
-                reason = "Missing main abstract for evaluation."
-            if not enhanced_ref["summary"] and not main_abstract_content:
-                reason = "Missing main abstract and citation summary."
-            enhanced_ref["citation_evaluation"] = {
-                "evaluation": "unable_to_evaluate",
-                "confidence": 0.0,
-                "reasoning": reason,
-                "relevance_score": 0.0,
-                "relationship_type": "unrelated",
+            parsed_references_json_str = parse_references_tool.func(references_content_raw)
+            references_array = json.loads(parsed_references_json_str)
+
+        main_abstract_content = abstract_future.result() if abstract_future else local_abstract
+        if "ERROR" in main_abstract_content or "Abstract not found." in main_abstract_content:
+            main_abstract_content = "Abstract could not be extracted or was not found."
+
+        if not references_array:
+            return {
+                "main_abstract": main_abstract_content,
+                "enhanced_references": [],
             }
-        enhanced_references.append(enhanced_ref)
+
+        prefetched_summaries = _prefetch_arxiv_summaries(
+            references_array, reference_cache, arxiv_index
+        )
+
+        # executor.map yields results in input order, so the output matches the bibliography order
+        enhanced_references = list(
+            executor.map(
+                lambda ref: _resolve_reference(
+                    ref,
+                    arxiv_search_tool,
+                    web_search_tool,
+                    reference_cache,
+                    prefetched_summaries,
+                    arxiv_index,
+                ),
+                references_array,
+            )
+        )
+        _evaluate_references(
+            executor,
+            enhanced_references,
+            main_abstract_content,
+            evaluate_citation_quality_batch_tool,
+        )
 
     return {
         "main_abstract": main_abstract_content,
         "enhanced_references": enhanced_references,
-    }
\ No newline at end of file
+    }
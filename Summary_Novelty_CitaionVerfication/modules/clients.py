@@ -0,0 +1,86 @@
+"""Process-wide LLM client and tool registry.
+
+ChatOpenAI, the arXiv/Tavily wrappers and the LangChain tools are built once per
+process and shared by every analysis; the LLM talks through one pooled HTTP client,
+so concurrent requests reuse warm TLS connections instead of opening new ones per paper.
+"""
+import os
+import threading
+import httpx
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from modules.llm_tools import get_llm_and_tools as build_llm_and_tools
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("OPENAI_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+_lock = threading.Lock()
+_env_loaded = False
+_http_client = None
+_llm = None
+_tools = None
+_embeddings = None
+
+
+def _ensure_env():
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv()
+        _env_loaded = True
+
+
+def get_http_client() -> httpx.Client:
+    """Returns the shared, thread-safe connection pool used for OpenAI calls."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+                timeout=HTTP_TIMEOUT,
+            )
+        return _http_client
+
+
+def get_llm() -> ChatOpenAI:
+    """Returns the shared chat model, creating it on first use."""
+    global _llm
+    http_client = get_http_client()
+    with _lock:
+        if _llm is None:
+            _ensure_env()
+            _llm = ChatOpenAI(
+                model=os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini"),
+                temperature=0.0,
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=http_client,
+            )
+        return _llm
+
+
+def get_embeddings() -> OpenAIEmbeddings:
+    """Returns the shared embeddings client, creating it on first use."""
+    global _embeddings
+    http_client = get_http_client()
+    with _lock:
+        if _embeddings is None:
+            _ensure_env()
+            _embeddings = OpenAIEmbeddings(
+                model=os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small"),
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=http_client,
+            )
+        return _embeddings
+
+
+def get_llm_and_tools():
+    """Returns the shared (llm, tools) pair used by citation verification."""
+    global _tools
+    llm = get_llm()
+    with _lock:
+        if _tools is None:
+            _, _tools = build_llm_and_tools(llm=llm)
+        return llm, _tools
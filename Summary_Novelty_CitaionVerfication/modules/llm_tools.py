@@ -1,19 +1,49 @@
 import os
+import re
 import json
 from langchain_openai import ChatOpenAI
 from langchain_community.tools import ArxivQueryRun
 from langchain_community.utilities import ArxivAPIWrapper
 from langchain_tavily import TavilySearch
 from langchain.tools import Tool
+from instrumentation import ContextThreadPoolExecutor, record_llm_response, span
+from usage_tracking import check_budget, record_usage
 from modules.utils import (
     clean_arxiv_id,
+    arxiv_cache_key,
     process_tavily_result,
     load_pdf_content,
 )
+from modules.persistent_cache import get_reference_cache
+from modules.service_limits import service_slot
+from modules.arxiv_index import ARXIV_OFFLINE, get_arxiv_index
+from modules.section_extractor import LOCAL_ABSTRACT_MIN_CONFIDENCE, extract_abstract_locally
+from modules.reference_parser import (
+    LOCAL_REFERENCES_MIN_CONFIDENCE,
+    chunk_references_text,
+    locate_references_section,
+    parse_references_locally,
+)
+
+REFERENCES_CHUNK_MAX_CHARS = int(os.getenv("REFERENCES_CHUNK_MAX_CHARS", "6000"))
+REFERENCES_PARSE_MAX_WORKERS = int(os.getenv("REFERENCES_PARSE_MAX_WORKERS", "4"))
+CITATION_FALLBACK_MAX_WORKERS = int(os.getenv("CITATION_FALLBACK_MAX_WORKERS", "4"))
+
+def _invoke_llm(llm, prompt, component):
+    check_budget()
+    # One OpenAI slot per request, so fan-outs over this helper respect OPENAI_MAX_CONCURRENCY
+    with service_slot("openai"), span("llm_call", component) as attributes:
+        response = llm.invoke(prompt)
+        record_llm_response(component, response, attributes)
+        record_usage(component, response)
+    return response
 
 def _extract_abstract_from_text(document_text: str, llm):
     if not document_text:
         return "No document content provided for abstract extraction."
+    local_abstract, local_confidence = extract_abstract_locally(document_text[:12000])
+    if local_confidence >= LOCAL_ABSTRACT_MIN_CONFIDENCE:
+        return local_abstract
     text_to_process = document_text[:6000]
     prompt = f"""
     You are an AI assistant tasked with extracting the abstract from a research paper.
@@ -30,7 +60,7 @@ def _extract_abstract_from_text(document_text: str, llm):
     Extracted Abstract:
     """
     try:
-        response = llm.invoke(prompt)
+        response = _invoke_llm(llm, prompt, "abstract_extraction")
         extracted_abstract = response.content.strip()
         if extracted_abstract == "Abstract not found.":
             return "Abstract section not found or could not be extracted by LLM."
@@ -42,6 +72,10 @@ def _extract_abstract_from_text(document_text: str, llm):
 def _extract_references_section_from_text(document_text: str, llm):
     if not document_text:
         return ""
+    # Most papers have a plainly headed bibliography; only ask the LLM when the rules aren't sure
+    local_section, local_confidence = locate_references_section(document_text)
+    if local_confidence >= LOCAL_REFERENCES_MIN_CONFIDENCE:
+        return local_section
     last_pages_text = document_text[-8000:]
     prompt = f"""
     You are an AI assistant tasked with extracting the References or Bibliography section from a research paper.
@@ -62,7 +96,7 @@ def _extract_references_section_from_text(document_text: str, llm):
     Extracted References Section:
     """
     try:
-        response = llm.invoke(prompt)
+        response = _invoke_llm(llm, prompt, "references_extraction")
         extracted_references = response.content.strip()
         if (
             extracted_references == "REFERENCES_NOT_FOUND"
@@ -86,7 +120,7 @@ def _extract_references_section_from_text(document_text: str, llm):
             ---
             Extracted References Section:
             """
-            response = llm.invoke(full_prompt)
+            response = _invoke_llm(llm, full_prompt, "references_extraction")
             extracted_references = response.content.strip()
         if extracted_references == "REFERENCES_NOT_FOUND":
             return "NO_REFERENCES_SECTION_FOUND"
@@ -94,9 +128,8 @@ def _extract_references_section_from_text(document_text: str, llm):
     except Exception as e:
         return f"ERROR: An error occurred during LLM references section extraction: {e}"
 
-def _parse_references_from_text(references_text: str, llm) -> str:
-    if not references_text or references_text == "NO_REFERENCES_SECTION_FOUND":
-        return json.dumps([])
+def _parse_references_chunk_with_llm(references_text: str, llm):
+    """Parses one chunk of a references section with the LLM. Returns a list of entries, or None on failure."""
     prompt = f"""
     You are an AI assistant tasked with parsing a list of academic paper references.
     The following text is the raw content extracted from the References or Bibliography section of a research paper.
@@ -123,7 +156,7 @@ def _parse_references_from_text(references_text: str, llm) -> str:
     ---
     """
     try:
-        response = llm.invoke(prompt)
+        response = _invoke_llm(llm, prompt, "references_parsing")
         json_string = response.content.strip()
         if json_string.startswith("```json"):
             json_string = json_string[7:]
@@ -144,7 +177,7 @@ def _parse_references_from_text(references_text: str, llm) -> str:
             try:
                 parsed_data = json.loads(json_string)
             except json.JSONDecodeError:
-                return json.dumps([])
+                return None
         if isinstance(parsed_data, list):
             valid_entries = []
             for entry in parsed_data:
@@ -160,18 +193,77 @@ def _parse_references_from_text(references_text: str, llm) -> str:
                     if cleaned_entry["arxiv_id"] in ["null", "None", ""]:
                         cleaned_entry["arxiv_id"] = None
                     valid_entries.append(cleaned_entry)
-            return json.dumps(valid_entries)
-        else:
-            return json.dumps([])
+            return valid_entries
+        return None
     except Exception as e:
+        print(f"Warning: LLM reference parsing failed for a chunk: {e}")
+        return None
+
+def _reference_dedup_key(entry: dict) -> str:
+    # Versions and "arXiv:" prefixes of one paper share a key; unusable IDs fall back to the text
+    arxiv_key = arxiv_cache_key(entry.get("arxiv_id"))
+    if arxiv_key:
+        return arxiv_key
+    return " ".join(re.findall(r"[a-z0-9]+", (entry.get("entire_citation") or entry.get("title") or "").lower()))
+
+def _parse_references_from_text(references_text: str, llm, max_workers: int = REFERENCES_PARSE_MAX_WORKERS) -> str:
+    if not references_text or references_text == "NO_REFERENCES_SECTION_FOUND":
         return json.dumps([])
+    local_entries, local_confidence = parse_references_locally(references_text)
+    if local_confidence >= LOCAL_REFERENCES_MIN_CONFIDENCE:
+        return json.dumps(local_entries)
+
+    # Long bibliographies are parsed as entry-aligned chunks in parallel, so one prompt never
+    # has to return hundreds of entries and latency follows the slowest chunk.
+    chunks = chunk_references_text(references_text, REFERENCES_CHUNK_MAX_CHARS)
+    with ContextThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+        chunk_results = list(
+            executor.map(lambda chunk: _parse_references_chunk_with_llm(chunk, llm), chunks)
+        )
+
+    merged_entries = []
+    seen_keys = set()
+    for chunk, chunk_entries in zip(chunks, chunk_results):
+        if chunk_entries is None:
+            # Keep what the rules can recover from a failed chunk instead of dropping it
+            chunk_entries, _ = parse_references_locally(chunk)
+        for entry in chunk_entries:
+            dedup_key = _reference_dedup_key(entry)
+            if dedup_key and dedup_key in seen_keys:
+                continue
+            seen_keys.add(dedup_key)
+            merged_entries.append(entry)
+    return json.dumps(merged_entries)
 
-def _get_arxiv_summary_internal(arxiv_id: str, arxiv_tool) -> str:
+def _web_search(tavily_tool, query: str) -> str:
+    with span("external_lookup", "tavily"):
+        return process_tavily_result(
+            tavily_tool.invoke(f"Find abstract or summary for research paper: {query}")
+        )
+
+def _get_arxiv_summary_internal(arxiv_id: str, arxiv_tool, cache=None, index=None) -> str:
     cleaned_id = clean_arxiv_id(arxiv_id)
     if not cleaned_id:
         return ""
+    if index is not None:
+        indexed_paper = index.get(cleaned_id)
+        if indexed_paper:
+            return indexed_paper["summary"]
+    if cache is not None:
+        cached_summary = cache.get(arxiv_cache_key(cleaned_id))
+        if cached_summary:
+            return cached_summary
+    if arxiv_tool is None:
+        return ""
+    summary = _fetch_arxiv_summary(cleaned_id, arxiv_tool)
+    if cache is not None and summary and not summary.startswith("ERROR"):
+        cache.set(arxiv_cache_key(cleaned_id), summary)
+    return summary
+
+def _fetch_arxiv_summary(cleaned_id: str, arxiv_tool) -> str:
     try:
-        result_docs = arxiv_tool.invoke(cleaned_id)
+        with span("external_lookup", "arxiv", arxiv_id=cleaned_id):
+            result_docs = arxiv_tool.invoke(cleaned_id)
         result = ""
         if isinstance(result_docs, str):
             result = result_docs
@@ -230,6 +322,52 @@ def _get_arxiv_summary_internal(arxiv_id: str, arxiv_tool) -> str:
     except Exception as e:
         return f"ERROR: Could not retrieve arXiv summary for {cleaned_id}: {e}"
 
+CITATION_EVALUATION_KEYS = [
+    "evaluation",
+    "confidence",
+    "reasoning",
+    "relevance_score",
+    "relationship_type",
+]
+# Prompt-token budget for one batched evaluation call (main abstract + N citation summaries)
+CITATION_EVAL_BATCH_TOKEN_BUDGET = int(os.getenv("CITATION_EVAL_BATCH_TOKEN_BUDGET", "6000"))
+CITATION_EVAL_MAX_BATCH_SIZE = int(os.getenv("CITATION_EVAL_MAX_BATCH_SIZE", "20"))
+# Approximate tokens per citation for instructions and the returned evaluation object
+CITATION_EVAL_PER_ITEM_OVERHEAD_TOKENS = 150
+
+def _estimate_tokens(text: str) -> int:
+    return len(text or "") // 4 + 1
+
+def _strip_json_fences(text: str) -> str:
+    if text.startswith("```json"):
+        text = text[7:]
+    if text.startswith("```"):
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
+def _normalize_citation_evaluation(evaluation_result: dict) -> dict:
+    for key in CITATION_EVALUATION_KEYS:
+        if key not in evaluation_result:
+            if key == "evaluation":
+                evaluation_result[key] = "marginal"
+            elif key in ["confidence", "relevance_score"]:
+                evaluation_result[key] = 0.5
+            elif key == "reasoning":
+                evaluation_result[key] = "Reasoning not fully provided by LLM."
+            elif key == "relationship_type":
+                evaluation_result[key] = "tangential"
+    evaluation_result["confidence"] = max(
+        0.0, min(1.0, float(evaluation_result.get("confidence", 0.5)))
+    )
+    evaluation_result["relevance_score"] = max(
+        0.0, min(1.0, float(evaluation_result.get("relevance_score", 0.5)))
+    )
+    if evaluation_result.get("evaluation") not in ["good", "bad", "marginal"]:
+        evaluation_result["evaluation"] = "marginal"
+    return evaluation_result
+
 def _evaluate_citation_quality_internal(
     main_abstract: str, citation_summary: str, citation_title: str, llm
 ) -> str:
@@ -275,43 +413,11 @@ def _evaluate_citation_quality_internal(
     Respond with ONLY the JSON object.
     """
     try:
-        response = llm.invoke(prompt)
-        evaluation_text = response.content.strip()
-        if evaluation_text.startswith("```json"):
-            evaluation_text = evaluation_text[7:]
-        if evaluation_text.startswith("```"):
-            evaluation_text = evaluation_text[3:]
-        if evaluation_text.endswith("```"):
-            evaluation_text = evaluation_text[:-3]
-        evaluation_text = evaluation_text.strip()
+        response = _invoke_llm(llm, prompt, "citation_evaluation")
+        evaluation_text = _strip_json_fences(response.content.strip())
         try:
             evaluation_result = json.loads(evaluation_text)
-            required_keys = [
-                "evaluation",
-                "confidence",
-                "reasoning",
-                "relevance_score",
-                "relationship_type",
-            ]
-            for key in required_keys:
-                if key not in evaluation_result:
-                    if key == "evaluation":
-                        evaluation_result[key] = "marginal"
-                    elif key in ["confidence", "relevance_score"]:
-                        evaluation_result[key] = 0.5
-                    elif key == "reasoning":
-                        evaluation_result[key] = "Reasoning not fully provided by LLM."
-                    elif key == "relationship_type":
-                        evaluation_result[key] = "tangential"
-            evaluation_result["confidence"] = max(
-                0.0, min(1.0, float(evaluation_result.get("confidence", 0.5)))
-            )
-            evaluation_result["relevance_score"] = max(
-                0.0, min(1.0, float(evaluation_result.get("relevance_score", 0.5)))
-            )
-            if evaluation_result.get("evaluation") not in ["good", "bad", "marginal"]:
-                evaluation_result["evaluation"] = "marginal"
-            return json.dumps(evaluation_result)
+            return json.dumps(_normalize_citation_evaluation(evaluation_result))
         except json.JSONDecodeError:
             current_default = default_error_response.copy()
             current_default["reasoning"] = (
@@ -325,25 +431,154 @@ def _evaluate_citation_quality_internal(
         current_default["reasoning"] = f"Error during evaluation LLM call: {str(e)}"
         return json.dumps(current_default)
 
-def get_llm_and_tools():
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-    llm = ChatOpenAI(
-        model=os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini"),
-        temperature=0,
-        api_key=OPENAI_API_KEY,
+def plan_citation_evaluation_batches(
+    main_abstract: str,
+    citations: list,
+    token_budget: int = CITATION_EVAL_BATCH_TOKEN_BUDGET,
+    max_batch_size: int = CITATION_EVAL_MAX_BATCH_SIZE,
+) -> list:
+    """Groups citation indices so each batch prompt (abstract sent once) stays within the token budget."""
+    available_tokens = max(0, token_budget - _estimate_tokens(main_abstract))
+    batches = []
+    current_batch = []
+    current_tokens = 0
+    for index, citation in enumerate(citations):
+        citation_tokens = (
+            _estimate_tokens(citation.get("citation_title", ""))
+            + _estimate_tokens(citation.get("citation_summary", ""))
+            + CITATION_EVAL_PER_ITEM_OVERHEAD_TOKENS
+        )
+        if current_batch and (
+            current_tokens + citation_tokens > available_tokens
+            or len(current_batch) >= max_batch_size
+        ):
+            batches.append(current_batch)
+            current_batch = []
+            current_tokens = 0
+        current_batch.append(index)
+        current_tokens += citation_tokens
+    if current_batch:
+        batches.append(current_batch)
+    return batches
+
+def _is_well_formed_evaluation(entry) -> bool:
+    if not isinstance(entry, dict):
+        return False
+    if entry.get("evaluation") not in ["good", "bad", "marginal"]:
+        return False
+    try:
+        float(entry.get("confidence"))
+        float(entry.get("relevance_score"))
+    except (TypeError, ValueError):
+        return False
+    return True
+
+def _evaluate_citation_quality_batch_internal(main_abstract: str, citations: list, llm) -> list:
+    """Evaluates several citations against the main abstract in one LLM call.
+
+    citations is a list of {"citation_title", "citation_summary"} dicts. Returns one
+    evaluation dict per citation, in order. Entries the LLM omits or returns malformed
+    are re-evaluated individually with _evaluate_citation_quality_internal, in parallel.
+    """
+    if not citations:
+        return []
+    citation_blocks = "\n".join(
+        f"""[{number}] CITED PAPER TITLE: {citation.get("citation_title", "")}
+    CITED PAPER SUMMARY/ABSTRACT: {citation.get("citation_summary", "")}
+"""
+        for number, citation in enumerate(citations, start=1)
     )
-    arxiv_tool_instance = None
+    prompt = f"""
+    You are an expert academic reviewer. Evaluate the relevance of each CITED PAPER below to a MAIN PAPER based on their abstracts.
+
+    MAIN PAPER ABSTRACT:
+    ---
+    {main_abstract}
+    ---
+
+    CITED PAPERS:
+    ---
+    {citation_blocks}
+    ---
+
+    Provide your evaluations as a JSON array ONLY, with exactly one object per cited paper. Each object must include these keys:
+    - "index": (integer) The number of the cited paper in brackets above.
+    - "evaluation": (string) "good", "bad", or "marginal".
+    - "confidence": (float) Your confidence in this evaluation, from 0.0 to 1.0.
+    - "reasoning": (string) A brief explanation for your evaluation (max 2-3 sentences).
+    - "relevance_score": (float) A score from 0.0 (irrelevant) to 1.0 (highly relevant).
+    - "relationship_type": (string) One of: "foundational", "methodological", "comparative", "supportive", "tangential", "unrelated".
+
+    Criteria:
+    - "good": Highly relevant, directly supports or relates to the main paper's core research.
+    - "bad": Irrelevant or very loosely related, offers no clear contribution.
+    - "marginal": Some relation, perhaps to background or a minor aspect, but not core.
+
+    Consider topical overlap, methodological connections, and if each cited work strengthens the main paper.
+    Respond with ONLY the JSON array.
+    """
+    evaluations_by_index = {}
     try:
-        arxiv_wrapper = ArxivAPIWrapper(
-            top_k_results=1,
-            doc_content_chars_max=4000,
-            load_max_docs=1,
-            load_all_available_meta=True,
+        response = _invoke_llm(llm, prompt, "citation_evaluation")
+        parsed_data = json.loads(_strip_json_fences(response.content.strip()))
+        if isinstance(parsed_data, list):
+            for entry in parsed_data:
+                if not _is_well_formed_evaluation(entry):
+                    continue
+                try:
+                    index = int(entry.get("index"))
+                except (TypeError, ValueError):
+                    continue
+                if 1 <= index <= len(citations) and index not in evaluations_by_index:
+                    entry.pop("index", None)
+                    evaluations_by_index[index] = _normalize_citation_evaluation(entry)
+    except Exception as e:
+        print(f"Batched citation evaluation failed, evaluating individually: {e}")
+
+    missing = [number for number in range(1, len(citations) + 1) if number not in evaluations_by_index]
+    if missing:
+        with ContextThreadPoolExecutor(max_workers=max(1, min(CITATION_FALLBACK_MAX_WORKERS, len(missing)))) as executor:
+            futures = {
+                number: executor.submit(
+                    _evaluate_citation_quality_internal,
+                    main_abstract,
+                    citations[number - 1].get("citation_summary", ""),
+                    citations[number - 1].get("citation_title", ""),
+                    llm,
+                )
+                for number in missing
+            }
+            for number, future in futures.items():
+                evaluations_by_index[number] = json.loads(future.result())
+    return [evaluations_by_index[number] for number in range(1, len(citations) + 1)]
+
+def get_llm_and_tools(llm=None):
+    """Builds the citation tools around ``llm`` (a new ChatOpenAI if omitted).
+
+    Prefer modules.clients.get_llm_and_tools, which builds them once per process.
+    """
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+    if llm is None:
+        llm = ChatOpenAI(
+            model=os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini"),
+            temperature=0,
+            api_key=OPENAI_API_KEY,
         )
-        arxiv_tool_instance = ArxivQueryRun(api_wrapper=arxiv_wrapper)
-    except Exception:
-        pass
+    reference_cache = get_reference_cache()
+    arxiv_index = get_arxiv_index()
+    arxiv_tool_instance = None
+    if not ARXIV_OFFLINE:
+        try:
+            arxiv_wrapper = ArxivAPIWrapper(
+                top_k_results=1,
+                doc_content_chars_max=4000,
+                load_max_docs=1,
+                load_all_available_meta=True,
+            )
+            arxiv_tool_instance = ArxivQueryRun(api_wrapper=arxiv_wrapper)
+        except Exception:
+            pass
     tavily_search_tool_instance = None
     if TAVILY_API_KEY:
         try:
@@ -384,11 +619,13 @@ def get_llm_and_tools():
             description="Parses a raw references section text into a JSON string of structured citation objects. Input is the raw references section text. Each object has 'title', 'arxiv_id', 'authors', 'entire_citation'. Returns an empty JSON array string if parsing fails.",
         )
     )
-    if arxiv_tool_instance:
+    if arxiv_tool_instance or arxiv_index:
         tools.append(
             Tool(
                 name="ArxivSearch",
-                func=lambda arxiv_id: _get_arxiv_summary_internal(arxiv_id, arxiv_tool_instance),
+                func=lambda arxiv_id: _get_arxiv_summary_internal(
+                    arxiv_id, arxiv_tool_instance, reference_cache, arxiv_index
+                ),
                 description="Searches arXiv for a paper's summary/abstract using its arXiv ID. Input is the arXiv ID (e.g., '2301.07041'). Returns the summary text or an error message.",
             )
         )
@@ -396,11 +633,7 @@ def get_llm_and_tools():
         tools.append(
             Tool(
                 name="WebSearch",
-                func=lambda query: process_tavily_result(
-                    tavily_search_tool_instance.invoke(
-                        f"Find abstract or summary for research paper: {query}"
-                    )
-                ),
+                func=lambda query: _web_search(tavily_search_tool_instance, query),
                 description="Performs a web search to find the abstract or summary of a research paper. Input is a search query (e.g., 'paper title authors'). Returns the summary text or an error message.",
             )
         )
@@ -416,4 +649,17 @@ def get_llm_and_tools():
             description="Evaluates the relevance and quality of a cited paper to a main paper. Input is a JSON string with keys: 'main_abstract', 'citation_summary', 'citation_title'. Returns a JSON string with evaluation details.",
         )
     )
+    tools.append(
+        Tool(
+            name="EvaluateCitationQualityBatch",
+            func=lambda json_input: json.dumps(
+                _evaluate_citation_quality_batch_internal(
+                    json.loads(json_input)["main_abstract"],
+                    json.loads(json_input)["citations"],
+                    llm,
+                )
+            ),
+            description="Evaluates the relevance and quality of several cited papers to a main paper in one call. Input is a JSON string with keys: 'main_abstract' and 'citations' (a list of objects with 'citation_summary' and 'citation_title'). Returns a JSON array string with one evaluation per citation, in order.",
+        )
+    )
     return llm, tools
\ No newline at end of file
@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from instrumentation import record_cache_lookup
+
+DEFAULT_CACHE_PATH = os.getenv(
+    "COPYCATCH_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "copycatch", "cache.sqlite3"),
+)
+REFERENCE_CACHE_TTL_DAYS = float(os.getenv("REFERENCE_CACHE_TTL_DAYS", "30"))
+
+
+class PersistentCache:
+    """SQLite-backed key/value store with a TTL, shared by threads and processes.
+
+    Values are stored as JSON. Entries live in a namespace so several caches can
+    share one database file without key collisions.
+    """
+
+    def __init__(self, namespace: str, ttl_seconds: float, path: str = DEFAULT_CACHE_PATH):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )"""
+            )
+            self._conn.commit()
+
+    def get(self, key: str):
+        if not key:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        if row is None:
+            record_cache_lookup(self.namespace, False)
+            return None
+        value, stored_at = row
+        if time.time() - stored_at > self.ttl_seconds:
+            self.delete(key)
+            record_cache_lookup(self.namespace, False)
+            return None
+        record_cache_lookup(self.namespace, True)
+        return json.loads(value)
+
+    def set(self, key: str, value) -> None:
+        if not key:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, stored_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value), time.time()),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND stored_at < ?",
+                (self.namespace, time.time() - self.ttl_seconds),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(namespace: str, ttl_seconds: float, path: str = DEFAULT_CACHE_PATH) -> PersistentCache:
+    """Returns the process-wide cache for a namespace, creating it on first use."""
+    with _caches_lock:
+        cache = _caches.get((namespace, path))
+        if cache is None:
+            cache = PersistentCache(namespace, ttl_seconds, path)
+            _caches[(namespace, path)] = cache
+        return cache
+
+
+def get_reference_cache() -> PersistentCache:
+    """Cache of retrieved reference summaries, keyed by arXiv ID or title+authors."""
+    return get_cache("reference_summaries", REFERENCE_CACHE_TTL_DAYS * 24 * 3600)
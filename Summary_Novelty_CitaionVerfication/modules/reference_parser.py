@@ -0,0 +1,249 @@
+"""Rule-based references extraction and parsing.
+
+Handles the common bibliography layouts ("[1] ...", "1. ...", author-year) locally so the
+LLM is only needed for documents these rules can't parse confidently.
+"""
+import re
+from modules.utils import clean_arxiv_id
+
+# Minimum confidence (0-1) for callers to trust the local result over an LLM call
+LOCAL_REFERENCES_MIN_CONFIDENCE = 0.8
+MIN_REFERENCE_ENTRIES = 3
+
+REFERENCES_HEADING_PATTERN = re.compile(
+    r"^[ \t]*(?:(?:\d{1,2}|[IVX]{1,4})\.?[ \t]+)?"
+    r"(references|bibliography|works cited|literature cited|reference list|cited literature)"
+    r"[ \t]*:?[ \t]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+SECTION_END_PATTERN = re.compile(
+    r"^[ \t]*(?:[A-Z](?:\.\d+)*\.?[ \t]+)?(appendix|appendices|supplementary material|supplemental material)\b.*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+BRACKET_MARKER_PATTERN = re.compile(r"(?:^|\n)[ \t]*\[(\d{1,3})\][ \t]*")
+NUMBER_MARKER_PATTERN = re.compile(r"(?:^|\n)[ \t]*(\d{1,3})\.[ \t]+(?=[A-ZÀ-ſ])")
+AUTHOR_YEAR_START_PATTERN = re.compile(
+    r"^[ \t]*[A-ZÀ-ſ][A-Za-zÀ-ſ'`\-]+(?: [A-ZÀ-ſ][A-Za-zÀ-ſ'`\-]+)?,[ \t]+"
+    r"(?:[A-Z]\.|[A-Z][a-z]+|and\b|&)",
+    re.MULTILINE,
+)
+YEAR_PATTERN = re.compile(r"\b(?:19|20)\d{2}[a-z]?\b")
+DOI_PATTERN = re.compile(r"\b10\.\d{4,9}/[^\s\"<>]+", re.IGNORECASE)
+ARXIV_ID_PATTERNS = [
+    re.compile(r"arxiv\.org/(?:abs|pdf)/([a-z\-]+/\d{7}(?:v\d+)?|\d{4}\.\d{4,5}(?:v\d+)?)", re.IGNORECASE),
+    re.compile(r"10\.48550/arxiv\.(\d{4}\.\d{4,5}(?:v\d+)?)", re.IGNORECASE),
+    re.compile(r"arxiv(?:\s+preprint)?\s*:?\s*(?:abs/)?([a-z\-]+/\d{7}(?:v\d+)?|\d{4}\.\d{4,5}(?:v\d+)?)", re.IGNORECASE),
+]
+QUOTED_TITLE_PATTERN = re.compile(r"[\"“”]([^\"“”]{10,300}?)[,.]?[\"“”]")
+
+
+def _collapse_whitespace(text: str) -> str:
+    # Re-join words hyphenated across line breaks before collapsing the remaining whitespace
+    text = re.sub(r"(\w)-\s*\n\s*(\w)", r"\1\2", text)
+    return " ".join(text.split())
+
+
+def _split_on_markers(section_text: str, pattern) -> tuple:
+    """Splits at numbered markers, returning (entries, fraction of markers in sequence, marker offsets)."""
+    matches = list(pattern.finditer(section_text))
+    if len(matches) < MIN_REFERENCE_ENTRIES:
+        return [], 0.0, []
+    entries = []
+    in_sequence = 0
+    # Counted from the first marker, so a chunk starting at "[7]" is as well-formed as the whole list
+    first_number = int(matches[0].group(1))
+    for position, match in enumerate(matches):
+        if int(match.group(1)) == first_number + position:
+            in_sequence += 1
+        end = matches[position + 1].start() if position + 1 < len(matches) else len(section_text)
+        entry = section_text[match.end() : end].strip()
+        if entry:
+            entries.append(entry)
+    return entries, in_sequence / len(matches), [match.start() for match in matches]
+
+
+def _split_author_year(section_text: str) -> tuple:
+    starts = [match.start() for match in AUTHOR_YEAR_START_PATTERN.finditer(section_text)]
+    if len(starts) < MIN_REFERENCE_ENTRIES:
+        return [], 0.0, []
+    entries = []
+    for position, start in enumerate(starts):
+        end = starts[position + 1] if position + 1 < len(starts) else len(section_text)
+        entry = section_text[start:end].strip()
+        if entry:
+            entries.append(entry)
+    # A wrapped line that happens to start with "Name, X." would split an entry in two;
+    # such fragments usually lack a year, which the confidence below accounts for.
+    return entries, 1.0, starts
+
+
+def _split_best_layout(section_text: str) -> tuple:
+    """Returns (raw entries, confidence, entry start offsets) for the best-recognised layout."""
+    best_entries, best_confidence, best_starts = [], 0.0, []
+    if not section_text:
+        return best_entries, best_confidence, best_starts
+    for entries, layout_score, starts in (
+        _split_on_markers(section_text, BRACKET_MARKER_PATTERN),
+        _split_on_markers(section_text, NUMBER_MARKER_PATTERN),
+        _split_author_year(section_text),
+    ):
+        if len(entries) < MIN_REFERENCE_ENTRIES:
+            continue
+        citation_like = sum(
+            1
+            for entry in entries
+            if YEAR_PATTERN.search(entry) or DOI_PATTERN.search(entry) or "arxiv" in entry.lower()
+        )
+        confidence = layout_score * citation_like / len(entries)
+        if confidence > best_confidence:
+            best_entries, best_confidence, best_starts = entries, confidence, starts
+    return best_entries, best_confidence, best_starts
+
+
+def split_reference_entries(section_text: str) -> tuple:
+    """Splits a references section into raw entries.
+
+    Returns (entries, confidence), where confidence (0-1) combines how consistently the
+    numbering/author-year layout was recognised with how many entries look like
+    citations (contain a year, DOI or arXiv ID).
+    """
+    entries, confidence, _ = _split_best_layout(section_text)
+    return [_collapse_whitespace(entry) for entry in entries], confidence
+
+
+def locate_references_section(document_text: str) -> tuple:
+    """Finds the references section by its heading.
+
+    Returns (section_text, confidence); confidence is that of splitting the located
+    section into entries, so a heading followed by non-bibliography text scores low.
+    """
+    if not document_text:
+        return "", 0.0
+    headings = list(REFERENCES_HEADING_PATTERN.finditer(document_text))
+    if not headings:
+        return "", 0.0
+    # The last heading wins: earlier matches are usually a table of contents or running text
+    start = headings[-1].end()
+    end_match = SECTION_END_PATTERN.search(document_text, start)
+    section_text = document_text[start : end_match.start() if end_match else len(document_text)].strip()
+    _, confidence = split_reference_entries(section_text)
+    return section_text, confidence
+
+
+def _find_arxiv_id(entry: str) -> str:
+    for pattern in ARXIV_ID_PATTERNS:
+        match = pattern.search(entry)
+        if match:
+            cleaned_id = clean_arxiv_id(match.group(1))
+            if cleaned_id:
+                return cleaned_id
+    return ""
+
+
+AUTHOR_LIST_CONTINUES_PATTERN = re.compile(r"[A-Z]\.|[A-ZÀ-ſ][\w'\-]*(?:,| and\b| &| et al\b| [A-Z]\.)")
+
+
+def _sentence_breaks(text: str):
+    """Yields positions of '. ' breaks that aren't author initials or common abbreviations."""
+    for match in re.finditer(r"[.?!]\s+", text):
+        preceding_word = re.search(r"(\S+)$", text[: match.start()])
+        word = preceding_word.group(1) if preceding_word else ""
+        if re.fullmatch(r"(?:[A-Z][a-z]?\.[A-Z]|[A-Z]\.-?[A-Z]|Jr|Sr|St|vol|no|pp|eds?|Proc|Conf|Int|Vol)", word):
+            continue
+        # "J. Devlin, ..." is an initial, but "Smith J, Doe A. A study of ..." ends the author list
+        if re.fullmatch(r"[A-Z]", word) and (
+            AUTHOR_LIST_CONTINUES_PATTERN.match(text, match.end())
+            or re.search(r"\b(?:and|&)\s+(?:[A-Z]\.\s*)*[A-Z]$", text[: match.start()])
+        ):
+            continue
+        yield match.start(), match.end()
+
+
+def parse_reference_entry(entry: str) -> dict:
+    """Extracts title, arXiv ID and authors from one raw entry; missing fields are empty strings."""
+    text = _collapse_whitespace(entry)
+    arxiv_id = _find_arxiv_id(text)
+    authors, title = "", ""
+
+    quoted = QUOTED_TITLE_PATTERN.search(text)
+    year_in_parens = re.search(r"\(((?:19|20)\d{2}[a-z]?|n\.d\.)\)\.?\s*", text)
+    if quoted:
+        title = quoted.group(1)
+        authors = text[: quoted.start()]
+    elif year_in_parens and year_in_parens.start() < len(text) // 2:
+        # Author-year (APA-like): "Authors (2020). Title. Venue."
+        authors = text[: year_in_parens.start()]
+        remainder = text[year_in_parens.end() :]
+        title_end = next(_sentence_breaks(remainder), (len(remainder), len(remainder)))[0]
+        title = remainder[:title_end]
+    else:
+        # "Authors. Title. Venue, year." (IEEE/ACL/NeurIPS-like)
+        breaks = list(_sentence_breaks(text))
+        if breaks:
+            authors = text[: breaks[0][0]]
+            title_end = breaks[1][0] if len(breaks) > 1 else len(text)
+            title = text[breaks[0][1] : title_end]
+
+    title = re.sub(r"^(?:In\s+)", "", title.strip(" .,;:\"'“”"))
+    authors = re.sub(r"[\s,;:]+$", "", authors.strip())
+    authors = re.sub(r"[,.]?\s*(?:19|20)\d{2}[a-z]?$", "", authors).strip(" .,;")
+    return {
+        "title": title,
+        "arxiv_id": arxiv_id or None,
+        "authors": authors,
+        "entire_citation": text,
+    }
+
+
+def _is_plausible_reference(parsed_entry: dict) -> bool:
+    title_words = len(parsed_entry["title"].split())
+    return bool(parsed_entry["authors"]) and 2 <= title_words <= 40
+
+
+def parse_references_locally(references_text: str) -> tuple:
+    """Splits and parses a references section without an LLM.
+
+    Returns (parsed_entries, confidence) where parsed_entries use the same keys as the
+    LLM parser ('title', 'arxiv_id', 'authors', 'entire_citation').
+    """
+    entries, split_confidence = split_reference_entries(references_text)
+    if not entries:
+        return [], 0.0
+    parsed_entries = [parse_reference_entry(entry) for entry in entries]
+    plausible = sum(1 for parsed_entry in parsed_entries if _is_plausible_reference(parsed_entry))
+    return parsed_entries, split_confidence * plausible / len(parsed_entries)
+
+
+def chunk_references_text(references_text: str, max_chars: int) -> list:
+    """Splits a references section into chunks of at most ~max_chars that never cut an entry.
+
+    Entries come from the rule-based splitter when it recognises the layout; otherwise
+    blank-line separated paragraphs (or, failing that, lines) are used as the units.
+    Entries keep their original text, "[n]"/"n." markers included, so each chunk can
+    still be split by parse_references_locally if its LLM call fails.
+    """
+    if not references_text or len(references_text) <= max_chars:
+        return [references_text] if references_text else []
+    _, _, starts = _split_best_layout(references_text)
+    # Anything before the first entry stays with it rather than being dropped
+    boundaries = [0] + starts[1:] + [len(references_text)] if starts else []
+    units = [
+        references_text[start:end].strip()
+        for start, end in zip(boundaries, boundaries[1:])
+        if references_text[start:end].strip()
+    ]
+    if not units:
+        paragraphs = [p.strip() for p in re.split(r"\n[ \t]*\n", references_text) if p.strip()]
+        units = paragraphs if len(paragraphs) > 1 else references_text.splitlines()
+    chunks = []
+    current_units, current_length = [], 0
+    for unit in units:
+        # An oversized single entry still gets its own chunk rather than being cut
+        if current_units and current_length + len(unit) + 1 > max_chars:
+            chunks.append("\n".join(current_units))
+            current_units, current_length = [], 0
+        current_units.append(unit)
+        current_length += len(unit) + 1
+    if current_units:
+        chunks.append("\n".join(current_units))
+    return chunks
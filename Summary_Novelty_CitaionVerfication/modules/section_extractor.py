@@ -0,0 +1,98 @@
+"""Heuristic extraction of the abstract from a paper's front matter.
+
+Papers almost always label the abstract, and the text up to the next heading
+(Keywords, Index Terms, Introduction, ...) is the abstract itself, so the LLM is only
+needed for the unusual layouts these rules can't handle confidently.
+"""
+import os
+import re
+
+# Minimum confidence (0-1) for callers to trust the local abstract over an LLM call
+LOCAL_ABSTRACT_MIN_CONFIDENCE = float(os.getenv("LOCAL_ABSTRACT_MIN_CONFIDENCE", "0.8"))
+ABSTRACT_SEARCH_PAGES = 2
+ABSTRACT_MIN_WORDS = 50
+ABSTRACT_MAX_WORDS = 600
+
+# "Abstract", "ABSTRACT", "A B S T R A C T", optionally followed inline by the text ("Abstract—We ...")
+ABSTRACT_HEADING_PATTERN = re.compile(
+    r"^[ \t]*(?:abstract|a[ \t]+b[ \t]+s[ \t]+t[ \t]+r[ \t]+a[ \t]+c[ \t]+t)(?:[ \t]*$|[ \t]*[:.\-—–][ \t]*)",
+    re.IGNORECASE | re.MULTILINE,
+)
+ABSTRACT_END_PATTERN = re.compile(
+    r"^[ \t]*(?:"
+    r"(?:keywords|key words|index terms|ccs concepts|general terms|acm reference format)\b"
+    r"|(?:1|I)\.?[ \t]+(?:introduction|background|motivation|overview)\b"
+    r"|introduction[ \t]*$"
+    r")",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+def _collapse_whitespace(text: str) -> str:
+    text = re.sub(r"(\w)-\s*\n\s*(\w)", r"\1\2", text)
+    return " ".join(text.split())
+
+
+def extract_abstract_locally(pages) -> tuple:
+    """Finds the abstract in the first pages of a paper.
+
+    ``pages`` is a list of page texts (or a single string). Returns (abstract, confidence);
+    confidence (0-1) is high only when both the heading and the following section
+    heading were found and the text in between has a plausible abstract length.
+    """
+    if isinstance(pages, str):
+        pages = [pages]
+    front_matter = "\n".join(page for page in (pages or [])[:ABSTRACT_SEARCH_PAGES] if page)
+    if not front_matter.strip():
+        return "", 0.0
+
+    heading = ABSTRACT_HEADING_PATTERN.search(front_matter)
+    if heading:
+        start = heading.end()
+        confidence = 0.6
+    else:
+        # No label: the block before the first section heading may still be the abstract
+        start = 0
+        confidence = 0.2
+    end_match = ABSTRACT_END_PATTERN.search(front_matter, start)
+    if end_match:
+        end = end_match.start()
+        confidence += 0.35
+    else:
+        # Without an end marker, take the paragraph following the heading
+        paragraph_break = re.search(r"\n[ \t]*\n", front_matter[start:])
+        end = start + paragraph_break.start() if paragraph_break else len(front_matter)
+
+    abstract = _collapse_whitespace(front_matter[start:end])
+    word_count = len(abstract.split())
+    if word_count < ABSTRACT_MIN_WORDS // 2 or word_count > ABSTRACT_MAX_WORDS * 2:
+        return abstract, 0.0
+    if not ABSTRACT_MIN_WORDS <= word_count <= ABSTRACT_MAX_WORDS:
+        confidence *= 0.5
+    return abstract, min(confidence, 1.0)
+
+
+RELATED_WORK_MAX_CHARS = 8000
+RELATED_WORK_HEADING_PATTERN = re.compile(
+    r"^[ \t]*(?:(?:\d{1,2}(?:\.\d+)*|[IVX]{1,4})\.?[ \t]+)?"
+    r"(?:related work|related works|prior work|previous work|literature review|background and related work)"
+    r"[ \t]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+# A numbered section heading on its own line, e.g. "3 Method" or "IV. EXPERIMENTS"
+NEXT_SECTION_PATTERN = re.compile(
+    r"^[ \t]*(?:\d{1,2}|[IVX]{1,4})\.?[ \t]+[A-Z][A-Za-z][A-Za-z \-:]{1,60}[ \t]*$",
+    re.MULTILINE,
+)
+
+
+def extract_related_work_locally(document_text: str) -> str:
+    """Returns the related-work section (up to the next numbered heading), or "" if there isn't one."""
+    if not document_text:
+        return ""
+    heading = RELATED_WORK_HEADING_PATTERN.search(document_text)
+    if not heading:
+        return ""
+    end_match = NEXT_SECTION_PATTERN.search(document_text, heading.end())
+    end = end_match.start() if end_match else len(document_text)
+    return _collapse_whitespace(document_text[heading.end() : end])[:RELATED_WORK_MAX_CHARS]
@@ -0,0 +1,23 @@
+import os
+import threading
+from contextlib import contextmanager
+
+# Caps on concurrent requests per external service, shared by everything in the process.
+# A slot covers one request, so helpers that fan out (chunked parsing, per-citation
+# fallbacks) stay within the cap however they are called.
+SERVICE_CONCURRENCY_LIMITS = {
+    "arxiv": int(os.getenv("ARXIV_MAX_CONCURRENCY", "2")),
+    "tavily": int(os.getenv("TAVILY_MAX_CONCURRENCY", "4")),
+    "openai": int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+}
+_service_semaphores = {
+    service: threading.BoundedSemaphore(limit)
+    for service, limit in SERVICE_CONCURRENCY_LIMITS.items()
+}
+
+
+@contextmanager
+def service_slot(service):
+    """Holds one of the service's concurrency slots for a single request; never nest these."""
+    with _service_semaphores[service]:
+        yield
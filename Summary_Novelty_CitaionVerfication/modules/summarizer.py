@@ -1,27 +1,51 @@
 import os
-from langchain_openai import ChatOpenAI
+import hashlib
+import threading
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.prompts import PromptTemplate
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.chains.combine_documents import create_stuff_documents_chain
-from dotenv import load_dotenv
+from langchain_core.documents import Document
+from langchain_core.output_parsers import StrOutputParser
+from instrumentation import ContextThreadPoolExecutor, span, traced
+from usage_tracking import UsageCallbackHandler
+from modules.clients import get_llm
+from modules.persistent_cache import get_cache
+from modules.section_extractor import (
+    LOCAL_ABSTRACT_MIN_CONFIDENCE,
+    extract_abstract_locally,
+    extract_related_work_locally,
+)
+
+# Papers above this many tokens are summarized with map-reduce instead of a single stuffed prompt
+STUFF_TOKEN_LIMIT = int(os.getenv("STUFF_TOKEN_LIMIT", "60000"))
+MAP_MAX_CONCURRENCY = int(os.getenv("MAP_MAX_CONCURRENCY", "8"))
+# Chunks are merged into sections of about this many tokens for the map phase, keeping it to few calls
+MAP_SECTION_TOKENS = int(os.getenv("MAP_SECTION_TOKENS", "4000"))
+# Read the paper once: the summary is reduced from a cached map phase and novelty is derived from the
+# abstract, related work and those section summaries rather than a second pass over the raw paper
+NOVELTY_FROM_SUMMARIES = os.getenv("NOVELTY_FROM_SUMMARIES", "true").lower() in ("1", "true", "yes")
+SUMMARY_CACHE_TTL_DAYS = float(os.getenv("SUMMARY_CACHE_TTL_DAYS", "30"))
+
+_inflight_locks = {}
+_inflight_guard = threading.Lock()
 
 def load_llm():
-    load_dotenv()
-    return ChatOpenAI(
-        model=os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini"),
-        temperature=0.0,
-        api_key=os.getenv("OPENAI_API_KEY"),
-    )
+    return get_llm()
 
-def load_and_chunk_documents(pdf_path, chunk_size=2000, chunk_overlap=100):
-    loader = PyPDFLoader(pdf_path)
-    docs = loader.load_and_split()
+@traced("chunking", "summarizer")
+def chunk_documents(docs, chunk_size=2000, chunk_overlap=100):
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size, chunk_overlap=chunk_overlap
     )
     return splitter.split_documents(docs)
 
+def load_and_chunk_documents(pdf_path, chunk_size=2000, chunk_overlap=100):
+    with span("extract_text", "summarizer"):
+        loader = PyPDFLoader(pdf_path)
+        docs = loader.load_and_split()
+    return chunk_documents(docs, chunk_size, chunk_overlap)
+
 def get_prompt(template_text):
     return PromptTemplate(input_variables=["context"], template=template_text)
 
@@ -70,16 +94,175 @@ Use concise bullet points or a short paragraph for clarity
 Do not hallucinate — rely only on the paper's content.
 """
 
+novelty_from_summaries_template = """
+You're an expert in analyzing research papers.
+Below are the abstract of a paper, its related-work section (if it has one) and summaries of its sections.
+Using them, identify and clearly explain the paper's novelty — what makes this work new, original, or unique compared to prior work in the field.
+
+Input: {context}
+
+Output format:
+
+Clearly state the main novelty of the paper
+
+Briefly mention what has been done in previous work (if discussed)
+
+Highlight how this paper is different or improves upon existing methods
+
+Use concise bullet points or a short paragraph for clarity
+
+Do not hallucinate — rely only on the content provided.
+"""
+
+chunk_summary_template = """
+You're an expert in understanding and analysing research papers.
+The following text is one part of a longer research paper.
+Summarize it faithfully and concisely, keeping every concrete detail about:
+- The problem, objectives and claimed contributions
+- Methods, models and algorithms
+- Datasets, experimental setup and results (keep the numbers)
+- Comparisons with prior work, limitations and future work
+Do not add anything that is not in the text.
+
+Paper excerpt: {context}
+"""
+
+def count_tokens(llm, docs):
+    text = "\n\n".join(doc.page_content for doc in docs)
+    try:
+        return llm.get_num_tokens(text)
+    except Exception:
+        # Roughly 4 characters per token for English text
+        return len(text) // 4
+
 def run_stuff_chain(llm, docs, prompt):
     chain = create_stuff_documents_chain(
         llm=llm, prompt=prompt, document_variable_name="context"
     )
-    result = chain.invoke({"context": docs})
+    with span("llm_call", "summarizer", chain="stuff", documents=len(docs)):
+        result = chain.invoke({"context": docs}, config={"callbacks": [UsageCallbackHandler("summarizer")]})
     return result.strip()
 
-def analyze_paper(pdf_path):
-    llm = load_llm()
+def summarize_chunks(llm, docs, max_concurrency=MAP_MAX_CONCURRENCY):
+    """Map phase: summarizes every chunk independently, running up to max_concurrency calls at once."""
+    map_chain = get_prompt(chunk_summary_template) | llm | StrOutputParser()
+    with span("llm_call", "summarizer", chain="map", documents=len(docs)):
+        chunk_summaries = map_chain.batch(
+            [{"context": doc.page_content} for doc in docs],
+            config={"max_concurrency": max_concurrency, "callbacks": [UsageCallbackHandler("summarizer")]},
+        )
+    return [
+        Document(page_content=summary.strip(), metadata=doc.metadata)
+        for doc, summary in zip(docs, chunk_summaries)
+    ]
+
+def _group_by_tokens(llm, docs, token_limit):
+    groups, current_group, current_tokens = [], [], 0
+    for doc in docs:
+        doc_tokens = count_tokens(llm, [doc])
+        if current_group and current_tokens + doc_tokens > token_limit:
+            groups.append(current_group)
+            current_group, current_tokens = [], 0
+        current_group.append(doc)
+        current_tokens += doc_tokens
+    if current_group:
+        groups.append(current_group)
+    return groups
+
+def document_hash(llm, docs):
+    """Identifies a chunked document (and the model summarizing it) for caching."""
+    digest = hashlib.sha256(str(getattr(llm, "model_name", "")).encode("utf-8"))
+    for doc in docs:
+        digest.update(b"\x00" + doc.page_content.encode("utf-8"))
+    return digest.hexdigest()
+
+def _get_or_compute(key, compute):
+    """Returns the cached value for key, computing it at most once even when called concurrently."""
+    with _inflight_guard:
+        key_lock = _inflight_locks.setdefault(key, threading.Lock())
+    try:
+        with key_lock:
+            cache = get_cache("paper_summaries", SUMMARY_CACHE_TTL_DAYS * 24 * 3600)
+            value = cache.get(key)
+            if value is None:
+                value = compute()
+                cache.set(key, value)
+    finally:
+        # Also on failure, or the entry for this key would stay in _inflight_locks for good
+        with _inflight_guard:
+            _inflight_locks.pop(key, None)
+    return value
+
+def get_section_summaries(llm, docs, max_concurrency=MAP_MAX_CONCURRENCY):
+    """Map phase over ~MAP_SECTION_TOKENS sections, cached by document hash so summary and novelty share it."""
+    sections = [
+        Document(page_content="\n\n".join(doc.page_content for doc in group), metadata=group[0].metadata)
+        for group in _group_by_tokens(llm, docs, MAP_SECTION_TOKENS)
+    ]
+    summaries = _get_or_compute(
+        "sections:" + document_hash(llm, docs),
+        lambda: [doc.page_content for doc in summarize_chunks(llm, sections, max_concurrency)],
+    )
+    return [
+        Document(page_content=summary, metadata=section.metadata)
+        for section, summary in zip(sections, summaries)
+    ]
+
+def run_map_reduce_chain(llm, docs, prompt, token_limit=STUFF_TOKEN_LIMIT, max_concurrency=MAP_MAX_CONCURRENCY):
+    summaries = get_section_summaries(llm, docs, max_concurrency)
+    # Collapse until the combined summaries fit in one prompt; each pass shrinks the input
+    while len(summaries) > 1 and count_tokens(llm, summaries) > token_limit:
+        groups = _group_by_tokens(llm, summaries, token_limit)
+        if len(groups) == len(summaries):
+            break
+        summaries = summarize_chunks(
+            llm,
+            [Document(page_content="\n\n".join(doc.page_content for doc in group)) for group in groups],
+            max_concurrency,
+        )
+    return run_stuff_chain(llm, summaries, prompt)
+
+def run_chain(llm, docs, prompt, token_limit=STUFF_TOKEN_LIMIT):
+    """Stuffs short papers into one prompt and switches to map-reduce once they exceed token_limit."""
+    if count_tokens(llm, docs) <= token_limit:
+        return run_stuff_chain(llm, docs, prompt)
+    return run_map_reduce_chain(llm, docs, prompt, token_limit)
+
+def summarize_documents(llm, docs):
+    # Always map-reduce when novelty reuses the section summaries, so the paper is read only once
+    chain = run_map_reduce_chain if NOVELTY_FROM_SUMMARIES else run_chain
+    return _get_or_compute(
+        "summary:" + document_hash(llm, docs),
+        lambda: chain(llm, docs, get_prompt(summary_template)),
+    )
+
+def assess_novelty(llm, docs, paper_summary=None):
+    """Derives novelty from the abstract, related-work section and section summaries.
+
+    The section summaries come from the map phase summarize_documents shares, so the
+    raw paper is read once whatever its length; novelty runs alongside the summary's
+    reduce step instead of after it. A paper_summary passed in replaces them.
+    """
+    if not NOVELTY_FROM_SUMMARIES:
+        return run_chain(llm, docs, get_prompt(novelty_template))
+    if paper_summary:
+        section_summaries = [Document(page_content="Paper summary:\n" + paper_summary)]
+    else:
+        section_summaries = get_section_summaries(llm, docs)
+    document_text = "\n".join(doc.page_content for doc in docs)
+    context_docs = []
+    abstract, abstract_confidence = extract_abstract_locally(document_text[:12000])
+    if abstract_confidence >= LOCAL_ABSTRACT_MIN_CONFIDENCE:
+        context_docs.append(Document(page_content="Abstract:\n" + abstract))
+    related_work = extract_related_work_locally(document_text)
+    if related_work:
+        context_docs.append(Document(page_content="Related work section:\n" + related_work))
+    return run_stuff_chain(llm, context_docs + section_summaries, get_prompt(novelty_from_summaries_template))
+
+def analyze_paper(pdf_path, llm=None):
+    llm = llm or get_llm()
     docs = load_and_chunk_documents(pdf_path)
-    summary = run_stuff_chain(llm, docs, get_prompt(summary_template))
-    novelty = run_stuff_chain(llm, docs, get_prompt(novelty_template))
-    return summary, novelty
\ No newline at end of file
+    with ContextThreadPoolExecutor(max_workers=1) as executor:
+        novelty_future = executor.submit(assess_novelty, llm, docs)
+        summary = summarize_documents(llm, docs)
+        return summary, novelty_future.result()
@@ -1,13 +1,23 @@
 import re
 from langchain_community.document_loaders import PyPDFLoader
+from instrumentation import traced
+
+@traced("extract_text", "pdf_loader")
+def load_pdf_documents(file_path: str) -> list:
+    """Loads a PDF document and returns one LangChain Document per page."""
+    loader = PyPDFLoader(file_path)
+    documents = loader.load()
+    print(f"Successfully loaded {len(documents)} pages from {file_path}")
+    return documents
+
+def load_pdf_pages(file_path: str) -> list:
+    """Loads a PDF document and returns the text of each page."""
+    return [doc.page_content for doc in load_pdf_documents(file_path)]
 
 def load_pdf_content(file_path: str) -> str:
     """Loads a PDF document and returns its concatenated page content."""
     try:
-        loader = PyPDFLoader(file_path)
-        documents = loader.load()
-        print(f"Successfully loaded {len(documents)} pages from {file_path}")
-        return "".join([doc.page_content for doc in documents])
+        return "\n".join(load_pdf_pages(file_path))
     except FileNotFoundError:
         print(f"Error: The file '{file_path}' was not found.")
         return "ERROR: PDF file not found."
@@ -40,4 +50,21 @@ def process_tavily_result(tavily_result) -> str:
             return tavily_result[0]['content']
     elif isinstance(tavily_result, dict) and tavily_result.get("answer"):
         return tavily_result.get("answer")
-    return "ERROR: No usable summary found from web search."
\ No newline at end of file
+    return "ERROR: No usable summary found from web search."
+
+def arxiv_cache_key(arxiv_id: str) -> str:
+    """Cache key for an arXiv ID; versions of the same paper share one key."""
+    cleaned_id = clean_arxiv_id(arxiv_id)
+    if not cleaned_id:
+        return ""
+    return "arxiv:" + re.sub(r"v\d+$", "", cleaned_id)
+
+def _normalize_for_key(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", str(text or "").lower()))
+
+def reference_cache_key(title: str, authors: str) -> str:
+    """Cache key for a reference identified by its normalized title and authors."""
+    normalized_title = _normalize_for_key(title)
+    if not normalized_title:
+        return ""
+    return f"title:{normalized_title}|{_normalize_for_key(authors)}"
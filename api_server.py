@@ -0,0 +1,255 @@
+"""HTTP API for the CopyCatch detectors, for programmatic callers such as an LMS.
+
+    python api_server.py --comparison-dir corpus/ --port 8080
+
+Each endpoint takes the raw submission as the request body and returns JSON:
+
+    POST /paraphrase?filename=essay.pdf&chunk_size=800   paraphrase detection against the corpus
+    POST /semantic?filename=paper.pdf                     semantic similarity against the corpus
+    POST /citations?filename=paper.pdf                    citation verification
+    GET  /health
+    GET  /metrics                                         Prometheus metrics (see instrumentation.py)
+
+Clients and comparison indexes are built once at startup and shared by all requests.
+Identical requests that arrive while one is already running (same document hash,
+endpoint and settings) wait for that computation instead of starting their own.
+"""
+import os
+import json
+import shutil
+import argparse
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from instrumentation import render_prometheus
+from pipelines import PipelineRunner, get_file_hash
+from Paraphrase_Detector.paraphrase_processing import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE
+
+ENDPOINT_ANALYZERS = {
+    "/paraphrase": "paraphrase",
+    "/semantic": "semantic",
+    "/citations": "citations",
+}
+# Query parameters that change paraphrase results, with their accepted (inclusive) ranges;
+# each combination gets its own warm index
+PARAPHRASE_SETTING_RANGES = {
+    "chunk_size": (100, 4000),
+    "chunk_overlap": (0, 1000),
+    "min_content_length": (1, 1000),
+    "min_word_count": (1, 200),
+    "batch_size": (1, 50),
+}
+# Warm runners kept for non-default paraphrase settings; the least recently used is dropped
+MAX_CACHED_RUNNERS = int(os.getenv("COPYCATCH_API_MAX_RUNNERS", "8"))
+MAX_UPLOAD_BYTES = int(os.getenv("COPYCATCH_API_MAX_UPLOAD_MB", "50")) * 1024 * 1024
+DEFAULT_PORT = 8080
+
+
+class RequestCoalescer:
+    """Runs one computation per key at a time; concurrent callers with the same key share its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def run(self, key, compute):
+        with self._lock:
+            future = self._in_flight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._in_flight[key] = future
+        if not is_owner:
+            return future.result()
+        try:
+            future.set_result(compute())
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result()
+
+
+class DetectorService:
+    """Shared state behind the HTTP handlers: one warm PipelineRunner per settings combination."""
+
+    def __init__(self, comparison_dir=None, max_workers=4):
+        self.comparison_dir = comparison_dir
+        self.max_workers = max_workers
+        self.output_dir = tempfile.mkdtemp(prefix="copycatch_api_")
+        self.coalescer = RequestCoalescer()
+        self._default_runner = self._make_runner({})
+        self._runners = OrderedDict()
+        self._runners_lock = threading.Lock()
+
+    def _make_runner(self, settings):
+        return PipelineRunner(
+            comparison_dir=self.comparison_dir,
+            output_dir=self.output_dir,
+            max_workers=self.max_workers,
+            paraphrase_settings=settings,
+        )
+
+    def get_runner(self, settings):
+        if not settings:
+            return self._default_runner
+        key = tuple(sorted(settings.items()))
+        with self._runners_lock:
+            if key in self._runners:
+                self._runners.move_to_end(key)
+            else:
+                self._runners[key] = self._make_runner(settings)
+                # Only paraphrase settings reach here, so an evicted runner holds nothing but its
+                # comparison index; requests still using it keep their own reference
+                while len(self._runners) > max(0, MAX_CACHED_RUNNERS):
+                    self._runners.popitem(last=False)
+            return self._runners[key]
+
+    def warm_up(self):
+        self.get_runner({}).warm_up(
+            list(ENDPOINT_ANALYZERS.values()) if self.comparison_dir else ["citations"]
+        )
+
+    def analyze(self, analyzer, content, filename, settings):
+        document_hash = get_file_hash(content)
+        key = (analyzer, document_hash, tuple(sorted(settings.items())))
+
+        def compute():
+            # The analyzers read files; the original name keeps the file type and self-match exclusion working
+            upload_dir = tempfile.mkdtemp(prefix="copycatch_upload_")
+            path = os.path.join(upload_dir, filename)
+            try:
+                with open(path, "wb") as f:
+                    f.write(content)
+                return self.get_runner(settings).run(analyzer, path)
+            finally:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+
+        return {"sha256": document_hash, "analyzer": analyzer, "result": self.coalescer.run(key, compute)}
+
+    def close(self):
+        self._default_runner.close()
+        with self._runners_lock:
+            for runner in self._runners.values():
+                runner.close()
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+
+def parse_settings(analyzer, query):
+    """Returns the request's paraphrase settings; raises ValueError with a client-facing message."""
+    if analyzer != "paraphrase":
+        return {}
+    settings = {}
+    for name, (low, high) in PARAPHRASE_SETTING_RANGES.items():
+        if name not in query:
+            continue
+        try:
+            value = int(query[name][0])
+        except ValueError:
+            raise ValueError(f"{name} must be an integer.")
+        if not low <= value <= high:
+            raise ValueError(f"{name} must be between {low} and {high}.")
+        settings[name] = value
+    if settings.get("chunk_overlap", DEFAULT_CHUNK_OVERLAP) >= settings.get("chunk_size", DEFAULT_CHUNK_SIZE):
+        raise ValueError("chunk_overlap must be smaller than chunk_size.")
+    return settings
+
+
+class DetectorRequestHandler(BaseHTTPRequestHandler):
+    service = None  # set by make_server
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            self._send_json(200, {"status": "ok", "endpoints": sorted(ENDPOINT_ANALYZERS)})
+        elif path == "/metrics":
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {"error": "Not found."})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        analyzer = ENDPOINT_ANALYZERS.get(url.path)
+        if analyzer is None:
+            self._send_json(404, {"error": "Not found."})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            self._send_json(400, {"error": "Send the document as the request body."})
+            return
+        if length > MAX_UPLOAD_BYTES:
+            self._send_json(413, {"error": f"Documents are limited to {MAX_UPLOAD_BYTES // (1024 * 1024)} MB."})
+            return
+        query = parse_qs(url.query)
+        filename = os.path.basename(query.get("filename", ["submission.pdf"])[0]) or "submission.pdf"
+        if not filename.lower().endswith((".pdf", ".txt")):
+            self._send_json(400, {"error": "filename must end in .pdf or .txt."})
+            return
+        if analyzer != "paraphrase" and not filename.lower().endswith(".pdf"):
+            self._send_json(400, {"error": f"The {analyzer} endpoint only accepts PDFs."})
+            return
+        if analyzer in ("paraphrase", "semantic") and not self.service.comparison_dir:
+            self._send_json(400, {"error": "The server was started without --comparison-dir."})
+            return
+        try:
+            settings = parse_settings(analyzer, query)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        content = self.rfile.read(length)
+        try:
+            self._send_json(200, self.service.analyze(analyzer, content, filename, settings))
+        except Exception as e:
+            self.log_error("%s failed: %s", analyzer, e)
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+
+def make_server(service, host="127.0.0.1", port=DEFAULT_PORT):
+    handler = type("BoundDetectorRequestHandler", (DetectorRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the CopyCatch detectors over HTTP.")
+    parser.add_argument("--comparison-dir", help="Corpus for the paraphrase and semantic endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-workers", type=int, default=4, help="Parallel LLM calls per request")
+    args = parser.parse_args(argv)
+
+    service = DetectorService(comparison_dir=args.comparison_dir, max_workers=args.max_workers)
+    print("Loading clients and comparison indexes...")
+    service.warm_up()
+    server = make_server(service, args.host, args.port)
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
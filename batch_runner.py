@@ -0,0 +1,201 @@
+"""Run CopyCatch analyzers over many submissions without the UI.
+
+    python batch_runner.py submissions/ --analyzers summary,citations,paraphrase \
+        --comparison-dir corpus/ --output batch_results --max-workers 8
+
+Inputs are a directory of PDFs or a manifest (one path per line, or JSON lines with a
+"path" key). Every finished (submission, analyzer) pair is appended to
+<output>/results.jsonl as soon as it completes, so an interrupted run resumes where
+it stopped when started again with the same output directory.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pipelines import ANALYZERS, COMPARISON_ANALYZERS, PipelineRunner, get_file_hash
+from usage_tracking import MAX_REQUESTS_PER_RUN, MAX_TOKENS_PER_RUN
+
+RESULTS_FILENAME = "results.jsonl"
+DEFAULT_ANALYZERS = ("summary", "citations")
+DEFAULT_MAX_WORKERS = 4
+
+
+def read_submissions(input_path):
+    """Returns submission file paths from a directory or a manifest file."""
+    if os.path.isdir(input_path):
+        return sorted(
+            os.path.join(input_path, name)
+            for name in os.listdir(input_path)
+            if name.lower().endswith(".pdf")
+        )
+    manifest_dir = os.path.dirname(os.path.abspath(input_path))
+    submissions = []
+    with open(input_path, "r", encoding="utf-8") as manifest:
+        for line in manifest:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            path = json.loads(line)["path"] if line.startswith("{") else line
+            # Relative manifest entries are relative to the manifest itself
+            submissions.append(path if os.path.isabs(path) else os.path.join(manifest_dir, path))
+    return submissions
+
+
+def load_checkpoint(results_path):
+    """Returns {(file hash, analyzer)} for every pair that already completed successfully."""
+    completed = set()
+    if not os.path.exists(results_path):
+        return completed
+    with open(results_path, "r", encoding="utf-8") as results_file:
+        for line in results_file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run; that pair is simply redone
+                continue
+            if record.get("status") == "ok":
+                completed.add((record["sha256"], record["analyzer"]))
+    return completed
+
+
+def _ends_mid_line(path):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return False
+    with open(path, "rb") as existing:
+        existing.seek(-1, os.SEEK_END)
+        return existing.read(1) != b"\n"
+
+
+class ResultWriter:
+    """Appends one JSON line per result and flushes it to disk before returning."""
+
+    def __init__(self, results_path):
+        self._lock = threading.Lock()
+        needs_newline = _ends_mid_line(results_path)
+        self._file = open(results_path, "a", encoding="utf-8")
+        if needs_newline:
+            # Terminate a line an interrupted run left cut short, so the next record starts
+            # on its own line instead of being glued onto (and lost with) the fragment
+            self._file.write("\n")
+            self._file.flush()
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def run_one(runner, writer, submission, file_hash, analyzer):
+    started = time.time()
+    record = {"submission": submission, "sha256": file_hash, "analyzer": analyzer}
+    try:
+        result = runner.run(analyzer, submission)
+        if isinstance(result, dict) and result.get("error"):
+            record.update(status="error", error=result["error"], result=result)
+        else:
+            record.update(status="ok", result=result)
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    record["elapsed_seconds"] = round(time.time() - started, 3)
+    writer.write(record)
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run CopyCatch analyzers over a batch of submissions.")
+    parser.add_argument("input", help="Directory of PDFs, or a manifest file listing submission paths")
+    parser.add_argument(
+        "--analyzers",
+        default=",".join(DEFAULT_ANALYZERS),
+        help=f"Comma-separated analyzers to run (available: {', '.join(ANALYZERS)})",
+    )
+    parser.add_argument("--comparison-dir", help="Directory of papers to compare against (paraphrase, semantic)")
+    parser.add_argument("--output", default="batch_results", help="Directory for results.jsonl and reports")
+    parser.add_argument(
+        "--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help="Analyzer runs in flight at once"
+    )
+    parser.add_argument(
+        "--token-budget", type=int, default=MAX_TOKENS_PER_RUN, help="Max LLM tokens per analyzer run"
+    )
+    parser.add_argument(
+        "--request-budget", type=int, default=MAX_REQUESTS_PER_RUN, help="Max LLM calls per analyzer run"
+    )
+    args = parser.parse_args(argv)
+
+    analyzers = [name.strip() for name in args.analyzers.split(",") if name.strip()]
+    unknown = [name for name in analyzers if name not in ANALYZERS]
+    if unknown:
+        parser.error(f"unknown analyzer(s): {', '.join(unknown)}")
+    if any(name in COMPARISON_ANALYZERS for name in analyzers) and not args.comparison_dir:
+        parser.error("--comparison-dir is required for the paraphrase and semantic analyzers")
+
+    submissions = read_submissions(args.input)
+    if not submissions:
+        print(f"No submissions found in {args.input}")
+        return 1
+
+    os.makedirs(args.output, exist_ok=True)
+    results_path = os.path.join(args.output, RESULTS_FILENAME)
+    completed = load_checkpoint(results_path)
+
+    pending = []
+    for submission in submissions:
+        try:
+            with open(submission, "rb") as f:
+                file_hash = get_file_hash(f.read())
+        except OSError as e:
+            print(f"Skipping {submission}: {e}")
+            continue
+        for analyzer in analyzers:
+            if (file_hash, analyzer) not in completed:
+                pending.append((submission, file_hash, analyzer))
+    skipped = len(submissions) * len(analyzers) - len(pending)
+    print(f"{len(pending)} analyzer runs to do ({skipped} already done or skipped)")
+
+    runner = PipelineRunner(
+        comparison_dir=args.comparison_dir,
+        output_dir=args.output,
+        max_workers=args.max_workers,
+        token_budget=args.token_budget,
+        request_budget=args.request_budget,
+    )
+    writer = ResultWriter(results_path)
+    failures = 0
+    total_tokens = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.max_workers)) as executor:
+            futures = [
+                executor.submit(run_one, runner, writer, submission, file_hash, analyzer)
+                for submission, file_hash, analyzer in pending
+            ]
+            for done_count, future in enumerate(as_completed(futures), start=1):
+                record = future.result()
+                if record["status"] != "ok":
+                    failures += 1
+                tokens = ((record.get("result") or {}).get("usage") or {}).get("total_tokens", 0)
+                total_tokens += tokens
+                print(
+                    f"[{done_count}/{len(pending)}] {record['analyzer']} {os.path.basename(record['submission'])}: "
+                    f"{record['status']} in {record['elapsed_seconds']:.1f}s, {tokens} tokens"
+                )
+    finally:
+        writer.close()
+        runner.close()
+    print(
+        f"Done: {len(pending) - failures} succeeded, {failures} failed, {total_tokens} LLM tokens used. "
+        f"Results in {results_path}"
+    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Synthetic research-paper PDFs for benchmarking.
+
+Papers have a title, an abstract, numbered sections and a numbered reference list
+(some entries with arXiv IDs), which is what the extractors look for. The reference
+list starts on a new page, as in most papers, so page joining is exercised too. A share of
+each comparison paper's paragraphs are reworded copies of the source paper's, so
+the paraphrase detector has real matches to find. Everything is derived from the
+seed, so the same arguments always produce byte-identical text.
+"""
+import os
+import random
+
+import fitz  # PyMuPDF
+
+SECTION_TITLES = ("Introduction", "Related Work", "Method", "Experiments", "Results", "Discussion", "Conclusion")
+VOCABULARY = (
+    "model retrieval document corpus embedding index vector query latency recall precision "
+    "chunk section citation evaluation baseline dataset training inference benchmark method "
+    "approach result analysis performance accuracy system pipeline feature representation "
+    "semantic similarity transformer attention layer parameter experiment metric score "
+    "distribution sample threshold signal noise robustness scale memory throughput"
+).split()
+CONNECTIVES = ("we show that", "in contrast", "as a result", "moreover", "notably", "in practice", "overall")
+# Rewordings applied when a paragraph is copied into a comparison paper
+SYNONYMS = {
+    "model": "system",
+    "retrieval": "search",
+    "document": "text",
+    "improves": "raises",
+    "method": "technique",
+    "result": "outcome",
+    "performance": "effectiveness",
+    "we show that": "our experiments indicate that",
+    "moreover": "furthermore",
+}
+SURNAMES = ("Smith", "Chen", "Garcia", "Kumar", "Moreau", "Okafor", "Rossi", "Tanaka", "Novak", "Silva")
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 56
+FONT_SIZE = 10
+LINE_HEIGHT = 13
+CHARS_PER_LINE = 95
+
+
+def _sentence(rng):
+    words = rng.sample(VOCABULARY, rng.randint(8, 18))
+    if rng.random() < 0.4:
+        words.insert(0, rng.choice(CONNECTIVES))
+    sentence = " ".join(words)
+    return sentence[0].upper() + sentence[1:] + "."
+
+
+def _paragraph(rng):
+    return " ".join(_sentence(rng) for _ in range(rng.randint(4, 8)))
+
+
+def reword(paragraph):
+    for original, replacement in SYNONYMS.items():
+        paragraph = paragraph.replace(original, replacement)
+    return paragraph
+
+
+def _reference(rng, number):
+    authors = ", ".join(f"{rng.choice('ABCDEFGHJKLMNPRS')}. {rng.choice(SURNAMES)}" for _ in range(rng.randint(1, 3)))
+    title = " ".join(rng.sample(VOCABULARY, rng.randint(4, 8))).capitalize()
+    year = rng.randint(2015, 2024)
+    if rng.random() < 0.5:
+        arxiv_id = f"{year % 100:02d}{rng.randint(1, 12):02d}.{rng.randint(1, 29999):05d}"
+        return f"[{number}] {authors}. {title}. arXiv:{arxiv_id}, {year}."
+    return f"[{number}] {authors}. {title}. In Proceedings of the Conference on {rng.choice(VOCABULARY).capitalize()}, {year}."
+
+
+def make_paper(rng, title, paragraphs_per_section=3, n_references=20, borrowed_paragraphs=None, borrow_rate=0.0):
+    """Returns the paper as a list of (kind, text) blocks; kind is "title", "heading", "body" or "page_break"."""
+    borrowed_paragraphs = list(borrowed_paragraphs or [])
+    blocks = [("title", title), ("heading", "Abstract"), ("body", _paragraph(rng))]
+    for number, section_title in enumerate(SECTION_TITLES, start=1):
+        blocks.append(("heading", f"{number}. {section_title}"))
+        for _ in range(paragraphs_per_section):
+            if borrowed_paragraphs and rng.random() < borrow_rate:
+                blocks.append(("body", reword(borrowed_paragraphs.pop(rng.randrange(len(borrowed_paragraphs))))))
+            else:
+                blocks.append(("body", _paragraph(rng)))
+    blocks.append(("page_break", ""))
+    blocks.append(("heading", "References"))
+    blocks.extend(("body", _reference(rng, number)) for number in range(1, n_references + 1))
+    return blocks
+
+
+def _wrap(text, width=CHARS_PER_LINE):
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def write_pdf(path, blocks):
+    doc = fitz.open()
+    page, y = None, PAGE_HEIGHT
+    for kind, text in blocks:
+        if kind == "page_break":
+            page, y = None, PAGE_HEIGHT
+            continue
+        font_size = FONT_SIZE + (6 if kind == "title" else 2 if kind == "heading" else 0)
+        lines = _wrap(text, CHARS_PER_LINE if kind == "body" else 60) + [""]
+        for line in lines:
+            if page is None or y > PAGE_HEIGHT - MARGIN:
+                page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+                y = MARGIN
+            if line:
+                page.insert_text((MARGIN, y), line, fontsize=font_size)
+            y += LINE_HEIGHT + (font_size - FONT_SIZE)
+    doc.save(path)
+    doc.close()
+
+
+def generate_corpus(output_dir, n_comparison, seed=0, paragraphs_per_section=3, n_references=20, borrow_rate=0.3):
+    """Writes source.pdf and n_comparison comparison papers; returns (source path, comparison dir, comparison paths)."""
+    rng = random.Random(seed)
+    comparison_dir = os.path.join(output_dir, "comparison")
+    os.makedirs(comparison_dir, exist_ok=True)
+    source_blocks = make_paper(rng, f"Source Paper {seed}", paragraphs_per_section, n_references)
+    source_path = os.path.join(output_dir, "source.pdf")
+    write_pdf(source_path, source_blocks)
+    source_paragraphs = [text for kind, text in source_blocks if kind == "body" and not text.startswith("[")]
+    comparison_paths = []
+    for index in range(n_comparison):
+        blocks = make_paper(
+            rng,
+            f"Comparison Paper {seed}-{index}",
+            paragraphs_per_section,
+            n_references,
+            borrowed_paragraphs=source_paragraphs,
+            borrow_rate=borrow_rate,
+        )
+        path = os.path.join(comparison_dir, f"comparison_{index:03d}.pdf")
+        write_pdf(path, blocks)
+        comparison_paths.append(path)
+    return source_path, comparison_dir, comparison_paths
@@ -0,0 +1,256 @@
+"""Deterministic stand-ins for the OpenAI chat/embedding clients and the lookup tools.
+
+Responses are recorded per prompt type (matched by a marker phrase from each prompt
+template) and latencies are drawn from a log-normal distribution seeded by the
+prompt, so a benchmark run is repeatable regardless of thread scheduling.
+"""
+import re
+import json
+import math
+import time
+import random
+import hashlib
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field
+
+EMBEDDING_DIMENSIONS = 256
+# Latencies are capped at this multiple of the median so one unlucky draw can't dominate a run
+MAX_LATENCY_MULTIPLE = 10.0
+
+
+def _seeded_rng(seed, text):
+    return random.Random(f"{seed}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}")
+
+
+def sample_latency(seed, text, median_seconds, sigma):
+    """Log-normal latency for ``text``; the same inputs always give the same latency."""
+    if median_seconds <= 0:
+        return 0.0
+    latency = _seeded_rng(seed, text).lognormvariate(math.log(median_seconds), sigma)
+    return min(latency, median_seconds * MAX_LATENCY_MULTIPLE)
+
+
+def _estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _word_set(text):
+    return set(re.findall(r"[a-z]+", text.lower()))
+
+
+def _respond_paraphrase(prompt):
+    source = re.search(r"SOURCE: (.*?)\nCOMPARISON:", prompt, re.DOTALL)
+    comparison = re.search(r"COMPARISON: (.*?)\n\nIf similar", prompt, re.DOTALL)
+    source_words = _word_set(source.group(1)) if source else set()
+    comparison_words = _word_set(comparison.group(1)) if comparison else set()
+    union = source_words | comparison_words
+    overlap = len(source_words & comparison_words) / len(union) if union else 0.0
+    if overlap > 0.3:
+        return "MATCH: YES | REASON: Same claims restated with substituted terminology."
+    return "MATCH: NO"
+
+
+def _respond_paper_analysis(prompt):
+    text = prompt.split("Paper Text:", 1)[-1].strip()
+    title = text.splitlines()[0][:120] if text else "Untitled"
+    return json.dumps(
+        {
+            "title": title,
+            "primary_research_question": "How can retrieval quality be improved for long documents?",
+            "methodology_summary": "A controlled comparison of indexing strategies on synthetic corpora.",
+            "key_findings": ["Chunked indexing improves recall.", "Latency grows linearly with corpus size."],
+            "main_contributions": ["A benchmark of indexing strategies."],
+            "limitations": ["Synthetic data only."],
+            "future_work": ["Evaluate on real corpora."],
+            "technical_domain": ["Information retrieval", "Natural language processing"],
+            "core_concepts": ["embeddings", "vector search", "chunking"],
+        }
+    )
+
+
+def _respond_comparison(prompt):
+    return json.dumps(
+        {
+            "research_question_alignment": 0.7,
+            "methodology_alignment": 0.6,
+            "findings_alignment": 0.5,
+            "domain_relevance": 0.8,
+            "conceptual_overlap": 0.65,
+            "citation_network_overlap": 0.4,
+            "final_similarity_score": 3.2,
+            "reasoning": "Both papers study retrieval over chunked documents with similar methods.",
+        }
+    )
+
+
+def _respond_insights(prompt):
+    return json.dumps(
+        {
+            "summary": "Placeholder.",
+            "methodology_overview": "Placeholder.",
+            "key_insights": [
+                "Most comparison papers share the target's retrieval focus.",
+                "Methodological overlap is moderate across the corpus.",
+            ],
+        }
+    )
+
+
+def _respond_references_section(prompt):
+    # Only search the document between the "---" fences: the instructions list "References" too.
+    # The heading may be glued to the preceding text, so it needn't be on a line of its own.
+    document = prompt.split("---", 1)[-1].rsplit("---", 1)[0]
+    headings = list(re.finditer(r"\bReferences\b", document))
+    if not headings:
+        return "REFERENCES_NOT_FOUND"
+    return document[headings[-1].end() :].strip()
+
+
+def _respond_parse_references(prompt):
+    raw = prompt.split("Raw References Text:", 1)[-1]
+    entries = []
+    for entry in re.findall(r"\[\d+\]\s*(.*?)(?=\[\d+\]|\n\s*---|$)", raw, re.DOTALL):
+        entry = " ".join(entry.split())
+        # Entries look like "A. Author, B. Author. Title. Venue, year."
+        parts = re.match(r"((?:[A-Z]\. [^\s,.]+(?:, )?)+)\.\s+(.+?)\.\s", entry)
+        arxiv_match = re.search(r"arXiv:(\d{4}\.\d{4,5})", entry)
+        entries.append(
+            {
+                "title": parts.group(2) if parts else entry,
+                "arxiv_id": arxiv_match.group(1) if arxiv_match else None,
+                "authors": parts.group(1) if parts else "",
+                "entire_citation": entry,
+            }
+        )
+    return json.dumps(entries)
+
+
+def _evaluation(index=None):
+    evaluation = {
+        "evaluation": "good",
+        "confidence": 0.8,
+        "reasoning": "The cited work addresses the same retrieval problem.",
+        "relevance_score": 0.75,
+        "relationship_type": "methodological",
+    }
+    if index is not None:
+        evaluation["index"] = index
+    return evaluation
+
+
+def _respond_batch_evaluation(prompt):
+    count = len(re.findall(r"CITED PAPER TITLE:", prompt))
+    return json.dumps([_evaluation(index) for index in range(1, count + 1)])
+
+
+# (marker phrase from the prompt template, response text or callable(prompt) -> text), first match wins
+RECORDED_RESPONSES = [
+    ("If similar/paraphrased, respond: MATCH: YES", _respond_paraphrase),
+    ("extract structured information from a research paper", _respond_paper_analysis),
+    ("semantic similarity analysis between research papers", _respond_comparison),
+    ("generate a list of concise and actionable key insights", _respond_insights),
+    (
+        "generating concise executive summaries",
+        "The target paper overlaps moderately with the comparison corpus, chiefly in methodology.",
+    ),
+    (
+        "extracting the abstract from a research paper",
+        "We study retrieval over long documents and compare indexing strategies on synthetic corpora.",
+    ),
+    ("extracting the References or Bibliography section", _respond_references_section),
+    ("parsing a list of academic paper references", _respond_parse_references),
+    ("Evaluate the relevance of each CITED PAPER", _respond_batch_evaluation),
+    ("Evaluate the relevance of a CITED PAPER", lambda prompt: json.dumps(_evaluation())),
+]
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers from RECORDED_RESPONSES after a simulated network latency."""
+
+    latency_median: float = 0.05
+    latency_sigma: float = 0.5
+    seed: int = 0
+    responses: List[Any] = Field(default_factory=lambda: list(RECORDED_RESPONSES))
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-recorded-chat"
+
+    def _respond(self, prompt):
+        for marker, response in self.responses:
+            if marker in prompt:
+                return response(prompt) if callable(response) else response
+        return "OK"
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        time.sleep(sample_latency(self.seed, prompt, self.latency_median, self.latency_sigma))
+        content = self._respond(prompt)
+        prompt_tokens, completion_tokens = _estimate_tokens(prompt), _estimate_tokens(content)
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+            response_metadata={
+                "token_usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+                "model_name": self._llm_type,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class FakeEmbeddings(Embeddings):
+    """Hashed bag-of-words embeddings: texts sharing words get similar vectors, so vector search behaves realistically."""
+
+    def __init__(self, latency_median=0.02, latency_sigma=0.3, seed=0, dimensions=EMBEDDING_DIMENSIONS):
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.seed = seed
+        self.dimensions = dimensions
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in re.findall(r"[a-z]+", text.lower()):
+            bucket = int.from_bytes(hashlib.md5(word.encode("utf-8")).digest()[:4], "little")
+            vector[bucket % self.dimensions] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # One simulated request per batch, as with the real client
+        time.sleep(sample_latency(self.seed, "\n".join(texts), self.latency_median, self.latency_sigma))
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(sample_latency(self.seed, text, self.latency_median, self.latency_sigma))
+        return self._embed(text)
+
+
+class FakeLookupTool:
+    """Stand-in for the ArxivSearch/WebSearch tools: same ``name``/``func`` surface, canned summaries."""
+
+    def __init__(self, name, latency_median=0.2, latency_sigma=0.6, seed=0):
+        self.name = name
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.seed = seed
+
+    def func(self, query):
+        time.sleep(sample_latency(self.seed, f"{self.name}:{query}", self.latency_median, self.latency_sigma))
+        return (
+            f"Summary for {query}: this work studies retrieval over long documents, "
+            "comparing chunking and indexing strategies and reporting recall and latency."
+        )
@@ -0,0 +1,297 @@
+"""Benchmark the CopyCatch pipelines offline with recorded LLM/embedding stand-ins.
+
+    python benchmarks/run_benchmarks.py --sizes 2,8,32 --repeats 3 --output bench.json
+    python benchmarks/run_benchmarks.py --sizes 2,8,32 --baseline bench.json
+
+For each corpus size (number of comparison papers) a synthetic corpus is generated
+and every stage is timed, reporting p50/p95 latency, throughput and peak Python
+memory (tracemalloc). A stage that handles no items (no text, no chunks, no
+references...) aborts the run, since its timings would not measure anything. No network access is needed: the chat model, embeddings and
+arXiv/web lookups are the deterministic fakes in fakes.py, so differences between
+two runs of the same arguments come from the code, not the services.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARK_DIR)
+SUMMARY_APP_DIR = os.path.join(ROOT_DIR, "Summary_Novelty_CitaionVerfication")
+for path in (ROOT_DIR, SUMMARY_APP_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# The modules read these at import time: keep every cache in a throwaway location and
+# make sure nothing reaches the real arXiv/Tavily/OpenAI services
+WORK_DIR = tempfile.mkdtemp(prefix="copycatch_bench_")
+os.environ["COPYCATCH_CACHE_PATH"] = os.path.join(WORK_DIR, "cache.sqlite3")
+os.environ["ARXIV_OFFLINE"] = "1"
+os.environ["ARXIV_INDEX_PATH"] = ""
+os.environ.pop("TAVILY_API_KEY", None)
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-fake-key")
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from corpus import generate_corpus
+from fakes import FakeChatModel, FakeEmbeddings, FakeLookupTool
+from modules.citation_verifier import verify_citations
+from modules.llm_tools import get_llm_and_tools as build_llm_and_tools
+from Semantic_similarity.orchestrator import AgenticResearchPaperAnalyzer
+from Paraphrase_Detector.paraphrase_processing import (
+    DEFAULT_BATCH_SIZE_PARAPHRASE,
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_MAX_WORKERS_PARAPHRASE,
+    DEFAULT_MIN_CONTENT_LENGTH,
+    DEFAULT_MIN_WORD_COUNT,
+    chunk_text_by_sections,
+    detect_paraphrased_sections_processing,
+    extract_text_from_file,
+    load_comparison_docs_for_paraphrase,
+)
+from pipelines import get_file_hash
+
+# stage name -> unit its throughput is reported in
+STAGES = {
+    "extract_text_from_file": "docs",
+    "chunk_text_by_sections": "docs",
+    "load_comparison_docs_for_paraphrase": "docs",
+    "detect_paraphrased_sections_processing": "chunks",
+    "analyze_papers_from_pdfs": "comparisons",
+    "verify_citations": "refs",
+}
+DEFAULT_SIZES = "2,8,32"
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def measure(func, *args, **kwargs):
+    """Returns (result, seconds, peak bytes allocated above the starting level)."""
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    return result, elapsed, max(0, peak - baseline)
+
+
+class EmptyStageError(RuntimeError):
+    """A stage handled no items, so its timings don't measure the work the benchmark is about."""
+
+
+class StageSamples:
+    def __init__(self):
+        self.seconds = []
+        self.items = 0
+        self.peak_bytes = 0
+
+    def add(self, stage, seconds, items, peak_bytes):
+        if not items:
+            raise EmptyStageError(f"{stage} handled no {STAGES[stage]}; fix the corpus or fakes before trusting timings")
+        self.seconds.append(seconds)
+        self.items += items
+        self.peak_bytes = max(self.peak_bytes, peak_bytes)
+
+    def summary(self):
+        total_seconds = sum(self.seconds)
+        return {
+            "runs": len(self.seconds),
+            "p50_seconds": percentile(self.seconds, 0.5),
+            "p95_seconds": percentile(self.seconds, 0.95),
+            "throughput_per_second": self.items / total_seconds if total_seconds else 0.0,
+            "peak_memory_mb": self.peak_bytes / (1024 * 1024),
+        }
+
+
+def build_citation_tools(llm, args):
+    # The real extraction/parsing/evaluation tools around the fake LLM; lookups are faked
+    _, tools = build_llm_and_tools(llm=llm)
+    tools = [tool for tool in tools if tool.name not in ("ArxivSearch", "WebSearch")]
+    for name in ("ArxivSearch", "WebSearch"):
+        tools.append(FakeLookupTool(name, latency_median=args.lookup_latency_ms / 1000, seed=args.seed))
+    return tools
+
+
+def benchmark_size(size, args, llm, embeddings, citation_tools):
+    samples = {stage: StageSamples() for stage in STAGES}
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        chunk_overlap=DEFAULT_CHUNK_OVERLAP,
+        length_function=len,
+        separators=["\n\n", "\n", ". ", " ", ""],
+    )
+    for repeat in range(args.repeats):
+        # A fresh corpus per repeat, so reference and summary caches never turn a repeat into a warm run
+        corpus_dir = os.path.join(WORK_DIR, f"size_{size}_repeat_{repeat}")
+        source_path, comparison_dir, comparison_paths = generate_corpus(
+            corpus_dir, size, seed=args.seed * 1000 + repeat, n_references=args.references
+        )
+
+        source_documents = []
+        for path in [source_path] + comparison_paths:
+            with open(path, "rb") as f:
+                content = f.read()
+            text, seconds, peak = measure(
+                extract_text_from_file, content, "pdf", DEFAULT_MIN_CONTENT_LENGTH, DEFAULT_MIN_WORD_COUNT
+            )
+            samples["extract_text_from_file"].add("extract_text_from_file", seconds, 1 if text else 0, peak)
+            documents, seconds, peak = measure(
+                chunk_text_by_sections,
+                text,
+                get_file_hash(content),
+                text_splitter,
+                DEFAULT_MIN_CONTENT_LENGTH,
+                DEFAULT_MIN_WORD_COUNT,
+            )
+            samples["chunk_text_by_sections"].add("chunk_text_by_sections", seconds, 1 if documents else 0, peak)
+            if path == source_path:
+                source_documents = documents
+
+        stores, seconds, peak = measure(
+            load_comparison_docs_for_paraphrase,
+            comparison_dir,
+            text_splitter,
+            embeddings,
+            get_file_hash,
+            DEFAULT_MIN_CONTENT_LENGTH,
+            DEFAULT_MIN_WORD_COUNT,
+        )
+        loaded = sum(1 for store in stores.values() if store is not None)
+        samples["load_comparison_docs_for_paraphrase"].add("load_comparison_docs_for_paraphrase", seconds, loaded, peak)
+
+        _, seconds, peak = measure(
+            detect_paraphrased_sections_processing,
+            source_documents,
+            stores,
+            llm,
+            DEFAULT_MIN_CONTENT_LENGTH,
+            DEFAULT_MIN_WORD_COUNT,
+            DEFAULT_BATCH_SIZE_PARAPHRASE,
+            args.max_workers,
+            embeddings_model=embeddings,
+        )
+        samples["detect_paraphrased_sections_processing"].add(
+            "detect_paraphrased_sections_processing", seconds, len(source_documents), peak
+        )
+
+        analyzer = AgenticResearchPaperAnalyzer(llm_client=llm, embeddings_model_client=embeddings)
+        try:
+            semantic_results, seconds, peak = measure(
+                analyzer.analyze_papers_from_pdfs,
+                source_path,
+                comparison_paths,
+                output_dir=os.path.join(corpus_dir, "semantic_output"),
+            )
+            _, valid_comparisons = analyzer._get_valid_report_inputs(semantic_results)
+        finally:
+            analyzer.close()
+        samples["analyze_papers_from_pdfs"].add("analyze_papers_from_pdfs", seconds, len(valid_comparisons), peak)
+
+        result, seconds, peak = measure(verify_citations, source_path, llm=llm, tools=citation_tools)
+        evaluated = sum(
+            1
+            for ref in result.get("enhanced_references", [])
+            if ref.get("citation_evaluation", {}).get("evaluation") not in (None, "unable_to_evaluate")
+        )
+        samples["verify_citations"].add("verify_citations", seconds, evaluated, peak)
+
+        shutil.rmtree(corpus_dir, ignore_errors=True)
+    return {stage: stage_samples.summary() for stage, stage_samples in samples.items()}
+
+
+def print_report(results):
+    header = f"{'stage':<40} {'size':>5} {'runs':>5} {'p50 s':>9} {'p95 s':>9} {'throughput':>16} {'peak MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for size, stages in results.items():
+        for stage, stats in stages.items():
+            throughput = f"{stats['throughput_per_second']:.2f} {STAGES[stage]}/s"
+            print(
+                f"{stage:<40} {size:>5} {stats['runs']:>5} {stats['p50_seconds']:>9.3f} "
+                f"{stats['p95_seconds']:>9.3f} {throughput:>16} {stats['peak_memory_mb']:>9.1f}"
+            )
+
+
+def compare_to_baseline(results, baseline_path, threshold):
+    """Prints stages whose p50 latency grew by more than ``threshold``; returns how many did."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = 0
+    for size, stages in results.items():
+        for stage, stats in stages.items():
+            previous = baseline.get(size, {}).get(stage)
+            if not previous or not previous["p50_seconds"]:
+                continue
+            change = stats["p50_seconds"] / previous["p50_seconds"] - 1
+            if change > threshold:
+                regressions += 1
+                print(
+                    f"REGRESSION {stage} (size {size}): p50 {previous['p50_seconds']:.3f}s -> "
+                    f"{stats['p50_seconds']:.3f}s (+{change:.0%})"
+                )
+    if not regressions:
+        print(f"No stage regressed by more than {threshold:.0%} against {baseline_path}.")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark CopyCatch pipelines with fake LLM/embedding clients.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated comparison corpus sizes")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per size (each on a fresh corpus)")
+    parser.add_argument("--references", type=int, default=20, help="References per synthetic paper")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS_PARAPHRASE)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="Median fake chat latency")
+    parser.add_argument("--embedding-latency-ms", type=float, default=20.0, help="Median fake embedding latency")
+    parser.add_argument("--lookup-latency-ms", type=float, default=200.0, help="Median fake arXiv/web lookup latency")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON (usable later as --baseline)")
+    parser.add_argument("--baseline", help="Earlier --output file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    llm = FakeChatModel(latency_median=args.llm_latency_ms / 1000, seed=args.seed)
+    embeddings = FakeEmbeddings(latency_median=args.embedding_latency_ms / 1000, seed=args.seed)
+    citation_tools = build_citation_tools(llm, args)
+
+    tracemalloc.start()
+    results = {}
+    try:
+        for size in sizes:
+            print(f"Benchmarking corpus size {size}...", flush=True)
+            results[str(size)] = benchmark_size(size, args, llm, embeddings, citation_tools)
+    except EmptyStageError as e:
+        print(f"Benchmark aborted: {e}")
+        return 2
+    finally:
+        tracemalloc.stop()
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    print_report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"arguments": vars(args), "results": results}, f, indent=2)
+    if args.baseline:
+        return 1 if compare_to_baseline(results, args.baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
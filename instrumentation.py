@@ -0,0 +1,241 @@
+"""Lightweight tracing and metrics shared by every CopyCatch pipeline.
+
+Code marks its stages with ``span("vector_search", component="paraphrase")`` (or the
+``traced`` decorator) and counts events with ``increment``. Every span's duration
+lands in a per-stage histogram; with COPYCATCH_TRACE_FILE set, each span is also
+appended to that file as a JSON line (with trace/parent IDs, so a slow review can
+be broken down afterwards). Metrics are served in Prometheus text format on
+http://127.0.0.1:$COPYCATCH_METRICS_PORT/metrics when that variable is set, or
+from any process that calls start_metrics_server().
+
+Stage names in use: extract_text, chunking, embedding, vector_search, llm_call,
+external_lookup.
+"""
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRACE_FILE = os.getenv("COPYCATCH_TRACE_FILE")
+METRICS_PORT = os.getenv("COPYCATCH_METRICS_PORT")
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+COUNTER_HELP = {
+    "copycatch_llm_requests_total": "LLM requests, by component.",
+    "copycatch_llm_tokens_total": "LLM tokens reported by the provider, by component and kind (prompt/completion).",
+    "copycatch_cache_requests_total": "Cache lookups, by namespace and result (hit/miss).",
+    "copycatch_retries_total": "Retried calls, by component.",
+    "copycatch_stage_errors_total": "Spans that ended with an exception, by stage and component.",
+}
+
+# (trace_id, span_id) of the innermost open span in this context
+_current_span = contextvars.ContextVar("copycatch_current_span", default=None)
+
+_metrics_lock = threading.Lock()
+_counters = {}  # (metric name, sorted label items) -> value
+_durations = {}  # (stage, component) -> [count per bucket..., +Inf count, sum]
+
+_trace_lock = threading.Lock()
+_trace_file = None
+
+_metrics_server = None
+_metrics_server_lock = threading.Lock()
+
+
+def increment(name, value=1, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with _metrics_lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def _observe_duration(stage, component, seconds):
+    with _metrics_lock:
+        histogram = _durations.setdefault((stage, component), [0] * (len(DURATION_BUCKETS) + 2))
+        for index, bucket in enumerate(DURATION_BUCKETS):
+            if seconds <= bucket:
+                histogram[index] += 1
+        histogram[-2] += 1
+        histogram[-1] += seconds
+
+
+def _write_trace_event(event):
+    global _trace_file
+    line = json.dumps(event, ensure_ascii=False, default=str)
+    with _trace_lock:
+        if _trace_file is None:
+            _trace_file = open(TRACE_FILE, "a", encoding="utf-8")
+        _trace_file.write(line + "\n")
+        _trace_file.flush()
+
+
+@contextmanager
+def span(stage, component="", **attributes):
+    """Times the enclosed block as one stage; yields a dict the block may add attributes to."""
+    parent = _current_span.get()
+    trace_id = parent[0] if parent else uuid.uuid4().hex[:16]
+    span_id = uuid.uuid4().hex[:16]
+    token = _current_span.set((trace_id, span_id))
+    started_at = time.time()
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield attributes
+    except BaseException:
+        status = "error"
+        increment("copycatch_stage_errors_total", stage=stage, component=component)
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        _current_span.reset(token)
+        _observe_duration(stage, component, duration)
+        if TRACE_FILE:
+            _write_trace_event(
+                {
+                    "trace_id": trace_id,
+                    "span_id": span_id,
+                    "parent_id": parent[1] if parent else None,
+                    "stage": stage,
+                    "component": component,
+                    "start": started_at,
+                    "duration_seconds": round(duration, 6),
+                    "status": status,
+                    "thread": threading.current_thread().name,
+                    "attributes": attributes,
+                }
+            )
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose tasks run in a copy of the submitter's context.
+
+    Worker threads otherwise start from an empty context, so spans opened in a task
+    would lose their parent and the run's usage tracker would not see the task's calls.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def traced(stage, component=""):
+    """Decorator form of span()."""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage, component):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def extract_token_usage(response):
+    """Returns (prompt_tokens, completion_tokens) from a chat model response, or zeros."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0) or 0, usage.get("output_tokens", 0) or 0
+    token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage")
+    if token_usage:
+        return token_usage.get("prompt_tokens", 0) or 0, token_usage.get("completion_tokens", 0) or 0
+    return 0, 0
+
+
+def record_llm_response(component, response, span_attributes=None):
+    """Counts one LLM response and its token usage; optionally notes the tokens on the current span."""
+    prompt_tokens, completion_tokens = extract_token_usage(response)
+    increment("copycatch_llm_requests_total", component=component)
+    if prompt_tokens:
+        increment("copycatch_llm_tokens_total", prompt_tokens, component=component, kind="prompt")
+    if completion_tokens:
+        increment("copycatch_llm_tokens_total", completion_tokens, component=component, kind="completion")
+    if span_attributes is not None:
+        span_attributes.update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+
+def record_cache_lookup(namespace, hit):
+    increment("copycatch_cache_requests_total", namespace=namespace, result="hit" if hit else "miss")
+
+
+def record_retry(component, count=1):
+    if count:
+        increment("copycatch_retries_total", count, component=component)
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels) + "}"
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format."""
+    with _metrics_lock:
+        counters = dict(_counters)
+        durations = {key: list(value) for key, value in _durations.items()}
+    lines = []
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# HELP {name} {COUNTER_HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} counter")
+        for (counter_name, labels), value in sorted(counters.items()):
+            if counter_name == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+    name = "copycatch_stage_duration_seconds"
+    lines.append(f"# HELP {name} Time spent in each pipeline stage.")
+    lines.append(f"# TYPE {name} histogram")
+    for (stage, component), histogram in sorted(durations.items()):
+        labels = (("component", component), ("stage", stage))
+        for bucket, count in zip(DURATION_BUCKETS, histogram):
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', bucket),))} {count}")
+        lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram[-2]}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram[-1]}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram[-2]}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the console
+
+
+def start_metrics_server(port=None, host="127.0.0.1"):
+    """Serves /metrics from a background thread; a no-op if this process already does."""
+    global _metrics_server
+    with _metrics_server_lock:
+        if _metrics_server is not None:
+            return _metrics_server
+        port = int(port if port is not None else METRICS_PORT or 9464)
+        try:
+            _metrics_server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+        except OSError as e:
+            # Typically another CopyCatch process already serves this port
+            print(f"Warning: could not start the metrics server on port {port}: {e}")
+            return None
+        _metrics_server.daemon_threads = True
+        threading.Thread(target=_metrics_server.serve_forever, daemon=True, name="copycatch-metrics").start()
+        return _metrics_server
+
+
+if METRICS_PORT:
+    start_metrics_server()
@@ -0,0 +1,329 @@
+"""Local background job queue for long-running analyses.
+
+The Streamlit apps submit jobs here instead of running analyses inside the script
+thread, then poll by job ID; widget interactions and reruns no longer restart the
+work, and several reviewers can have jobs in flight at once.
+
+Jobs are JSON files that move between state directories under COPYCATCH_JOB_DIR
+(queued/ -> running/ -> done/ or failed/). A worker claims a job by renaming it out
+of queued/, which is atomic, so any number of worker processes can share a store.
+Start a worker explicitly with
+
+    python job_queue.py worker --concurrency 4
+
+or let the UIs start one on demand via ensure_worker().
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import socket
+import argparse
+import threading
+import subprocess
+
+JOB_STORE_DIR = os.getenv(
+    "COPYCATCH_JOB_DIR", os.path.join(os.path.expanduser("~"), ".cache", "copycatch", "jobs")
+)
+JOB_STATES = ("queued", "running", "done", "failed")
+FINISHED_STATES = ("done", "failed")
+DEFAULT_WORKER_CONCURRENCY = int(os.getenv("COPYCATCH_WORKER_CONCURRENCY", "4"))
+WORKER_POLL_SECONDS = 1.0
+WORKER_HEARTBEAT_SECONDS = 5.0
+# A worker silent for this long is presumed dead and its running jobs are requeued
+WORKER_STALE_SECONDS = 60.0
+JOB_RETENTION_DAYS = float(os.getenv("COPYCATCH_JOB_RETENTION_DAYS", "7"))
+
+
+class JobStore:
+    """On-disk job records shared by the UIs (which submit and poll) and the workers."""
+
+    def __init__(self, root=JOB_STORE_DIR):
+        self.root = root
+        for directory in JOB_STATES + ("inputs", "workers"):
+            os.makedirs(os.path.join(root, directory), exist_ok=True)
+
+    def _path(self, state, job_id):
+        return os.path.join(self.root, state, f"{job_id}.json")
+
+    def input_dir(self, job_id):
+        return os.path.join(self.root, "inputs", job_id)
+
+    def _write(self, path, record):
+        # Write-then-rename so pollers never read a half-written record
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(temp_path, path)
+
+    def _read(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def submit(self, kind, input_path, params=None, extra_inputs=None):
+        """Queues a job and returns its ID.
+
+        The input file (and any ``extra_inputs``, e.g. comparison papers, copied into an
+        ``extra`` subdirectory) is copied into the store, so callers may delete their
+        temporary files immediately.
+        """
+        job_id = uuid.uuid4().hex
+        job_input_dir = self.input_dir(job_id)
+        os.makedirs(job_input_dir)
+        stored_input = os.path.join(job_input_dir, os.path.basename(input_path))
+        shutil.copyfile(input_path, stored_input)
+        if extra_inputs:
+            extra_dir = os.path.join(job_input_dir, "extra")
+            os.makedirs(extra_dir)
+            for extra_path in extra_inputs:
+                shutil.copyfile(extra_path, os.path.join(extra_dir, os.path.basename(extra_path)))
+        record = {
+            "id": job_id,
+            "kind": kind,
+            "input_path": stored_input,
+            "params": params or {},
+            "status": "queued",
+            "progress": 0.0,
+            "message": "Queued",
+            "partial": None,
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "worker": None,
+        }
+        self._write(self._path("queued", job_id), record)
+        return job_id
+
+    def get(self, job_id):
+        """Returns the job record, or None if the ID is unknown."""
+        # A job can move between directories while we look; a second pass catches it
+        for _ in range(2):
+            for state in JOB_STATES:
+                record = self._read(self._path(state, job_id))
+                if record is not None:
+                    return record
+        return None
+
+    def claim(self, worker_id):
+        """Atomically takes the oldest queued job for this worker, or returns None."""
+        queued_dir = os.path.join(self.root, "queued")
+        candidates = sorted(
+            (entry for entry in os.scandir(queued_dir) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in candidates:
+            job_id = entry.name[: -len(".json")]
+            running_path = self._path("running", job_id)
+            try:
+                os.rename(entry.path, running_path)
+            except FileNotFoundError:
+                continue  # another worker got it first
+            record = self._read(running_path)
+            if record is None:
+                continue
+            record.update(status="running", started_at=time.time(), worker=worker_id, message="Started")
+            self._write(running_path, record)
+            return record
+        return None
+
+    def update_progress(self, record, progress, message, partial=None):
+        record["progress"] = round(float(progress), 4)
+        record["message"] = message
+        if partial is not None:
+            record["partial"] = partial
+        self._write(self._path("running", record["id"]), record)
+
+    def finish(self, record, result=None, error=None):
+        state = "failed" if error else "done"
+        record.update(
+            status=state,
+            progress=1.0 if not error else record["progress"],
+            message="Failed" if error else "Completed",
+            result=result,
+            error=error,
+            finished_at=time.time(),
+        )
+        self._write(self._path(state, record["id"]), record)
+        try:
+            os.remove(self._path("running", record["id"]))
+        except FileNotFoundError:
+            pass
+
+    def heartbeat(self, worker_id):
+        with open(os.path.join(self.root, "workers", worker_id), "w", encoding="utf-8") as f:
+            f.write(str(time.time()))
+
+    def live_workers(self):
+        workers_dir = os.path.join(self.root, "workers")
+        now = time.time()
+        return [
+            entry.name
+            for entry in os.scandir(workers_dir)
+            if now - entry.stat().st_mtime < WORKER_STALE_SECONDS
+        ]
+
+    def requeue_orphaned(self):
+        """Puts running jobs whose worker stopped heartbeating back in the queue."""
+        live = set(self.live_workers())
+        running_dir = os.path.join(self.root, "running")
+        for entry in os.scandir(running_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            record = self._read(entry.path)
+            if record is None or record.get("worker") in live:
+                continue
+            record.update(status="queued", worker=None, message="Requeued after worker loss")
+            self._write(entry.path, record)
+            try:
+                os.rename(entry.path, self._path("queued", record["id"]))
+            except FileNotFoundError:
+                pass
+
+    def purge_finished(self, older_than_days=JOB_RETENTION_DAYS):
+        cutoff = time.time() - older_than_days * 24 * 3600
+        for state in FINISHED_STATES:
+            for entry in os.scandir(os.path.join(self.root, state)):
+                if entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                    job_id = entry.name[: -len(".json")]
+                    os.remove(entry.path)
+                    shutil.rmtree(self.input_dir(job_id), ignore_errors=True)
+
+
+def submit_job(kind, input_path, params=None, extra_inputs=None, store=None):
+    """Queues an analysis, makes sure a worker is running, and returns the job ID."""
+    store = store or JobStore()
+    job_id = store.submit(kind, input_path, params, extra_inputs)
+    ensure_worker(store)
+    return job_id
+
+
+def get_job(job_id, store=None):
+    return (store or JobStore()).get(job_id)
+
+
+def ensure_worker(store=None, concurrency=DEFAULT_WORKER_CONCURRENCY):
+    """Starts a detached worker process unless one is already heartbeating."""
+    store = store or JobStore()
+    if store.live_workers():
+        return
+    log_path = os.path.join(store.root, "worker.log")
+    with open(log_path, "a", encoding="utf-8") as log_file:
+        subprocess.Popen(
+            [
+                sys.executable,
+                os.path.abspath(__file__),
+                "worker",
+                "--store",
+                store.root,
+                "--concurrency",
+                str(concurrency),
+            ],
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL,
+            start_new_session=True,  # survives the Streamlit script that launched it
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    # Claim the heartbeat slot right away so concurrent submitters don't start a second worker
+    store.heartbeat("starting")
+
+
+def _execute_job(store, record):
+    params = record["params"]
+    extra_dir = os.path.join(store.input_dir(record["id"]), "extra")
+    runner = None
+    try:
+        # Imported in the worker only: the analyzers pull in the full LLM stack, which the
+        # UIs don't need just to submit and poll jobs
+        from pipelines import PipelineRunner
+
+        runner = PipelineRunner(
+            comparison_dir=params.get("comparison_dir") or (extra_dir if os.path.isdir(extra_dir) else None),
+            output_dir=os.path.join(store.input_dir(record["id"]), "output"),
+            max_workers=params.get("max_workers", DEFAULT_WORKER_CONCURRENCY),
+            paraphrase_settings=params.get("paraphrase_settings"),
+        )
+        result = runner.run(
+            record["kind"],
+            record["input_path"],
+            progress_callback=lambda progress, message, partial=None: store.update_progress(
+                record, progress, message, partial
+            ),
+        )
+        store.finish(record, result=result)
+    except Exception as e:
+        store.finish(record, error=f"{type(e).__name__}: {e}")
+    finally:
+        if runner is not None:
+            runner.close()
+
+
+def run_worker(store=None, concurrency=DEFAULT_WORKER_CONCURRENCY, idle_exit_seconds=None):
+    """Processes queued jobs until interrupted (or idle for idle_exit_seconds)."""
+    store = store or JobStore()
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    stop = threading.Event()
+
+    def heartbeat_loop():
+        while not stop.is_set():
+            store.heartbeat(worker_id)
+            stop.wait(WORKER_HEARTBEAT_SECONDS)
+
+    threading.Thread(target=heartbeat_loop, daemon=True).start()
+    store.requeue_orphaned()
+    store.purge_finished()
+    last_activity = [time.time()]
+    activity_lock = threading.Lock()
+
+    def job_loop():
+        while not stop.is_set():
+            record = store.claim(worker_id)
+            if record is None:
+                stop.wait(WORKER_POLL_SECONDS)
+                continue
+            print(f"Running job {record['id']} ({record['kind']})", flush=True)
+            _execute_job(store, record)
+            with activity_lock:
+                last_activity[0] = time.time()
+
+    job_threads = [threading.Thread(target=job_loop, daemon=True) for _ in range(max(1, concurrency))]
+    for thread in job_threads:
+        thread.start()
+    try:
+        while True:
+            time.sleep(WORKER_POLL_SECONDS)
+            if idle_exit_seconds is not None:
+                with activity_lock:
+                    idle_for = time.time() - last_activity[0]
+                running = os.listdir(os.path.join(store.root, "running"))
+                queued = os.listdir(os.path.join(store.root, "queued"))
+                if idle_for > idle_exit_seconds and not running and not queued:
+                    break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        try:
+            os.remove(os.path.join(store.root, "workers", worker_id))
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CopyCatch background job worker.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    worker_parser = subparsers.add_parser("worker", help="Process queued analysis jobs")
+    worker_parser.add_argument("--store", default=JOB_STORE_DIR, help="Job store directory")
+    worker_parser.add_argument("--concurrency", type=int, default=DEFAULT_WORKER_CONCURRENCY)
+    worker_parser.add_argument(
+        "--idle-exit", type=float, default=None, help="Exit after this many idle seconds"
+    )
+    args = parser.parse_args()
+    run_worker(JobStore(args.store), args.concurrency, args.idle_exit)
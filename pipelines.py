@@ -0,0 +1,241 @@
+"""Headless entry points to every CopyCatch analyzer.
+
+The Streamlit apps each wire up their own clients and inputs; this module does the
+same once per process so scripts (batch_runner.py, job_queue.py, api_server.py) can
+run any analyzer on a file path and get JSON-serializable results back.
+"""
+import os
+import sys
+import hashlib
+import threading
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+SUMMARY_APP_DIR = os.path.join(ROOT_DIR, "Summary_Novelty_CitaionVerfication")
+# The summary/citation app imports its helpers as top-level "modules.*"
+if SUMMARY_APP_DIR not in sys.path:
+    sys.path.insert(0, SUMMARY_APP_DIR)
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from modules.clients import get_embeddings, get_llm, get_llm_and_tools
+from modules.analysis_coordinator import ANALYSES, run_analysis
+from modules.summarizer import analyze_paper
+from modules.citation_verifier import verify_citations
+from modules.ai_detector import analyze_pdf_for_ai_content
+from Semantic_similarity.orchestrator import AgenticResearchPaperAnalyzer
+from Paraphrase_Detector.paraphrase_processing import (
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_MAX_WORKERS_PARAPHRASE,
+    DEFAULT_MIN_CONTENT_LENGTH,
+    DEFAULT_MIN_WORD_COUNT,
+    DEFAULT_BATCH_SIZE_PARAPHRASE,
+    chunk_text_by_sections,
+    detect_paraphrased_sections_processing,
+    extract_text_from_file,
+    load_comparison_docs_for_paraphrase,
+)
+from usage_tracking import (
+    MAX_REQUESTS_PER_RUN,
+    MAX_TOKENS_PER_RUN,
+    BudgetExceeded,
+    UsageTracker,
+    track_usage,
+    usage_document,
+)
+
+ANALYZERS = ("paper_analysis", "summary", "citations", "ai_detection", "paraphrase", "semantic")
+# Analyzers that compare each submission against a directory of other papers
+COMPARISON_ANALYZERS = ("paraphrase", "semantic")
+
+
+def get_file_hash(file_content: bytes) -> str:
+    return hashlib.sha256(file_content).hexdigest()
+
+
+def to_jsonable(value):
+    """Converts analyzer output (pydantic models, tuples, ...) into plain JSON types."""
+    if hasattr(value, "model_dump"):
+        return to_jsonable(value.model_dump())
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_jsonable(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def list_comparison_pdfs(comparison_dir, exclude_path=None):
+    if not comparison_dir or not os.path.isdir(comparison_dir):
+        return []
+    exclude = os.path.abspath(exclude_path) if exclude_path else None
+    return sorted(
+        os.path.join(comparison_dir, name)
+        for name in os.listdir(comparison_dir)
+        if name.lower().endswith(".pdf") and os.path.abspath(os.path.join(comparison_dir, name)) != exclude
+    )
+
+
+class PipelineRunner:
+    """Runs analyzers on single submissions, sharing clients and comparison indexes across calls.
+
+    Safe to use from several threads: the comparison vector stores are built once, on
+    first use, and the semantic analyzer's executor is reused rather than shut down.
+    ``paraphrase_settings`` overrides the paraphrase defaults (chunk_size, chunk_overlap,
+    min_content_length, min_word_count, batch_size). ``token_budget`` and ``request_budget``
+    cap the LLM usage of each run (see usage_tracking.py).
+
+    Every run_* method accepts an optional progress_callback(fraction, message, partial=None).
+    """
+
+    def __init__(
+        self,
+        comparison_dir=None,
+        output_dir="batch_results",
+        max_workers=DEFAULT_MAX_WORKERS_PARAPHRASE,
+        paraphrase_settings=None,
+        token_budget=MAX_TOKENS_PER_RUN,
+        request_budget=MAX_REQUESTS_PER_RUN,
+    ):
+        self.comparison_dir = comparison_dir
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.token_budget = token_budget
+        self.request_budget = request_budget
+        settings = paraphrase_settings or {}
+        self.min_content_length = settings.get("min_content_length", DEFAULT_MIN_CONTENT_LENGTH)
+        self.min_word_count = settings.get("min_word_count", DEFAULT_MIN_WORD_COUNT)
+        self.batch_size = settings.get("batch_size", DEFAULT_BATCH_SIZE_PARAPHRASE)
+        self._lock = threading.Lock()
+        self._paraphrase_stores = None
+        self._semantic_analyzer = None
+        self._text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=settings.get("chunk_size", DEFAULT_CHUNK_SIZE),
+            chunk_overlap=settings.get("chunk_overlap", DEFAULT_CHUNK_OVERLAP),
+            length_function=len,
+            separators=["\n\n", "\n", ". ", " ", ""],
+        )
+
+    def close(self):
+        if self._semantic_analyzer is not None:
+            self._semantic_analyzer.close()
+
+    def _get_paraphrase_stores(self):
+        with self._lock:
+            if self._paraphrase_stores is None:
+                self._paraphrase_stores = load_comparison_docs_for_paraphrase(
+                    self.comparison_dir,
+                    self._text_splitter,
+                    get_embeddings(),
+                    get_file_hash,
+                    self.min_content_length,
+                    self.min_word_count,
+                )
+            return self._paraphrase_stores
+
+    def _get_semantic_analyzer(self):
+        with self._lock:
+            if self._semantic_analyzer is None:
+                self._semantic_analyzer = AgenticResearchPaperAnalyzer(
+                    llm_client=get_llm(), embeddings_model_client=get_embeddings()
+                )
+            return self._semantic_analyzer
+
+    def warm_up(self, analyzers=ANALYZERS):
+        """Builds the shared clients, and the comparison indexes the given analyzers use, ahead of the first run."""
+        get_llm()
+        get_embeddings()
+        get_llm_and_tools()
+        if self.comparison_dir and "paraphrase" in analyzers:
+            self._get_paraphrase_stores()
+        if "semantic" in analyzers:
+            self._get_semantic_analyzer()
+
+    def run_paper_analysis(self, pdf_path, progress_callback=None):
+        """Summary, novelty and citation verification together, reporting each as it completes."""
+        completed = {}
+
+        def on_result(name, result):
+            completed[name] = result
+            if progress_callback:
+                progress_callback(len(completed) / len(ANALYSES), f"Finished {name}", to_jsonable(completed))
+
+        llm, tools = get_llm_and_tools()
+        return run_analysis(pdf_path, on_result=on_result, llm=llm, tools=tools)
+
+    def run_summary(self, pdf_path, progress_callback=None):
+        summary, novelty = analyze_paper(pdf_path, llm=get_llm())
+        return {"summary": summary, "novelty": novelty}
+
+    def run_citations(self, pdf_path, progress_callback=None):
+        llm, tools = get_llm_and_tools()
+        return verify_citations(pdf_path, llm=llm, tools=tools)
+
+    def run_ai_detection(self, pdf_path, progress_callback=None):
+        return analyze_pdf_for_ai_content(pdf_path)
+
+    def run_paraphrase(self, pdf_path, progress_callback=None):
+        if progress_callback:
+            progress_callback(0.0, "Loading comparison documents")
+        stores = self._get_paraphrase_stores()
+        if not stores:
+            return {"error": f"No comparison documents could be loaded from '{self.comparison_dir}'."}
+        with open(pdf_path, "rb") as f:
+            file_content = f.read()
+        file_type = pdf_path.rsplit(".", 1)[-1].lower()
+        text = extract_text_from_file(file_content, file_type, self.min_content_length, self.min_word_count)
+        if not text:
+            return {"error": "No meaningful text could be extracted from the submission."}
+        source_documents = chunk_text_by_sections(
+            text, get_file_hash(file_content), self._text_splitter, self.min_content_length, self.min_word_count
+        )
+        # The submission itself may sit in the comparison directory; never match it against itself
+        stores = {name: store for name, store in stores.items() if name != os.path.basename(pdf_path)}
+        paraphrases = detect_paraphrased_sections_processing(
+            source_documents,
+            stores,
+            get_llm(),
+            self.min_content_length,
+            self.min_word_count,
+            self.batch_size,
+            self.max_workers,
+            (lambda fraction: progress_callback(fraction, "Detecting paraphrases")) if progress_callback else None,
+            embeddings_model=get_embeddings(),
+        )
+        return {"chunks_analyzed": len(source_documents), "paraphrases": paraphrases}
+
+    def run_semantic(self, pdf_path, progress_callback=None):
+        comparison_pdfs = list_comparison_pdfs(self.comparison_dir, exclude_path=pdf_path)
+        if not comparison_pdfs:
+            return {"error": f"No comparison PDFs found in '{self.comparison_dir}'."}
+        submission_output_dir = os.path.join(
+            self.output_dir, "semantic", os.path.splitext(os.path.basename(pdf_path))[0]
+        )
+        os.makedirs(submission_output_dir, exist_ok=True)
+        results = self._get_semantic_analyzer().analyze_papers_from_pdfs(
+            pdf_path,
+            comparison_pdfs,
+            output_dir=submission_output_dir,
+            progress_callback=(
+                (lambda fraction, message, partial: progress_callback(fraction, message, to_jsonable(partial)))
+                if progress_callback
+                else None
+            ),
+        )
+        return to_jsonable(results)
+
+    def run(self, analyzer, pdf_path, progress_callback=None):
+        """Runs one analyzer and returns its JSON-serializable result, with the run's LLM usage under "usage"."""
+        if analyzer not in ANALYZERS:
+            raise ValueError(f"Unknown analyzer '{analyzer}'. Choose from: {', '.join(ANALYZERS)}")
+        tracker = UsageTracker(max_tokens=self.token_budget, max_requests=self.request_budget)
+        with track_usage(tracker), usage_document(os.path.basename(pdf_path)):
+            try:
+                result = getattr(self, f"run_{analyzer}")(pdf_path, progress_callback=progress_callback)
+            except BudgetExceeded as e:
+                result = {"error": f"Stopped early: the {e}."}
+        result = to_jsonable(result)
+        if isinstance(result, dict):
+            result["usage"] = tracker.summary()
+        return result
@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUMMARY_APP_DIR = os.path.join(ROOT_DIR, "Summary_Novelty_CitaionVerfication")
+# Root modules (job_queue, instrumentation) and the summary app's top-level "modules.*"
+for path in (ROOT_DIR, SUMMARY_APP_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
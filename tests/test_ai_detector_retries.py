@@ -0,0 +1,68 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from modules import ai_detector
+
+
+class _StandInWinston(BaseHTTPRequestHandler):
+    """Replays ``script`` (status codes, or "slow" for a response past the read timeout), then scores."""
+
+    script = []
+    calls = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        type(self).calls += 1
+        step = self.script.pop(0) if self.script else 200
+        if step == "slow":
+            time.sleep(0.5)
+            step = 200
+        body = json.dumps({"score": 42} if step == 200 else {"error": "unavailable"}).encode("utf-8")
+        self.send_response(step)
+        if step in (429, 503):
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def winston(monkeypatch):
+    handler = type("Handler", (_StandInWinston,), {"script": [], "calls": 0})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    monkeypatch.setattr(ai_detector, "WINSTON_API_URL", f"http://127.0.0.1:{server.server_address[1]}/detect")
+    monkeypatch.setattr(ai_detector, "AI_DETECTOR_TIMEOUT", (1, 0.2))
+    monkeypatch.setattr(ai_detector, "_session", None)
+    yield handler
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_throttling_responses_are_retried(winston, status):
+    winston.script = [status]
+    assert ai_detector.detect_ai_generated_text("some text") == {"score": 42}
+    assert winston.calls == 2
+
+
+@pytest.mark.parametrize("status", [500, 502, 504])
+def test_server_errors_are_not_repeated(winston, status):
+    winston.script = [status]
+    assert "error" in ai_detector.detect_ai_generated_text("some text")
+    assert winston.calls == 1
+
+
+def test_read_timeouts_are_not_repeated(winston):
+    # The provider may already have scored (and billed) the window
+    winston.script = ["slow", "slow"]
+    assert "error" in ai_detector.detect_ai_generated_text("some text")
+    assert winston.calls == 1
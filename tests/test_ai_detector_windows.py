@@ -0,0 +1,50 @@
+from modules.ai_detector import split_into_windows
+
+
+def _assert_contiguous(windows, text):
+    assert windows[0][0] == 0
+    assert windows[-1][1] == len(text)
+    for (_, end), (next_start, _) in zip(windows, windows[1:]):
+        assert end == next_start
+
+
+def test_empty_and_short_text():
+    assert split_into_windows("") == []
+    assert split_into_windows("A short text.", max_chars=1000, min_chars=10) == [(0, 13)]
+
+
+def test_windows_cover_the_text_and_respect_the_limit():
+    text = " ".join(f"Sentence number {i} says something." for i in range(400))
+    windows = split_into_windows(text, max_chars=1000, min_chars=100)
+    _assert_contiguous(windows, text)
+    assert len(windows) > 1
+    assert all(end - start <= 1000 for start, end in windows)
+
+
+def test_cuts_prefer_paragraph_breaks():
+    paragraph = "This paragraph is about one idea. " * 10
+    text = "\n\n".join([paragraph] * 6)
+    windows = split_into_windows(text, max_chars=1000, min_chars=100)
+    _assert_contiguous(windows, text)
+    for _, end in windows[:-1]:
+        assert text[:end].endswith("\n\n")
+
+
+def test_falls_back_to_sentence_ends_then_whitespace():
+    sentences = "Short sentence here. " * 100
+    windows = split_into_windows(sentences, max_chars=500, min_chars=100)
+    assert all(sentences[:end].endswith(". ") for _, end in windows[:-1])
+
+    words = "word " * 500
+    windows = split_into_windows(words, max_chars=500, min_chars=100)
+    assert all(words[:end].endswith(" ") for _, end in windows[:-1])
+
+
+def test_unbroken_text_is_cut_at_the_limit():
+    text = "x" * 2500
+    assert split_into_windows(text, max_chars=1000, min_chars=100) == [(0, 1000), (1000, 2000), (2000, 2500)]
+
+
+def test_short_tail_is_folded_into_the_previous_window():
+    text = "x" * 2050
+    assert split_into_windows(text, max_chars=1000, min_chars=100) == [(0, 1000), (1000, 2050)]
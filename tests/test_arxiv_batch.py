@@ -0,0 +1,126 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+import pytest
+
+from modules.arxiv_batch import _parse_arxiv_feed, fetch_arxiv_metadata_batch
+
+PAPERS = {
+    "1706.03762": ("Attention Is All You Need", ["Ashish Vaswani", "Noam Shazeer"], "The dominant sequence models..."),
+    "1810.04805": ("BERT: Pre-training of Deep\n  Bidirectional Transformers", ["Jacob Devlin"], "We introduce BERT."),
+    "2005.14165": ("Language Models are Few-Shot Learners", ["Tom B. Brown"], "Recent work has demonstrated..."),
+    "hep-th/9711200": ("The Large N Limit of Superconformal Field Theories", ["Juan Maldacena"], "We show that..."),
+}
+
+
+def _entry(entry_id, title="", authors=(), summary=""):
+    author_xml = "".join(f"<author><name>{escape(name)}</name></author>" for name in authors)
+    return (
+        f"<entry><id>{escape(entry_id)}</id><title>{escape(title)}</title>"
+        f"<summary>{escape(summary)}</summary>{author_xml}</entry>"
+    )
+
+
+def _feed(entries):
+    return '<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom">' + "".join(entries) + "</feed>"
+
+
+class _StandInArxiv(BaseHTTPRequestHandler):
+    """Answers id_list queries like export.arxiv.org, from PAPERS."""
+
+    requests = []
+    failing_ids = set()
+
+    def do_GET(self):
+        id_list = parse_qs(urlparse(self.path).query)["id_list"][0].split(",")
+        self.requests.append(id_list)
+        if self.failing_ids & set(id_list):
+            self.send_error(503, "Service Unavailable")
+            return
+        entries = []
+        for requested_id in id_list:
+            base_id = requested_id.split("v")[0] if "/" not in requested_id else requested_id
+            if base_id in PAPERS:
+                title, authors, summary = PAPERS[base_id]
+                version = requested_id if requested_id != base_id else base_id + "v1"
+                entries.append(_entry(f"http://arxiv.org/abs/{version}", title, authors, summary))
+            elif requested_id[0].isdigit():
+                # Well-formed but unknown IDs come back as an entry without a summary
+                entries.append(_entry(f"http://arxiv.org/abs/{requested_id}"))
+            else:
+                entries.append(_entry(f"http://arxiv.org/api/errors#incorrect_id_format_for_{requested_id}", "Error", (), "incorrect id format"))
+        body = _feed(entries).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def arxiv_server():
+    handler = type("Handler", (_StandInArxiv,), {"requests": [], "failing_ids": set()})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield handler, f"http://127.0.0.1:{server.server_address[1]}/api/query"
+    server.shutdown()
+    server.server_close()
+
+
+def test_parse_feed_normalizes_fields_and_skips_errors():
+    feed = _feed([
+        _entry("http://arxiv.org/abs/1810.04805v2", *PAPERS["1810.04805"]),
+        _entry("http://arxiv.org/api/errors#incorrect_id_format_for_bogus", "Error", (), "incorrect id format"),
+        _entry("http://arxiv.org/abs/9999.99999"),
+    ])
+    assert _parse_arxiv_feed(feed) == {
+        "1810.04805": {
+            "title": "BERT: Pre-training of Deep Bidirectional Transformers",
+            "authors": "Jacob Devlin",
+            "summary": "We introduce BERT.",
+        }
+    }
+
+
+def test_resolves_ids_in_batches_keyed_by_base_id(arxiv_server):
+    handler, api_url = arxiv_server
+    ids = ["arXiv:1706.03762v5", "1706.03762", "https://arxiv.org/abs/1810.04805", "2005.14165v2", "hep-th/9711200"]
+    metadata = fetch_arxiv_metadata_batch(ids, batch_size=2, api_url=api_url)
+
+    # Two versions of 1706.03762 are one paper, so four IDs go out in two batches of two
+    assert handler.requests == [["1706.03762v5", "1810.04805"], ["2005.14165v2", "hep-th/9711200"]]
+    assert set(metadata) == {"1706.03762", "1810.04805", "2005.14165", "hep-th/9711200"}
+    assert metadata["1706.03762"] == {
+        "title": "Attention Is All You Need",
+        "authors": "Ashish Vaswani, Noam Shazeer",
+        "summary": "The dominant sequence models...",
+    }
+    assert metadata["2005.14165"]["summary"] == "Recent work has demonstrated..."
+
+
+def test_unknown_ids_are_missing_from_the_result(arxiv_server):
+    handler, api_url = arxiv_server
+    metadata = fetch_arxiv_metadata_batch(["1706.03762", "9999.99999", "cs/0000000x"], api_url=api_url)
+    assert set(metadata) == {"1706.03762"}
+
+
+def test_failed_batch_leaves_only_its_ids_unresolved(arxiv_server):
+    handler, api_url = arxiv_server
+    handler.failing_ids = {"2005.14165"}
+    metadata = fetch_arxiv_metadata_batch(
+        ["1706.03762", "1810.04805", "2005.14165", "hep-th/9711200"], batch_size=2, api_url=api_url
+    )
+    assert len(handler.requests) == 2
+    assert set(metadata) == {"1706.03762", "1810.04805"}
+
+
+def test_no_valid_ids_makes_no_request(arxiv_server):
+    handler, api_url = arxiv_server
+    assert fetch_arxiv_metadata_batch(["", None, "not an id"], api_url=api_url) == {}
+    assert handler.requests == []
@@ -0,0 +1,104 @@
+import os
+import time
+
+import pytest
+
+import job_queue
+from job_queue import JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(root=str(tmp_path / "jobs"))
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    path = tmp_path / "paper.pdf"
+    path.write_bytes(b"%PDF-1.4 test")
+    return str(path)
+
+
+def _queued_path(store, job_id):
+    return os.path.join(store.root, "queued", f"{job_id}.json")
+
+
+def test_submit_copies_the_input_and_queues_the_job(store, input_file):
+    job_id = store.submit("summary", input_file, params={"max_workers": 2})
+    os.remove(input_file)  # callers may delete their temporary file straight away
+    record = store.get(job_id)
+    assert record["status"] == "queued"
+    assert record["params"] == {"max_workers": 2}
+    with open(record["input_path"], "rb") as f:
+        assert f.read() == b"%PDF-1.4 test"
+
+
+def test_claim_takes_the_oldest_job_once(store, input_file):
+    older = store.submit("summary", input_file)
+    newer = store.submit("summary", input_file)
+    now = time.time()
+    os.utime(_queued_path(store, older), (now - 10, now - 10))
+    os.utime(_queued_path(store, newer), (now, now))
+
+    first = store.claim("worker-a")
+    second = store.claim("worker-b")
+    assert (first["id"], second["id"]) == (older, newer)
+    assert first["status"] == "running" and first["worker"] == "worker-a"
+    assert store.get(older)["status"] == "running"
+    assert store.claim("worker-a") is None
+
+
+def test_progress_and_successful_finish(store, input_file):
+    job_id = store.submit("summary", input_file)
+    record = store.claim("worker-a")
+    store.update_progress(record, 0.5, "Summarizing", partial={"summary": "draft"})
+    running = store.get(job_id)
+    assert (running["progress"], running["message"], running["partial"]) == (0.5, "Summarizing", {"summary": "draft"})
+
+    store.finish(record, result={"summary": "done"})
+    finished = store.get(job_id)
+    assert finished["status"] == "done"
+    assert finished["progress"] == 1.0
+    assert finished["result"] == {"summary": "done"}
+    assert not os.path.exists(os.path.join(store.root, "running", f"{job_id}.json"))
+
+
+def test_failed_finish_keeps_progress_and_error(store, input_file):
+    job_id = store.submit("summary", input_file)
+    record = store.claim("worker-a")
+    store.update_progress(record, 0.25, "Summarizing")
+    store.finish(record, error="RuntimeError: boom")
+    failed = store.get(job_id)
+    assert (failed["status"], failed["progress"], failed["error"]) == ("failed", 0.25, "RuntimeError: boom")
+
+
+def test_requeue_orphaned_only_requeues_jobs_of_dead_workers(store, input_file):
+    orphaned = store.submit("summary", input_file)
+    store.claim("dead-worker")
+    alive = store.submit("summary", input_file)
+    store.claim("live-worker")
+    store.heartbeat("live-worker")
+    store.heartbeat("dead-worker")
+    stale = time.time() - job_queue.WORKER_STALE_SECONDS - 1
+    os.utime(os.path.join(store.root, "workers", "dead-worker"), (stale, stale))
+
+    store.requeue_orphaned()
+    assert store.live_workers() == ["live-worker"]
+    requeued = store.get(orphaned)
+    assert (requeued["status"], requeued["worker"]) == ("queued", None)
+    assert store.get(alive)["status"] == "running"
+    assert store.claim("live-worker")["id"] == orphaned
+
+
+def test_purge_finished_removes_old_records_and_inputs(store, input_file):
+    old = store.submit("summary", input_file)
+    store.finish(store.claim("worker-a"), result={})
+    recent = store.submit("summary", input_file)
+    store.finish(store.claim("worker-a"), result={})
+    long_ago = time.time() - 8 * 24 * 3600
+    os.utime(os.path.join(store.root, "done", f"{old}.json"), (long_ago, long_ago))
+
+    store.purge_finished(older_than_days=7)
+    assert store.get(old) is None
+    assert not os.path.exists(store.input_dir(old))
+    assert store.get(recent)["status"] == "done"
@@ -0,0 +1,36 @@
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage
+
+from Paraphrase_Detector.paraphrase_processing import _process_single_chunk_for_paraphrase
+from usage_tracking import UsageTracker, track_usage, usage_document
+
+PASSAGE = (
+    "Transformer models rely on self-attention to relate every token in a sequence to every other token, "
+    "which lets them capture long-range dependencies without recurrence."
+)
+
+
+class _Store:
+    def similarity_search_with_score(self, query, k=5):
+        return [(Document(page_content=PASSAGE), 0.1)]
+
+
+class _MatchingLLM:
+    def invoke(self, prompt):
+        return AIMessage(
+            content="MATCH: YES | REASON: Same claim, reworded",
+            usage_metadata={"input_tokens": 120, "output_tokens": 8, "total_tokens": 128},
+        )
+
+
+def test_usage_is_attributed_to_the_submission_not_the_comparison_files():
+    tracker = UsageTracker(max_tokens=None, max_requests=None)
+    source_chunk = Document(page_content=PASSAGE, metadata={"section_title": "Introduction"})
+    with track_usage(tracker), usage_document("essay.pdf"):
+        for comparison in ("corpus_a.pdf", "corpus_b.pdf"):
+            match = _process_single_chunk_for_paraphrase(source_chunk, {comparison: _Store()}, _MatchingLLM(), 30, 5)
+            assert match["matched_file"] == comparison
+    by_document = tracker.summary()["by_document"]
+    assert list(by_document) == ["essay.pdf"]
+    assert by_document["essay.pdf"]["requests"] == 2
+    assert by_document["essay.pdf"]["total_tokens"] == 256
@@ -0,0 +1,62 @@
+import time
+
+from modules.persistent_cache import PersistentCache, get_cache
+
+
+def test_round_trips_json_values(tmp_path):
+    cache = PersistentCache("references", ttl_seconds=60, path=str(tmp_path / "cache.sqlite3"))
+    cache.set("arxiv:1706.03762", {"summary": "Attention", "authors": ["Vaswani"]})
+    assert cache.get("arxiv:1706.03762") == {"summary": "Attention", "authors": ["Vaswani"]}
+    assert cache.get("arxiv:0000.00000") is None
+
+
+def test_empty_keys_are_never_stored(tmp_path):
+    cache = PersistentCache("references", ttl_seconds=60, path=str(tmp_path / "cache.sqlite3"))
+    cache.set("", "value")
+    assert cache.get("") is None
+
+
+def test_expired_entries_are_misses_and_deleted(tmp_path, monkeypatch):
+    cache = PersistentCache("references", ttl_seconds=10, path=str(tmp_path / "cache.sqlite3"))
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.set("key", "value")
+    monkeypatch.setattr(time, "time", lambda: now + 5)
+    assert cache.get("key") == "value"
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("key") is None
+    # The expired row is gone, so even a longer TTL on the same namespace can't revive it
+    monkeypatch.setattr(time, "time", lambda: now)
+    assert PersistentCache("references", ttl_seconds=100, path=cache.path).get("key") is None
+
+
+def test_purge_expired_only_removes_old_entries(tmp_path, monkeypatch):
+    cache = PersistentCache("references", ttl_seconds=10, path=str(tmp_path / "cache.sqlite3"))
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.set("old", 1)
+    monkeypatch.setattr(time, "time", lambda: now + 8)
+    cache.set("fresh", 2)
+    monkeypatch.setattr(time, "time", lambda: now + 12)
+    assert cache.purge_expired() == 1
+    assert cache.get("old") is None
+    assert cache.get("fresh") == 2
+
+
+def test_namespaces_share_a_file_without_colliding(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    references = PersistentCache("reference_summaries", ttl_seconds=60, path=path)
+    detections = PersistentCache("ai_detection", ttl_seconds=60, path=path)
+    references.set("key", "reference")
+    detections.set("key", "detection")
+    assert references.get("key") == "reference"
+    assert detections.get("key") == "detection"
+    references.delete("key")
+    assert references.get("key") is None
+    assert detections.get("key") == "detection"
+
+
+def test_get_cache_returns_one_instance_per_namespace_and_path(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    assert get_cache("a", 60, path) is get_cache("a", 60, path)
+    assert get_cache("a", 60, path) is not get_cache("b", 60, path)
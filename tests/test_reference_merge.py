@@ -0,0 +1,54 @@
+import json
+
+from langchain_core.messages import AIMessage
+
+from modules import llm_tools
+from modules.llm_tools import _parse_references_from_text, _reference_dedup_key
+
+
+class ScriptedLLM:
+    """Answers each reference-parsing prompt with the entries scripted for the chunk it contains."""
+
+    def __init__(self, responses):
+        self.responses = responses
+
+    def invoke(self, prompt):
+        for marker, entries in self.responses.items():
+            if marker in prompt:
+                return AIMessage(content=json.dumps(entries))
+        return AIMessage(content="not json")
+
+
+def _entry(title, arxiv_id=None):
+    return {"title": title, "arxiv_id": arxiv_id, "authors": "A. Author", "entire_citation": title}
+
+
+def test_dedup_key_ignores_arxiv_versions_and_prefixes():
+    keys = {
+        _reference_dedup_key(_entry("Attention", arxiv_id))
+        for arxiv_id in ("1706.03762v5", "arXiv:1706.03762", "1706.03762", "https://arxiv.org/abs/1706.03762v1")
+    }
+    assert keys == {"arxiv:1706.03762"}
+
+
+def test_dedup_key_falls_back_to_the_text_for_unusable_ids():
+    assert _reference_dedup_key(_entry("Attention Is All You Need", "not an id")) == "attention is all you need"
+
+
+def test_chunks_repeating_a_reference_under_another_id_form_merge(monkeypatch):
+    monkeypatch.setattr(llm_tools, "REFERENCES_CHUNK_MAX_CHARS", 120)
+    # Free-form paragraphs the local rules can't split confidently, long enough for two chunks
+    first = "Vaswani and colleagues wrote about attention being all you need, see arXiv 1706.03762v5 for details"
+    second = "The attention paper again (arXiv:1706.03762) and then Devlin and colleagues on deep bidirectional BERT"
+    llm = ScriptedLLM({
+        "colleagues wrote about": [_entry("Attention Is All You Need", "1706.03762v5")],
+        "The attention paper again": [
+            _entry("Attention is all you need", "arXiv:1706.03762"),
+            _entry("BERT: Pre-training of Deep Bidirectional Transformers"),
+        ],
+    })
+    merged = json.loads(_parse_references_from_text(first + "\n\n" + second, llm))
+    assert [entry["title"] for entry in merged] == [
+        "Attention Is All You Need",
+        "BERT: Pre-training of Deep Bidirectional Transformers",
+    ]
@@ -0,0 +1,71 @@
+from modules.reference_parser import (
+    LOCAL_REFERENCES_MIN_CONFIDENCE,
+    chunk_references_text,
+    locate_references_section,
+    parse_references_locally,
+)
+
+# Pages as PDF loaders return them; citation_verifier and load_pdf_content join them with "\n"
+PAGES = [
+    "Attention Models for Everything\nAbstract\nWe study attention.\n1 Introduction\n"
+    "Prior work on references and bibliography management [1] is extensive.",
+    "2 Results\nOur model improves on the baseline of Smith et al. [2].\n6 Conclusion\nWe conclude.",
+    "References\n"
+    "[1] A. Vaswani, N. Shazeer, and N. Parmar. Attention is all you need. In NeurIPS, 2017. "
+    "arXiv:1706.03762\n"
+    "[2] J. Smith and K. Lee. A strong baseline for sequence modelling tasks. "
+    "Journal of Machine Learning Research, 2019.\n"
+    "[3] M. Garcia, P. Chen, and R. Patel. Scaling laws for neural language",
+    "models revisited. In ICML, pages 1-10, 2021.\n"
+    "[4] L. Nguyen and T. Brown. Efficient transformers: a survey of recent methods. ACM Computing Surveys, 2022.\n"
+    "Appendix A Proofs\nLemma 1 holds trivially.",
+]
+
+
+def test_locates_a_references_heading_at_the_top_of_a_page():
+    section, confidence = locate_references_section("\n".join(PAGES))
+    assert section.startswith("[1] A. Vaswani")
+    assert confidence >= LOCAL_REFERENCES_MIN_CONFIDENCE
+
+
+def test_section_stops_at_the_appendix():
+    section, _ = locate_references_section("\n".join(PAGES))
+    assert section.rstrip().endswith("ACM Computing Surveys, 2022.")
+    assert "Lemma 1" not in section
+
+
+def test_heading_glued_to_the_previous_page_is_not_a_heading():
+    # Joining pages without a separator puts "References" mid-line, where it can't be told from prose
+    section, confidence = locate_references_section("".join(PAGES))
+    assert (section, confidence) == ("", 0.0)
+
+
+def test_parses_entries_including_one_split_across_pages():
+    section, _ = locate_references_section("\n".join(PAGES))
+    entries, confidence = parse_references_locally(section)
+    assert confidence >= LOCAL_REFERENCES_MIN_CONFIDENCE
+    assert len(entries) == 4
+    assert entries[0]["arxiv_id"] == "1706.03762"
+    assert "Attention is all you need" in entries[0]["title"]
+    assert "Scaling laws for neural language models revisited" in entries[2]["entire_citation"]
+    assert all(entry["authors"] for entry in entries)
+
+
+def test_text_without_a_references_section():
+    assert locate_references_section("Just a paragraph about references in general.") == ("", 0.0)
+    assert parse_references_locally("Not a bibliography.") == ([], 0.0)
+
+
+def test_chunks_keep_entry_markers_so_each_can_be_parsed_locally():
+    references = "\n".join(
+        f"[{n}] A. Author{n} and B. Writer. A study of topic number {n} in depth. In Proceedings, 20{n:02d}."
+        for n in range(1, 13)
+    )
+    chunks = chunk_references_text(references, max_chars=400)
+    assert len(chunks) > 1
+    assert all(chunk.startswith("[") for chunk in chunks)
+    parsed_per_chunk = [parse_references_locally(chunk) for chunk in chunks]
+    # A failed LLM chunk falls back to these, so each must split into its own entries
+    assert all(confidence >= LOCAL_REFERENCES_MIN_CONFIDENCE for _, confidence in parsed_per_chunk)
+    titles = [entry["title"] for entries, _ in parsed_per_chunk for entry in entries]
+    assert titles == [f"A study of topic number {n} in depth" for n in range(1, 13)]
@@ -0,0 +1,186 @@
+"""Token and request accounting for a single analysis run.
+
+PipelineRunner.run opens a UsageTracker for every run. LLM call sites call
+check_budget() before each request and record_usage(stage, response) after it, using
+the token counts the provider reports. Totals are broken down by stage (the calling
+component) and by document, which is the submission unless a narrower usage_document()
+scope is open. They come back with the run's results under "usage".
+
+Optional per-run budgets are read from COPYCATCH_MAX_TOKENS_PER_RUN and
+COPYCATCH_MAX_LLM_REQUESTS_PER_RUN, or passed to PipelineRunner. Once a budget is spent,
+check_budget() raises BudgetExceeded. Calls the run can do without, such as a paraphrase
+chunk or a citation evaluation, are skipped; analyses that need the call report an
+error. Either way the rest of the run finishes with what it has.
+"""
+import os
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from instrumentation import extract_token_usage, record_llm_response
+
+MAX_TOKENS_PER_RUN = int(os.getenv("COPYCATCH_MAX_TOKENS_PER_RUN", "0")) or None
+MAX_REQUESTS_PER_RUN = int(os.getenv("COPYCATCH_MAX_LLM_REQUESTS_PER_RUN", "0")) or None
+# USD per 1,000 tokens; when set, summaries include a cost estimate
+PROMPT_COST_PER_1K = float(os.getenv("COPYCATCH_PROMPT_COST_PER_1K", "0"))
+COMPLETION_COST_PER_1K = float(os.getenv("COPYCATCH_COMPLETION_COST_PER_1K", "0"))
+
+_active_tracker = contextvars.ContextVar("copycatch_usage_tracker", default=None)
+_active_document = contextvars.ContextVar("copycatch_usage_document", default=None)
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised instead of making an LLM call once the run's token or request budget is spent."""
+
+
+def _empty_counts():
+    return {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+
+def _with_total(counts):
+    return {**counts, "total_tokens": counts["prompt_tokens"] + counts["completion_tokens"]}
+
+
+class UsageTracker:
+    """Thread-safe per-run counters of LLM requests and tokens, with optional budgets."""
+
+    def __init__(self, max_tokens=MAX_TOKENS_PER_RUN, max_requests=MAX_REQUESTS_PER_RUN):
+        self.max_tokens = max_tokens
+        self.max_requests = max_requests
+        self._lock = threading.Lock()
+        self._totals = _empty_counts()
+        self._by_stage = {}
+        self._by_document = {}
+        self._skipped_calls = 0
+
+    def record(self, stage, prompt_tokens, completion_tokens, document=None):
+        with self._lock:
+            for counts in (
+                self._totals,
+                self._by_stage.setdefault(stage, _empty_counts()),
+                self._by_document.setdefault(document or "unattributed", _empty_counts()),
+            ):
+                counts["requests"] += 1
+                counts["prompt_tokens"] += prompt_tokens
+                counts["completion_tokens"] += completion_tokens
+
+    def exceeded_reason(self):
+        """Why the budget is spent, or None while calls are still allowed."""
+        with self._lock:
+            tokens = self._totals["prompt_tokens"] + self._totals["completion_tokens"]
+            requests = self._totals["requests"]
+        if self.max_tokens is not None and tokens >= self.max_tokens:
+            return f"token budget of {self.max_tokens} spent ({tokens} tokens used)"
+        if self.max_requests is not None and requests >= self.max_requests:
+            return f"request budget of {self.max_requests} LLM calls spent"
+        return None
+
+    def check(self):
+        reason = self.exceeded_reason()
+        if reason:
+            with self._lock:
+                self._skipped_calls += 1
+            raise BudgetExceeded(reason)
+
+    def summary(self):
+        exceeded_reason = self.exceeded_reason()
+        with self._lock:
+            totals = _with_total(self._totals)
+            by_stage = {stage: _with_total(counts) for stage, counts in sorted(self._by_stage.items())}
+            by_document = {name: _with_total(counts) for name, counts in sorted(self._by_document.items())}
+            skipped_calls = self._skipped_calls
+        summary = {
+            **totals,
+            "by_stage": by_stage,
+            "by_document": by_document,
+            "budget": {
+                "max_tokens": self.max_tokens,
+                "max_requests": self.max_requests,
+                "exceeded": exceeded_reason is not None,
+                "skipped_calls": skipped_calls,
+            },
+        }
+        if PROMPT_COST_PER_1K or COMPLETION_COST_PER_1K:
+            summary["estimated_cost_usd"] = round(
+                totals["prompt_tokens"] / 1000 * PROMPT_COST_PER_1K
+                + totals["completion_tokens"] / 1000 * COMPLETION_COST_PER_1K,
+                6,
+            )
+        return summary
+
+
+@contextmanager
+def track_usage(tracker):
+    """Makes ``tracker`` the active tracker for the enclosed block (and pools using ContextThreadPoolExecutor)."""
+    token = _active_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _active_tracker.reset(token)
+
+
+@contextmanager
+def usage_document(name):
+    """Attributes LLM calls made in the enclosed block to document ``name``."""
+    token = _active_document.set(name)
+    try:
+        yield
+    finally:
+        _active_document.reset(token)
+
+
+def current_tracker():
+    return _active_tracker.get()
+
+
+def check_budget():
+    tracker = _active_tracker.get()
+    if tracker is not None:
+        tracker.check()
+
+
+def record_usage(stage, response):
+    tracker = _active_tracker.get()
+    if tracker is None:
+        return
+    prompt_tokens, completion_tokens = extract_token_usage(response)
+    tracker.record(stage, prompt_tokens, completion_tokens, _active_document.get())
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """Accounts the LLM calls a LangChain chain makes, whose responses never reach our code.
+
+    The tracker and document are captured when the handler is created, because chains
+    may call the model from their own worker threads.
+    """
+
+    # Let BudgetExceeded from the start hooks stop the chain rather than just being logged
+    raise_error = True
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.tracker = _active_tracker.get()
+        self.document = _active_document.get()
+
+    def _check_budget(self):
+        if self.tracker is not None:
+            self.tracker.check()
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._check_budget()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._check_budget()
+
+    def on_llm_end(self, response, **kwargs):
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                if message is None:
+                    continue
+                record_llm_response(self.stage, message)
+                if self.tracker is not None:
+                    prompt_tokens, completion_tokens = extract_token_usage(message)
+                    self.tracker.record(self.stage, prompt_tokens, completion_tokens, self.document)